@@ -0,0 +1,224 @@
+import numpy as np
+from tile import Tile
+from wall import Wall
+from player import spawn_cells
+
+# Tile types, matching Tile.tile_type
+EMPTY = 0
+WALL = 1
+BREAKABLE = 2
+
+# Bomb types stored in ArrayBoard.bomb_types
+NO_BOMB = 0
+PLAYER_BOMB = 1
+INITIAL_BOMB = 2
+BOMB_TYPES = {"player": PLAYER_BOMB, "initial": INITIAL_BOMB}
+
+
+def spawn_mask(rows, cols, num_players=2):
+    """
+    Get the cells kept clear around the players' starting cells.
+
+    Matches EXCLUDED_ROWS/EXCLUDED_COLS in config.py for any board size, plus
+    the start cell of every player and its neighbors, which GameState would
+    otherwise clear when the match starts.
+
+    :param rows: Number of rows on the board.
+    :param cols: Number of columns on the board.
+    :param num_players: Number of players.
+    :return: Boolean array, True where walls are not allowed.
+    """
+    excluded_rows = np.zeros(rows, dtype=bool)
+    excluded_rows[[0, 1, rows - 2, rows - 1]] = True
+    excluded_cols = np.zeros(cols, dtype=bool)
+    excluded_cols[[0, 1, 2, cols - 3, cols - 2, cols - 1]] = True
+    mask = excluded_rows[:, None] & excluded_cols[None, :]
+    for row, col in spawn_cells(rows, cols, num_players):
+        mask[max(row - 1, 0):row + 2, col] = True
+        mask[row, max(col - 1, 0):col + 2] = True
+    return mask
+
+
+def protected_mask(rows, cols, num_players=2):
+    """
+    Get the player start cells, which never hold a bomb.
+
+    :param rows: Number of rows on the board.
+    :param cols: Number of columns on the board.
+    :param num_players: Number of players.
+    :return: Boolean array, True on protected cells.
+    """
+    mask = np.zeros((rows, cols), dtype=bool)
+    for cell in spawn_cells(rows, cols, num_players):
+        mask[cell] = True
+    return mask
+
+
+class ArrayBoard:
+    def __init__(self, rows, cols, num_players=2):
+        """
+        Initialize the ArrayBoard object.
+
+        Stores tile types, bomb types and bomb turns in NumPy arrays, so boards far
+        larger than 15x15 can be generated and queried without per-cell objects.
+
+        :param rows: Number of rows on the board.
+        :param cols: Number of columns on the board.
+        :param num_players: Number of players, whose start cells are protected.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.num_players = num_players
+        self.tile_types = np.zeros((rows, cols), dtype=np.int8)
+        self.bomb_types = np.zeros((rows, cols), dtype=np.int8)
+        self.bomb_turns = np.zeros((rows, cols), dtype=np.int8)
+
+    @staticmethod
+    def generate(rows, cols, seed=None, wall_chance=0.2, breakable_chance=0.0, num_players=2):
+        """
+        Generate a board with a mix of walls, breakable walls and empty tiles.
+
+        :param rows: Number of rows on the board.
+        :param cols: Number of columns on the board.
+        :param seed: Optional seed (or numpy Generator) for the wall layout.
+        :param wall_chance: Chance of each non-spawn cell being a wall.
+        :param breakable_chance: Chance of each remaining non-spawn cell being a
+                                 breakable wall.
+        :param num_players: Number of players, whose start cells are kept clear.
+        :return: A new ArrayBoard.
+        """
+        rng = np.random.default_rng(seed)
+        board = ArrayBoard(rows, cols, num_players)
+        spawn = spawn_mask(rows, cols, num_players)
+        walls = rng.random((rows, cols)) < wall_chance
+        walls &= ~spawn
+        board.tile_types[walls] = WALL
+        if breakable_chance:  # Drawn after the walls, so the wall layout does not change
+            breakables = rng.random((rows, cols)) < breakable_chance
+            breakables &= ~(spawn | walls)
+            board.tile_types[breakables] = BREAKABLE
+        return board
+
+    def wall_cells(self):
+        """
+        Get every wall cell.
+
+        :return: List of (row, col) tuples.
+        """
+        return [tuple(cell) for cell in np.argwhere(self.tile_types == WALL).tolist()]
+
+    def breakable_cells(self):
+        """
+        Get every breakable wall cell.
+
+        :return: List of (row, col) tuples.
+        """
+        return [tuple(cell) for cell in np.argwhere(self.tile_types == BREAKABLE).tolist()]
+
+    def empty_mask(self):
+        """
+        Get the cells where a bomb may be placed.
+
+        A cell is empty if it is an empty tile, holds no bomb and is not protected.
+
+        :return: Boolean array.
+        """
+        return ((self.tile_types == EMPTY) & (self.bomb_types == NO_BOMB)
+                & ~protected_mask(self.rows, self.cols, self.num_players))
+
+    def choose_bomb_cells(self, num_bombs, seed=None, turn_range=(1, 3), exclude=()):
+        """
+        Pick distinct random empty cells and turn counts for new bombs.
+
+        Runs in one pass over the board instead of one pass per bomb.
+
+        :param num_bombs: Number of bombs wanted.
+        :param seed: Optional seed (or numpy Generator).
+        :param turn_range: Inclusive (min, max) range of turns given to each bomb.
+        :param exclude: Extra (row, col) cells to keep free, e.g. player positions.
+        :return: List of (row, col, turn) tuples (fewer if the board is full).
+        """
+        rng = np.random.default_rng(seed)
+        mask = self.empty_mask()
+        for cell in exclude:
+            mask[cell] = False
+        empty = np.flatnonzero(mask)
+        num_bombs = min(num_bombs, len(empty))
+        chosen = rng.choice(empty, size=num_bombs, replace=False)
+        turns = rng.integers(turn_range[0], turn_range[1] + 1, size=num_bombs)
+        rows, cols = np.divmod(chosen, self.cols)
+        return list(zip(rows.tolist(), cols.tolist(), turns.tolist()))
+
+    def set_bomb(self, cell, bomb_type, turn):
+        """
+        Record a bomb on the board.
+
+        :param cell: (row, col) tuple.
+        :param bomb_type: 'player' or 'initial'.
+        :param turn: Number of turns before explosion.
+        """
+        self.bomb_types[cell] = BOMB_TYPES[bomb_type]
+        self.bomb_turns[cell] = turn
+
+    def clear_bomb(self, cell):
+        """Remove the bomb recorded at a cell."""
+        self.bomb_types[cell] = NO_BOMB
+        self.bomb_turns[cell] = 0
+
+    def tile(self, row, col):
+        """
+        Create a Tile/Wall view of one cell, for rendering.
+
+        :return: A Wall for wall cells, otherwise a Tile.
+        """
+        tile_type = int(self.tile_types[row, col])
+        if tile_type == WALL:
+            return Wall(row, col)
+        return Tile(row, col, tile_type)
+
+    @property
+    def tiles(self):
+        """A lazy tiles[row][col] view that creates Tile/Wall objects on access."""
+        return TileGrid(self)
+
+
+class TileGrid:
+    def __init__(self, board):
+        """
+        Initialize the TileGrid view.
+
+        :param board: The ArrayBoard to view.
+        """
+        self.board = board
+
+    def __len__(self):
+        return self.board.rows
+
+    def __getitem__(self, row):
+        return TileRow(self.board, row)
+
+    def __iter__(self):
+        for row in range(self.board.rows):
+            yield TileRow(self.board, row)
+
+
+class TileRow:
+    def __init__(self, board, row):
+        """
+        Initialize the TileRow view.
+
+        :param board: The ArrayBoard to view.
+        :param row: Row index.
+        """
+        self.board = board
+        self.row = row
+
+    def __len__(self):
+        return self.board.cols
+
+    def __getitem__(self, col):
+        return self.board.tile(self.row, col)
+
+    def __iter__(self):
+        for col in range(self.board.cols):
+            yield self.board.tile(self.row, col)
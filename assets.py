@@ -0,0 +1,320 @@
+import hashlib
+import os
+import struct
+import threading
+import pygame
+from collections import OrderedDict
+from config import TILE_SIZE, WIDTH, HEIGHT
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")  # Not the working directory
+SPRITES = {
+    "bomb": os.path.join(ASSETS_DIR, "Bomb.png"),
+    "initial_bomb": os.path.join(ASSETS_DIR, "initial_bomb.png"),
+    "player_1": os.path.join(ASSETS_DIR, "bomberman_p1.png"),
+    "player_2": os.path.join(ASSETS_DIR, "bomberman_p2.png"),
+}
+BACKGROUND = os.path.join(ASSETS_DIR, "background_image.png")
+ATLAS = os.path.join(ASSETS_DIR, "sprites.atlas")  # Cache of every sprite, scaled and packed into one image
+ATLAS_MAGIC = b"BMAT"
+ATLAS_VERSION = 1
+ATLAS_HEADER = struct.Struct("<4sH20sHHH")  # magic, version, digest of the sources, width, height, sprites
+ATLAS_ENTRY = struct.Struct("<16sHHHH")    # sprite name, x, y, width, height
+ASSETS_LOADED = pygame.event.custom_type()  # Posted when background loading finishes
+PLAYER_HUE_STEP = 137  # Degrees between the tints of players beyond 2; keeps neighbours distinct
+
+TURN_FONT_SIZE = 18
+TURN_COLOR = (0, 255, 0)
+PROMPT_FONT_SIZE = 36
+PROMPT_COLOR = (255, 200, 100)
+PROMPT_TEXT = "Do you want to manually place bombs? (Y/N)"
+TURNS_FONT_SIZE = 28
+TURNS_COLOR = (255, 255, 255)
+TURNS_TEXT = "Enter turns for each bomb (1-3). Press Enter when done."
+
+
+def atlas_digest(size=TILE_SIZE):
+    """
+    Fingerprint the sprite sources, so a stale atlas is detected.
+
+    :param size: Size the sprites are scaled to.
+    :return: 20-byte digest of every sprite file's name, size and modification time.
+    """
+    digest = hashlib.sha1(str(size).encode())
+    for name, path in sorted(SPRITES.items()):
+        stat = os.stat(path) if os.path.exists(path) else None
+        digest.update(f"{name}:{os.path.basename(path)}:{stat and stat.st_size}:{stat and stat.st_mtime_ns}".encode())
+    return digest.digest()
+
+
+def build_atlas(path=ATLAS, size=TILE_SIZE):
+    """
+    Scale every sprite and pack them side by side into one atlas file.
+
+    The pixels are stored raw, so loading the atlas needs no image decoding or
+    scaling. Missing sprite files are left out. If the file cannot be written
+    (e.g. a read-only install), the atlas is only kept in memory.
+
+    :param path: Output file path.
+    :param size: Size the sprites are scaled to.
+    :return: (surface, {name: rect}) of the atlas.
+    """
+    names = [name for name, source in SPRITES.items() if os.path.exists(source)]
+    surface = pygame.Surface((max(1, len(names)) * size, size), pygame.SRCALPHA)
+    rects = {}
+    for i, name in enumerate(names):
+        sprite = pygame.transform.scale(pygame.image.load(SPRITES[name]), (size, size))
+        rects[name] = pygame.Rect(i * size, 0, size, size)
+        surface.blit(sprite, rects[name])
+
+    width, height = surface.get_size()
+    try:
+        with open(path + ".tmp", "wb") as file:
+            file.write(ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, atlas_digest(size), width, height, len(rects)))
+            for name, rect in rects.items():
+                file.write(ATLAS_ENTRY.pack(name.encode(), *rect))
+            file.write(pygame.image.tobytes(surface, "RGBA"))
+        os.replace(path + ".tmp", path)  # A half-written atlas is never picked up
+    except OSError:
+        if os.path.exists(path + ".tmp"):
+            os.remove(path + ".tmp")
+    return surface, rects
+
+
+def load_atlas(path=ATLAS, size=TILE_SIZE):
+    """
+    Load the sprite atlas, rebuilding it if it is missing or its sources changed.
+
+    :param path: Atlas file path.
+    :param size: Size the sprites are scaled to.
+    :return: (surface, {name: rect}) of the atlas.
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, version, digest, width, height, count = ATLAS_HEADER.unpack_from(data, 0)
+    except (OSError, struct.error):
+        return build_atlas(path, size)
+    if magic != ATLAS_MAGIC or version != ATLAS_VERSION or digest != atlas_digest(size):
+        return build_atlas(path, size)
+
+    offset = ATLAS_HEADER.size
+    rects = {}
+    for _ in range(count):
+        name, x, y, w, h = ATLAS_ENTRY.unpack_from(data, offset)
+        rects[name.rstrip(b"\0").decode()] = pygame.Rect(x, y, w, h)
+        offset += ATLAS_ENTRY.size
+    if len(data) - offset != width * height * 4:
+        return build_atlas(path, size)
+    surface = pygame.image.frombytes(data[offset:], (width, height), "RGBA")
+    return surface, rects
+
+
+class AssetManager:
+    def __init__(self, max_dynamic_text=256):
+        """
+        Initialize the AssetManager object.
+
+        - Loads and scales each image once. Sprites come from one pre-scaled atlas
+          file, which can be loaded on a background thread while a menu is shown.
+        - Caches fonts by size and rendered text surfaces.
+        - Pinned text (bomb turn counts, prompts) is never evicted; other text is
+          kept in a bounded least-recently-used cache.
+
+        :param max_dynamic_text: Maximum number of unpinned text surfaces to keep.
+        """
+        self.images = {}               # (path, size) -> Surface, or None if missing
+        self.player_sprites = {}       # Player number -> Surface
+        self.sprites = {}              # Sprite name -> Surface in the converted atlas
+        self.atlas_path = ATLAS        # Atlas file read, and rebuilt when missing or stale
+        self.loader = None             # Background loading thread, if running
+        self.loaded = None             # (atlas, background) loaded by the thread, not yet converted
+        self.fonts = {}                # size -> Font
+        self.pinned_text = {}          # (text, size, color) -> Surface
+        self.dynamic_text = OrderedDict()
+        self.max_dynamic_text = max_dynamic_text
+
+    def image(self, path, size=(TILE_SIZE, TILE_SIZE), alpha=True):
+        """
+        Get an image scaled to the given size, loading it on first use.
+
+        A missing file is remembered, so it is only looked up once.
+
+        :param path: Path of the image file.
+        :param size: (width, height) to scale the image to.
+        :param alpha: Convert with per-pixel alpha.
+        :return: The scaled Surface, or None if the file does not exist.
+        """
+        key = (path, size)
+        if key in self.images:
+            return self.images[key]
+
+        surf = None
+        if os.path.exists(path):
+            surf = pygame.image.load(path)
+            surf = surf.convert_alpha() if alpha else surf.convert()
+            surf = pygame.transform.scale(surf, size)
+        self.images[key] = surf
+        return surf
+
+    def start_loading(self):
+        """
+        Load the sprite atlas and the menu background on a background thread.
+
+        Decoding and scaling happen on the thread; converting to the display format
+        happens on the main thread when the assets are first used. ASSETS_LOADED is
+        posted once the thread is done, so a waiting menu can redraw.
+        """
+        if self.loader is not None or self.sprites:
+            return
+
+        def load():
+            background = None
+            if os.path.exists(BACKGROUND):
+                background = pygame.transform.scale(pygame.image.load(BACKGROUND), (WIDTH, HEIGHT))
+            self.loaded = (load_atlas(self.atlas_path), background)
+            pygame.event.post(pygame.event.Event(ASSETS_LOADED))
+
+        self.loader = threading.Thread(target=load, name="asset-loader", daemon=True)
+        self.loader.start()
+
+    @property
+    def loading(self):
+        """Whether the background thread is still loading."""
+        return self.loader is not None and self.loader.is_alive()
+
+    def finish_loading(self):
+        """Wait for the background thread, if any, and convert what it loaded."""
+        if self.loader is not None:
+            self.loader.join()
+            self.loader = None
+        if self.loaded is None:
+            if self.sprites:
+                return
+            self.loaded = (load_atlas(self.atlas_path), None)  # Nothing was loaded in the background
+
+        (atlas, rects), background = self.loaded
+        self.loaded = None
+        atlas = atlas.convert_alpha()
+        self.sprites = {name: atlas.subsurface(rect) for name, rect in rects.items()}
+        if background is not None:
+            self.images[(BACKGROUND, (WIDTH, HEIGHT))] = background.convert()
+
+    def sprite(self, name):
+        """
+        Get one of the game sprites, scaled to a tile.
+
+        :param name: Sprite name (key of SPRITES).
+        :return: The scaled Surface.
+        """
+        surf = self.sprites.get(name)
+        if surf is None:
+            if not self.sprites or self.loader is not None:
+                self.finish_loading()
+            surf = self.sprites.get(name)
+            if surf is None:  # Missing from the atlas
+                surf = self.image(SPRITES[name])
+        return surf
+
+    def player_sprite(self, player_num):
+        """
+        Get a player's sprite.
+
+        Players 1 and 2 have their own sprites; later players reuse them tinted with
+        a colour of their own, created on first use.
+
+        :param player_num: Player number, from 1.
+        :return: The scaled Surface.
+        """
+        surf = self.player_sprites.get(player_num)
+        if surf is None:
+            surf = self.sprite(f"player_{2 - player_num % 2}")
+            if player_num > 2:
+                tint = pygame.Color(0)
+                tint.hsva = ((player_num * PLAYER_HUE_STEP) % 360, 60, 100, 100)
+                surf = surf.copy()
+                surf.fill(tint, special_flags=pygame.BLEND_RGB_MULT)
+            self.player_sprites[player_num] = surf
+        return surf
+
+    def background(self, wait=True):
+        """
+        Get the menu background scaled to the window.
+
+        :param wait: If the background thread is still loading, wait for it. If
+                     False, return None instead, so a menu can be shown at once.
+        :return: The background Surface, or None if the asset is missing (or not
+                 loaded yet).
+        """
+        if self.loader is not None:
+            if self.loading and not wait:
+                return None
+            self.finish_loading()
+        return self.image(BACKGROUND, (WIDTH, HEIGHT), alpha=False)
+
+    def font(self, size):
+        """
+        Get the default font at the given size.
+
+        :param size: Font size.
+        :return: A cached pygame Font.
+        """
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def pin_text(self, text, size, color):
+        """
+        Pre-render a text surface that is kept for the lifetime of the manager.
+
+        :return: The rendered Surface.
+        """
+        key = (text, size, color)
+        surf = self.pinned_text.get(key)
+        if surf is None:
+            surf = self.font(size).render(text, True, color)
+            self.pinned_text[key] = surf
+        return surf
+
+    def text(self, text, size, color):
+        """
+        Get a rendered text surface, rendering it only on a cache miss.
+
+        :param text: Text to render.
+        :param size: Font size.
+        :param color: RGB text color.
+        :return: The rendered Surface.
+        """
+        key = (text, size, color)
+        surf = self.pinned_text.get(key)
+        if surf is not None:
+            return surf
+
+        dynamic = self.dynamic_text
+        surf = dynamic.get(key)
+        if surf is not None:
+            dynamic.move_to_end(key)
+            return surf
+
+        surf = self.font(size).render(text, True, color)
+        dynamic[key] = surf
+        if len(dynamic) > self.max_dynamic_text:
+            dynamic.popitem(last=False)  # Evict the least recently used surface
+        return surf
+
+    def preload(self):
+        """Pre-render the glyphs for bomb turn counts 0-3 and the menu texts."""
+        for turn in range(4):
+            self.pin_text(str(turn), TURN_FONT_SIZE, TURN_COLOR)
+        self.pin_text(PROMPT_TEXT, PROMPT_FONT_SIZE, PROMPT_COLOR)
+        self.pin_text(TURNS_TEXT, TURNS_FONT_SIZE, TURNS_COLOR)
+
+
+assets = AssetManager()
+
+
+if __name__ == "__main__":
+    # Build step: pack the sprites ahead of time, so the first launch does not have to
+    atlas, rects = build_atlas()
+    print(f"wrote {ATLAS}: {len(rects)} sprites, {atlas.get_width()}x{atlas.get_height()}")
@@ -0,0 +1,249 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from bomb import Bomb
+from game_state import GameState, random_input_state
+
+CHUNKS_PER_WORKER = 2  # Chunks of jobs queued per worker; later jobs are not created until these finish
+RESULT_FIELDS = (
+    "seed", "bombs", "min_turn", "max_turn", "winner", "ticks",
+    "bombs_placed", "explosions", "max_chain", "mean_chain",
+)
+
+
+def run_match(seed, bombs=5, min_turn=1, max_turn=3, max_ticks=3600, press_chance=0.2):
+    """
+    Play one headless match with random inputs.
+
+    The match ends when a player stands in a detonated cell (the other player wins)
+    or after max_ticks (a draw). Everything is derived from the seed, so a match can
+    be replayed exactly.
+
+    :param seed: Seed for the map, bombs and inputs.
+    :param bombs: Number of initial bombs.
+    :param min_turn: Lowest turn count given to initial bombs.
+    :param max_turn: Highest turn count given to initial bombs.
+    :param max_ticks: Tick limit before the match is a draw.
+    :param press_chance: Chance of each key being pressed on a tick.
+    :return: Dictionary with the match result.
+    """
+    state = GameState(seed)
+    Bomb.add_initial_bombs(state, bombs, turn_range=(min_turn, max_turn))
+    input_rng = random.Random(seed * 7919 + 1)
+
+    winner = 0  # 0 = draw
+    chains = []
+    while state.tick < max_ticks:
+        hit = set()
+        for event in state.step(random_input_state(input_rng, press_chance)):
+            if event["type"] == "explosion":
+                chains.append(len(event["chain"].detonated))
+            elif event["type"] == "player_hit":
+                hit.add(event["player"])
+        if hit:
+            if len(hit) == 1:
+                winner = 2 if 1 in hit else 1
+            break
+
+    return {
+        "seed": seed,
+        "bombs": bombs,
+        "min_turn": min_turn,
+        "max_turn": max_turn,
+        "winner": winner,
+        "ticks": state.tick,
+        "bombs_placed": state.bomb_counter,
+        "explosions": len(chains),
+        "max_chain": max(chains, default=0),
+        "mean_chain": round(sum(chains) / len(chains), 3) if chains else 0,
+    }
+
+
+def _run_chunk(chunk):
+    """
+    Run a chunk of (seed, params) jobs in a worker.
+
+    :return: List of results, in the chunk's order.
+    """
+    return [run_match(seed, **params) for seed, params in chunk]
+
+
+def param_grid(bombs, turn_ranges, max_ticks, press_chance):
+    """
+    Expand the parameter lists into every combination.
+
+    :return: List of parameter dictionaries for run_match.
+    """
+    return [
+        {"bombs": num_bombs, "min_turn": low, "max_turn": high,
+         "max_ticks": max_ticks, "press_chance": press_chance}
+        for num_bombs, (low, high) in itertools.product(bombs, turn_ranges)
+    ]
+
+
+class ResultSink:
+    def __init__(self, path):
+        """
+        Initialize the ResultSink object.
+
+        Writes one line per match as it arrives: CSV if the path ends in .csv,
+        otherwise JSON Lines. A path of '-' writes JSON Lines to stdout.
+
+        :param path: Output file path.
+        """
+        self.file = sys.stdout if path == "-" else open(path, "w", newline="")
+        self.writer = None
+        if path.endswith(".csv"):
+            self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+            self.writer.writeheader()
+
+    def write(self, result):
+        """Write one match result."""
+        if self.writer is not None:
+            self.writer.writerow(result)
+        else:
+            self.file.write(json.dumps(result) + "\n")
+
+    def close(self):
+        """Flush and close the output."""
+        if self.file is sys.stdout:
+            self.file.flush()
+        else:
+            self.file.close()
+
+
+class Aggregate:
+    def __init__(self):
+        """Initialize the per-parameter-set running totals."""
+        self.groups = {}
+
+    def add(self, result):
+        """Fold one match result into its parameter group."""
+        key = (result["bombs"], result["min_turn"], result["max_turn"])
+        group = self.groups.setdefault(key, {
+            "matches": 0, "p1_wins": 0, "p2_wins": 0, "draws": 0,
+            "ticks": 0, "bombs_placed": 0, "explosions": 0, "max_chain": 0,
+        })
+        group["matches"] += 1
+        if result["winner"] == 1:
+            group["p1_wins"] += 1
+        elif result["winner"] == 2:
+            group["p2_wins"] += 1
+        else:
+            group["draws"] += 1
+        group["ticks"] += result["ticks"]
+        group["bombs_placed"] += result["bombs_placed"]
+        group["explosions"] += result["explosions"]
+        group["max_chain"] = max(group["max_chain"], result["max_chain"])
+
+    def summary(self):
+        """
+        Get the aggregated statistics per parameter set.
+
+        :return: List of dictionaries, one per (bombs, min_turn, max_turn).
+        """
+        rows = []
+        for (bombs, min_turn, max_turn), group in sorted(self.groups.items()):
+            matches = group["matches"]
+            rows.append({
+                "bombs": bombs, "min_turn": min_turn, "max_turn": max_turn,
+                "matches": matches,
+                "p1_wins": group["p1_wins"], "p2_wins": group["p2_wins"], "draws": group["draws"],
+                "mean_ticks": round(group["ticks"] / matches, 1),
+                "mean_bombs_placed": round(group["bombs_placed"] / matches, 2),
+                "mean_explosions": round(group["explosions"] / matches, 2),
+                "max_chain": group["max_chain"],
+            })
+        return rows
+
+
+def run_batch(seeds, params, sink, workers=None, chunksize=16):
+    """
+    Run every (seed, params) match across a process pool.
+
+    Jobs are created and handed to the pool chunk by chunk, with at most
+    CHUNKS_PER_WORKER chunks per worker waiting, so a large batch never sits in
+    memory at once. Results are streamed to the sink in submission order while
+    the pool keeps working, and aggregated at the end.
+
+    :param seeds: Iterable of match seeds.
+    :param params: List of parameter dictionaries (see param_grid).
+    :param sink: ResultSink receiving each result.
+    :param workers: Number of worker processes (default: all cores).
+    :param chunksize: Matches handed to a worker at a time.
+    :return: Aggregate holding the totals.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = ((seed, p) for p, seed in itertools.product(params, seeds))
+    aggregate = Aggregate()
+    pending = deque()
+
+    def collect():
+        for result in pending.popleft().result():
+            sink.write(result)
+            aggregate.add(result)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in iter(lambda: list(itertools.islice(jobs, chunksize)), []):
+            pending.append(executor.submit(_run_chunk, chunk))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                collect()
+        while pending:
+            collect()
+    return aggregate
+
+
+def parse_range(text):
+    """Parse 'start:stop' (or a single count) into a range of seeds."""
+    if ":" in text:
+        start, stop = text.split(":")
+        return range(int(start), int(stop))
+    return range(int(text))
+
+
+def parse_turn_range(text):
+    """Parse 'low-high' (or a single value) into an inclusive turn range."""
+    low, _, high = text.partition("-")
+    low, high = int(low), int(high or low)
+    if low > high:
+        raise argparse.ArgumentTypeError(f"turn range {text} starts above its end")
+    return low, high
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless Bomberman matches in parallel.")
+    parser.add_argument("--seeds", default="0:100", help="Seed range 'start:stop' or a count.")
+    parser.add_argument("--bombs", type=int, nargs="+", default=[5], help="Initial bomb counts to try.")
+    parser.add_argument("--turns", type=parse_turn_range, nargs="+", default=[(1, 3)],
+                        help="Initial bomb turn ranges to try, e.g. 1-3 2-5.")
+    parser.add_argument("--max-ticks", type=int, default=3600, help="Tick limit per match.")
+    parser.add_argument("--press-chance", type=float, default=0.2, help="Chance of each key being pressed.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument("--out", default="-", help="Result file (.csv or .jsonl), '-' for stdout.")
+    args = parser.parse_args(argv)
+
+    seeds = parse_range(args.seeds)
+    params = param_grid(args.bombs, args.turns, args.max_ticks, args.press_chance)
+    sink = ResultSink(args.out)
+    start = time.perf_counter()
+    try:
+        aggregate = run_batch(seeds, params, sink, workers=args.workers)
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - start
+
+    matches = len(seeds) * len(params)
+    for row in aggregate.summary():
+        print(json.dumps(row), file=sys.stderr)
+    print(f"{matches} matches in {elapsed:.2f}s ({matches / elapsed:.1f} matches/sec)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
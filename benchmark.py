@@ -0,0 +1,411 @@
+import argparse
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from itertools import cycle
+from bomb import Bomb
+from wall import Wall
+from array_board import ArrayBoard
+from game_state import GameState, random_input_state
+from player import input_keys
+from config import TILE_SIZE
+
+# (grid size, wall density, bomb count) for each board scenario
+DEFAULT_SCENARIOS = [
+    (15, 0.2, 5),
+    (15, 0.2, 60),
+    (64, 0.2, 500),
+]
+QUICK_SCENARIOS = [
+    (15, 0.2, 5),
+    (64, 0.2, 500),
+]
+PLAYER_COUNTS = (8, 64)  # Crowded matches, run on boards with room for them
+FUSE_SCENARIO = (128, 0.2, 4000)  # Thousands of live bombs burning fuses
+FUSE_TICKS = 60
+ALLOCATION_SAMPLES = 200  # Ops run again under tracemalloc to measure what they allocate
+
+
+def make_state(size, wall_density, bombs, seed=0, players=2, fuse_ticks=None, turn_range=(1, 3)):
+    """
+    Build a headless game state for a benchmark scenario.
+
+    :param size: Rows and columns of the board.
+    :param wall_density: Chance of each non-spawn cell being a wall.
+    :param bombs: Number of initial bombs.
+    :param seed: Seed for the board and bombs.
+    :param players: Number of players.
+    :param fuse_ticks: Ticks per bomb fuse, or None for the bomb queue rule.
+    :param turn_range: Inclusive (min, max) turns of the initial bombs.
+    :return: A GameState.
+    """
+    board = ArrayBoard.generate(size, size, seed=seed, wall_chance=wall_density, num_players=players)
+    state = GameState(seed, board=board, num_players=players, fuse_ticks=fuse_ticks)
+    Bomb.add_initial_bombs(state, bombs, turn_range)
+    return state
+
+
+def percentile(sorted_times, fraction):
+    """Get a percentile of an already sorted list of timings."""
+    index = min(len(sorted_times) - 1, int(round(fraction * (len(sorted_times) - 1))))
+    return sorted_times[index]
+
+
+def measure(name, params, setup, op, iterations, warmup=50):
+    """
+    Time one operation repeatedly and summarise it.
+
+    After the timed iterations, up to ALLOCATION_SAMPLES more are run under
+    tracemalloc, which would skew the timings, to measure the memory each op
+    allocates.
+
+    :param name: Benchmark name.
+    :param params: Scenario parameters, stored with the result.
+    :param setup: Callable run (untimed) before each iteration, or None.
+    :param op: Callable being measured.
+    :param iterations: Number of timed iterations.
+    :param warmup: Number of untimed iterations run first.
+    :return: Dictionary with ops/sec, p50/p99 time, the mean peak KiB allocated
+             during an op (memory freed again before the op returns included), and
+             the net change in live memory blocks per op (positive when the op
+             keeps memory alive, e.g. a leak; negative when it frees more than it
+             allocates).
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        op()
+
+    times = array("d", [0.0]) * iterations  # Keeps no float objects alive between ops
+    blocks = 0
+    clock = time.perf_counter
+    allocated_blocks = sys.getallocatedblocks
+    for i in range(iterations):
+        if setup is not None:
+            setup()
+        before_blocks = allocated_blocks()
+        start = clock()
+        op()
+        times[i] = clock() - start
+        blocks += allocated_blocks() - before_blocks
+
+    samples = min(iterations, ALLOCATION_SAMPLES)
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            if setup is not None:
+                setup()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            op()
+            allocated += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    total = sum(times)
+    times = sorted(times)
+    return {
+        "name": name,
+        "params": params,
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total, 1) if total else float("inf"),
+        "p50_ms": round(percentile(times, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(times, 0.99) * 1000, 4),
+        "peak_kib_per_op": round(allocated / samples / 1024, 2) if samples else 0.0,
+        "net_blocks_per_op": round(blocks / iterations, 2),
+    }
+
+
+def bench_update(size, wall_density, bombs, iterations):
+    """Time GameState.step, the rules half of Game.update_game."""
+    state = make_state(size, wall_density, bombs)
+    rng = random.Random(0)
+    inputs = [random_input_state(rng) for _ in range(iterations + 50)]
+    ticks = cycle(inputs)
+    params = {"size": size, "walls": wall_density, "bombs": bombs}
+    return measure("update_game", params, None, lambda: state.step(next(ticks)), iterations)
+
+
+def bench_crowd(size, wall_density, bombs, iterations, players):
+    """Time GameState.step with many players, whose collision checks should scale linearly."""
+    state = make_state(size, wall_density, bombs, players=players)
+    rng = random.Random(0)
+    keys = input_keys(players)
+    inputs = [random_input_state(rng, keys=keys) for _ in range(iterations + 50)]
+    ticks = cycle(inputs)
+    params = {"size": size, "walls": wall_density, "bombs": bombs, "players": players}
+    return measure("update_players", params, None, lambda: state.step(next(ticks)), iterations)
+
+
+def bench_fuses(size, wall_density, bombs, iterations, fuse_ticks=FUSE_TICKS):
+    """
+    Time GameState.step with fuses and thousands of live bombs.
+
+    The fuses are spread over many ticks, so only a few run out each tick; the
+    step should cost about the same as with a handful of bombs.
+    """
+    state = make_state(size, wall_density, bombs, fuse_ticks=fuse_ticks, turn_range=(1, 60))
+    rng = random.Random(0)
+    inputs = [random_input_state(rng) for _ in range(iterations + 50)]
+    ticks = cycle(inputs)
+    params = {"size": size, "walls": wall_density, "bombs": bombs, "fuse_ticks": fuse_ticks}
+    return measure("update_fuses", params, None, lambda: state.step(next(ticks)), iterations)
+
+
+def bench_explode(size, wall_density, bombs, iterations):
+    """Time Bomb.explode on a block of adjacent player bombs that all chain."""
+    state = make_state(size, wall_density, 0)
+    chain_length = max(1, min(size * size, bombs))
+    cells = [divmod(index, size) for index in range(chain_length)]
+    for cell in cells:
+        if state.occupancy.is_wall(cell):
+            state.clear_tile(cell)
+    first = []
+
+    def setup():
+        for bomb in list(state.bombs):
+            state.remove_bomb(bomb)
+        for bomb_row, bomb_col in cells[:chain_length]:
+            state.add_bomb(Bomb(bomb_col * TILE_SIZE, bomb_row * TILE_SIZE, state))
+        first[:] = [state.occupancy.bomb_at(cells[0])]
+
+    params = {"size": size, "walls": wall_density, "bombs": chain_length}
+    return measure("explode_chain", params, setup, lambda: first[0].explode(), iterations, warmup=5)
+
+
+def bench_get_walls(size, wall_density, bombs, iterations):
+    """Time Wall.get_walls over a materialised tile grid."""
+    state = make_state(size, wall_density, 0)
+    tiles = [list(row) for row in state.tiles]
+    params = {"size": size, "walls": wall_density}
+    return measure("get_walls", params, None, lambda: Wall.get_walls(tiles), iterations)
+
+
+def bench_player_update(size, wall_density, bombs, iterations):
+    """Time Player.update collision checks for a player pushing into a wall."""
+    state = make_state(size, wall_density, bombs)
+    player = state.players[0]
+    state.change_tile((0, 1), 1)  # Wall to the right of player 1's start
+    input_state = {key: False for key in random_input_state(random.Random(0))}
+    input_state["p1_right"] = True
+    params = {"size": size, "walls": wall_density, "bombs": bombs}
+    return measure("player_update", params, None, lambda: player.update(input_state), iterations)
+
+
+def bench_render(size, wall_density, bombs, iterations, dirty_rects, camera=None):
+    """Time Game.render with the SDL dummy video driver."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from bomberman import Game
+
+    board = ArrayBoard.generate(size, size, seed=0, wall_chance=wall_density)
+    game = Game(seed=0, dirty_rects=dirty_rects, prompt=False, board=board, camera=camera)
+    Bomb.add_initial_bombs(game.state, max(0, bombs - len(game.state.bombs)))
+    rng = random.Random(0)
+
+    def step_and_render():
+        game.state.step(random_input_state(rng))
+        game.render()
+
+    if camera is not None:
+        name = "render_viewport"
+    else:
+        name = "render_dirty" if dirty_rects else "render_full"
+    params = {"size": size, "walls": wall_density, "bombs": bombs}
+    return measure(name, params, None, step_and_render, iterations)
+
+
+def bench_memory(size, wall_density, bombs, ticks=600):
+    """
+    Measure the memory held by one match after it has been played for a while.
+
+    :param size: Rows and columns of the board.
+    :param wall_density: Chance of each non-spawn cell being a wall.
+    :param bombs: Number of initial bombs.
+    :param ticks: Ticks played before measuring.
+    :return: Dictionary with the KiB held by the match and by its bomb pool.
+    """
+    rng = random.Random(0)
+    inputs = [random_input_state(rng) for _ in range(ticks)]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        state = make_state(size, wall_density, bombs)
+        for input_state in inputs:
+            state.step(input_state)
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "name": "match_memory",
+        "params": {"size": size, "walls": wall_density, "bombs": bombs},
+        "kib": round(held / 1024, 1),
+        "live_bombs": len(state.bombs),
+        "bomb_pool_bytes": state.bomb_pool.nbytes,
+    }
+
+
+def bench_startup(runs=5, cold=False, prompt=True):
+    """
+    Time cold starts of the game, each in a fresh process, up to the first frame.
+
+    :param runs: Number of processes started.
+    :param cold: Delete the sprite atlas before each run, so it is rebuilt.
+    :param prompt: Start on the bomb placement prompt; if False, the first frame
+                   is the game itself, which needs every sprite.
+    :return: Dictionary with p50/p99 time to first frame, as measured by the game
+             from Game() to the first frame, and the p50 wall time of the whole
+             process (interpreter start and imports included).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    first_frame = []
+    process = []
+    # The runs read and write an atlas of their own, leaving the game's atlas alone
+    with tempfile.TemporaryDirectory() as directory:
+        atlas = os.path.join(directory, "sprites.atlas")
+        command = [sys.executable, "bomberman.py", "--first-frame", "--seed", "0", "--atlas", atlas]
+        if not cold:  # A first game frame needs the sprites, so this leaves an up-to-date atlas behind
+            subprocess.run(command + ["--no-prompt"], cwd=here, env=env, capture_output=True, check=True)
+        if not prompt:
+            command.append("--no-prompt")
+        for _ in range(runs):
+            if cold and os.path.exists(atlas):
+                os.remove(atlas)
+            start = time.perf_counter()
+            output = subprocess.run(command, cwd=here, env=env, capture_output=True, text=True, check=True).stdout
+            process.append(time.perf_counter() - start)
+            first_frame.append(float(output.rsplit("time to first frame:", 1)[1].strip().rstrip("ms")) / 1000)
+    first_frame.sort()
+    process.sort()
+    return {
+        "name": "time_to_first_frame",
+        "params": {"atlas": "cold" if cold else "warm", "screen": "menu" if prompt else "game"},
+        "iterations": runs,
+        "p50_ms": round(percentile(first_frame, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(first_frame, 0.99) * 1000, 2),
+        "process_ms": round(percentile(process, 0.50) * 1000, 1),
+    }
+
+
+def run_suite(scenarios, iterations, render=True):
+    """
+    Run every benchmark over every scenario.
+
+    :param scenarios: List of (size, wall density, bombs) tuples.
+    :param iterations: Timed iterations per benchmark.
+    :param render: Include the render benchmarks.
+    :return: List of result dictionaries.
+    """
+    results = []
+    for size, wall_density, bombs in scenarios:
+        results.append(bench_update(size, wall_density, bombs, iterations))
+        results.append(bench_explode(size, wall_density, bombs, max(10, iterations // 10)))
+        results.append(bench_get_walls(size, wall_density, bombs, max(10, iterations // 10)))
+        results.append(bench_player_update(size, wall_density, bombs, iterations))
+        results.append(bench_memory(size, wall_density, bombs))
+        if size >= 64:
+            for players in PLAYER_COUNTS:
+                results.append(bench_crowd(size, wall_density, bombs, iterations, players))
+        if render and size <= 15:  # Larger boards do not fit in the window
+            results.append(bench_render(size, wall_density, bombs, iterations // 4, dirty_rects=False))
+            results.append(bench_render(size, wall_density, bombs, iterations // 4, dirty_rects=True))
+        if render:  # Scrolling view, whose cost should not depend on the map size
+            results.append(bench_render(size, wall_density, bombs, iterations // 4, dirty_rects=False,
+                                        camera="follow"))
+    results.append(bench_fuses(*FUSE_SCENARIO, iterations))
+    if render:
+        for prompt in (True, False):
+            results.append(bench_startup(cold=True, prompt=prompt))
+            results.append(bench_startup(prompt=prompt))
+    return results
+
+
+def result_metric(result):
+    """Get the value compared against a baseline: p50 time, or KiB for memory results."""
+    return result["p50_ms"] if "p50_ms" in result else result["kib"]
+
+
+def result_key(result):
+    """Identify a result by benchmark name and scenario."""
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    :param results: Results of this run.
+    :param baseline: Results loaded from a baseline file.
+    :param threshold: Allowed relative growth (0.2 = 20%) of p50 time or memory.
+    :return: List of human-readable regression messages.
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or not result_metric(old):
+            continue
+        change = result_metric(result) / result_metric(old) - 1
+        if change > threshold:
+            unit = "ms" if "p50_ms" in result else "KiB"
+            regressions.append(f"{result['name']} {result['params']}: {result_metric(old)}{unit} -> "
+                               f"{result_metric(result)}{unit} (+{change:.0%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Bomberman update, explosion and render paths.")
+    parser.add_argument("--quick", action="store_true", help="Run a smaller set of scenarios.")
+    parser.add_argument("--iterations", type=int, default=2000, help="Timed iterations per benchmark.")
+    parser.add_argument("--no-render", action="store_true", help="Skip the render benchmarks.")
+    parser.add_argument("--out", help="Write the results to this JSON file.")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Store the results as a baseline.")
+    parser.add_argument("--baseline", metavar="PATH", help="Fail if results regress against this baseline.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed p50 slowdown (default 0.25).")
+    args = parser.parse_args(argv)
+
+    scenarios = QUICK_SCENARIOS if args.quick else DEFAULT_SCENARIOS
+    results = run_suite(scenarios, args.iterations, render=not args.no_render)
+
+    for result in results:
+        if "kib" in result:
+            print(f"{result['name']:<14} {json.dumps(result['params']):<40} "
+                  f"{result['kib']:>12.1f} KiB    {result['live_bombs']} live bombs, "
+                  f"bomb pool {result['bomb_pool_bytes']} bytes")
+            continue
+        if "process_ms" in result:
+            print(f"{result['name']:<14} {json.dumps(result['params']):<40} "
+                  f"p50 {result['p50_ms']:.1f}ms  p99 {result['p99_ms']:.1f}ms  "
+                  f"whole process {result['process_ms']:.1f}ms")
+            continue
+        print(f"{result['name']:<14} {json.dumps(result['params']):<40} "
+              f"{result['ops_per_sec']:>12.1f} ops/s  p50 {result['p50_ms']:.4f}ms  "
+              f"p99 {result['p99_ms']:.4f}ms  peak {result['peak_kib_per_op']:.2f} KiB/op  "
+              f"{result['net_blocks_per_op']:+.2f} net blocks/op")
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for message in regressions:
+            print("REGRESSION: " + message, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,265 +1,237 @@
-import pygame
-import random
-from explosion import Explosion
-from wall import Wall
-from tile import Tile
-from config import WIDTH, HEIGHT, TILE_SIZE, PROTECTED_TILES, GRID_SZE_ROW, GRID_SZE_COL
+from array import array
+from chain_reaction import resolve_chain
+from config import TILE_SIZE
+
+BOMB_TYPE_CODES = {"player": 0, "initial": 1}
+BOMB_TYPE_NAMES = ("player", "initial")  # Indexed by type code
+
+# BombPool slot flags; a slot is reused once both are cleared
+ON_BOARD = 1
+QUEUED = 2
+
+
+class BombPool:
+    def __init__(self, game):
+        """
+        Initialize the BombPool object.
+
+        Stores the fields of every bomb of a game in parallel typed arrays (a few
+        bytes per bomb) instead of one object per bomb. Bomb objects are small
+        handles into the pool. A slot is reused once its bomb is off the board and
+        out of the bomb queue, since queued bombs still explode after a chain
+        removed them.
+
+        :param game: Reference to the GameState object.
+        """
+        self.game = game
+        self.rows = array("H")
+        self.cols = array("H")
+        self.turns = array("b")
+        self.types = array("B")
+        self.flags = array("B")
+        self.fuses = array("I")  # Tick each bomb detonates at, when the game uses fuses
+        self.free = []
+
+    def __len__(self):
+        """Number of slots in use."""
+        return len(self.flags) - len(self.free)
+
+    def allocate(self, row, col, turn, type_code):
+        """
+        Store a new bomb.
+
+        :return: Index of the bomb's slot.
+        """
+        if self.free:
+            index = self.free.pop()
+            self.rows[index] = row
+            self.cols[index] = col
+            self.turns[index] = turn
+            self.types[index] = type_code
+            self.flags[index] = 0
+            self.fuses[index] = 0
+            return index
+        self.rows.append(row)
+        self.cols.append(col)
+        self.turns.append(turn)
+        self.types.append(type_code)
+        self.flags.append(0)
+        self.fuses.append(0)
+        return len(self.flags) - 1
+
+    def set_flag(self, index, flag):
+        self.flags[index] |= flag
+
+    def clear_flag(self, index, flag):
+        """Clear a flag and free the slot once no flag is left."""
+        flags = self.flags[index] & ~flag
+        self.flags[index] = flags
+        if not flags:
+            self.free.append(index)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the arrays."""
+        arrays = (self.rows, self.cols, self.turns, self.types, self.flags, self.fuses)
+        return sum(a.itemsize * len(a) for a in arrays)
 
 
 class Bomb:
-    bomb_surf = None
-    bomb_surf_2 = None
+    __slots__ = ("pool", "index")
 
     def __init__(self, x, y, game, turn=0, bomb_type="player"):
         """
         Initialize the Bomb object.
 
+        The bomb's fields live in the game's BombPool; the object only points at
+        its slot.
+
         :param x: x-coordinate of the bomb.
         :param y: y-coordinate of the bomb.
-        :param game: Reference to the Game object.
+        :param game: Reference to the GameState object.
         :param turn: Number of turns before explosion (for initial bombs).
         :param bomb_type: Type of the bomb ('player' or 'initial').
         """
-        self.x = x
-        self.y = y
-        self.game = game
-        self.turn = turn
-        self.type = bomb_type  # 'player' for player bombs, 'initial' for random bombs
-
-        # Load bomb images if not already loaded
-        if Bomb.bomb_surf is None:
-            Bomb.bomb_surf = pygame.transform.scale(
-                pygame.image.load("assets/Bomb.png").convert_alpha(),
-                (TILE_SIZE, TILE_SIZE),
-            )
-        if Bomb.bomb_surf_2 is None:
-            Bomb.bomb_surf_2 = pygame.transform.scale(
-                pygame.image.load("assets/initial_bomb.png").convert_alpha(),
-                (TILE_SIZE, TILE_SIZE),
-            )
+        self.pool = game.bomb_pool
+        self.index = self.pool.allocate(y // TILE_SIZE, x // TILE_SIZE, turn, BOMB_TYPE_CODES[bomb_type])
+
+    @staticmethod
+    def from_slot(pool, index):
+        """
+        Create a handle for a bomb already stored in a pool, e.g. when restoring a snapshot.
+
+        :param pool: The BombPool.
+        :param index: Index of the bomb's slot.
+        :return: A Bomb.
+        """
+        bomb = Bomb.__new__(Bomb)
+        bomb.pool = pool
+        bomb.index = index
+        return bomb
+
+    @property
+    def game(self):
+        """Reference to the GameState object."""
+        return self.pool.game
+
+    @property
+    def x(self):
+        """x-coordinate of the bomb."""
+        return self.pool.cols[self.index] * TILE_SIZE
+
+    @property
+    def y(self):
+        """y-coordinate of the bomb."""
+        return self.pool.rows[self.index] * TILE_SIZE
+
+    @property
+    def turn(self):
+        """Number of turns before explosion (for initial bombs)."""
+        return self.pool.turns[self.index]
+
+    @turn.setter
+    def turn(self, value):
+        self.pool.turns[self.index] = value
+
+    @property
+    def type(self):
+        """'player' for player bombs, 'initial' for random bombs."""
+        return BOMB_TYPE_NAMES[self.pool.types[self.index]]
+
+    @property
+    def fuse(self):
+        """Tick the bomb detonates at, when the game uses fuses."""
+        return self.pool.fuses[self.index]
+
+    @property
+    def cell(self):
+        """The (row, col) cell the bomb sits on."""
+        return self.pool.rows[self.index], self.pool.cols[self.index]
 
     def has_neighboring_bomb(self, x, y):
         """Check if there are any bombs in the neighboring tiles."""
-        neighbors = [
-            (x + TILE_SIZE, y),  # Right
-            (x - TILE_SIZE, y),  # Left
-            (x, y + TILE_SIZE),  # Down
-            (x, y - TILE_SIZE),  # Up
-        ]
-        for nx, ny in neighbors:
-            for bomb in self.game.bombs:
-                if bomb.x == nx and bomb.y == ny:
-                    return True  # Found a neighboring bomb
-        return False  # No neighboring bombs
+        return self.game.occupancy.has_neighboring_bomb((y // TILE_SIZE, x // TILE_SIZE))
 
     def explode(self):
         """
         Trigger the explosion, remove the bomb, and check for chain reactions.
+
+        :return: ChainResult describing the detonated and decremented bombs.
         """
-        # Create explosion effect
-        explosion = Explosion(self.x, self.y)
-        self.game.explosions.append(explosion)
-
-        # Queue to track bombs that need to explode
-        to_explode = [(self.x, self.y)]
-        # Set to track bombs that have already been added to the queue
-        processed = set()
-
-        # Remove current bomb
-        if self in self.game.bombs:
-            self.game.bombs.remove(self)
-
-        while to_explode:
-            x, y = to_explode.pop(0)  # Process next bomb
-            processed.add((x, y))  # Mark this bomb as processed
-
-            neighbors = [
-                (x + TILE_SIZE, y),  # Right
-                (x - TILE_SIZE, y),  # Left
-                (x, y + TILE_SIZE),  # Down
-                (x, y - TILE_SIZE),  # Up
-            ]
-
-            for nx, ny in neighbors:
-                for bomb in self.game.bombs[:]:
-                    if bomb.x == nx and bomb.y == ny and (bomb.x, bomb.y) not in processed:
-                        if bomb.type == "player":
-                            self.game.bombs.remove(bomb)
-                            to_explode.append((bomb.x, bomb.y))
-                            processed.add((bomb.x, bomb.y))
-                        else:  # It's an "initial" bomb
-                            if bomb.turn > 0:
-                                bomb.turn -= 1
-                                if bomb.has_neighboring_bomb(bomb.x, bomb.y):
-                                    to_explode.append((bomb.x, bomb.y))
-                                    processed.add((bomb.x, bomb.y))
-                            else:
-                                self.game.bombs.remove(bomb)
-                                to_explode.append((bomb.x, bomb.y))
-                                processed.add((bomb.x, bomb.y))
+        game = self.game
+        x, y, bomb_type = self.x, self.y, self.type  # Read before the chain frees the slot
+        chain = resolve_chain(game, self)
+        chain.broken = game.break_walls(chain.detonated)
+
+        # Create explosion effect over every detonated cell
+        game.add_explosion(x, y, chain.detonated)
+        game.emit("explosion", x=x, y=y, bomb_type=bomb_type, chain=chain)
+
+        # Report players standing in a detonated cell
+        occupancy = game.occupancy
+        for cell in chain.detonated:
+            for player in occupancy.players_at(cell):
+                game.emit("player_hit", player=player.player_num, row=cell[0], col=cell[1])
+        return chain
+
     @staticmethod
-    def add_initial_bombs(game, num_bombs):
+    def add_initial_bombs(game, num_bombs, turn_range=(1, 3)):
         """
         Add a specified number of random bombs to empty locations on the map.
 
-        :param game:
+        :param game: Reference to the GameState object.
         :param num_bombs: Number of bombs to add.
+        :param turn_range: Inclusive (min, max) range of turns given to each bomb.
         """
-        for _ in range(num_bombs):
-            # Find all empty tiles
-            empty_tiles = []
-            for row in range(GRID_SZE_ROW):
-                for col in range(GRID_SZE_COL):
-                    if (col, row) in PROTECTED_TILES:
-                        continue
-                    # Add the tile to empty_tiles if it is a Tile and not a Wall
-                    if (isinstance(game.tiles[row][col], Tile)
-                            and not isinstance(game.tiles[row][col], Wall)):
-                        empty_tiles.append((row, col))
+        if game.board is not None:
+            # Array-backed boards pick every bomb cell in a single vectorized pass
+            seed = game.rng.getrandbits(64)
+            player_cells = [player.cell for player in game.players]
+            for row, col, turns in game.board.choose_bomb_cells(num_bombs, seed, turn_range, player_cells):
+                game.add_bomb(Bomb(col * TILE_SIZE, row * TILE_SIZE, game, turns, bomb_type="initial"))
+            return
+
+        # Find all empty tiles once; each new bomb only takes its own cell out of the list
+        occupancy = game.occupancy
+        walls, bombs, players = occupancy.walls, occupancy.bombs, occupancy.players
+        protected = game.config.protected_tiles
+        empty_tiles = []
+        for row in range(occupancy.rows):
+            for col in range(occupancy.cols):
+                cell = (row, col)
+                # An empty Tile (walls hold every wall and breakable wall) without a bomb or a player
+                if cell not in walls and cell not in bombs and cell not in players and cell not in protected:
+                    empty_tiles.append(cell)
 
+        for _ in range(num_bombs):
             if not empty_tiles:
                 break  # No empty tiles found
 
             # Randomly select a position for the bomb
-            row, col = random.choice(empty_tiles)
+            row, col = game.rng.choice(empty_tiles)
+            empty_tiles.remove((row, col))
             bomb_x = col * TILE_SIZE
             bomb_y = row * TILE_SIZE
 
             # Create a Bomb
-            turns = random.randint(1, 3)
+            turns = game.rng.randint(*turn_range)
             new_bomb = Bomb(bomb_x, bomb_y, game, turns, bomb_type="initial")
-            game.bombs.append(new_bomb)
-
-    @staticmethod
-    def show_bomb_placement_screen(game):
-        """Display an interactive screen to manually place bombs."""
-        screen = game.screen
-        tiles = game.tiles
-        selecting = True
-        bg_overlay = pygame.Surface((WIDTH, HEIGHT))
-        bg_overlay.set_alpha(180)  # Semi-transparent background
-        bg_overlay.fill((193, 245, 241))  # Black overlay
-
-        """
-        A tile is considered empty if it meets the following conditions:
-            - It is NOT in PROTECTED_TILES.
-            - It is an instance of the Tile class.
-            - It is NOT an instance of the Wall class.
-        """
-        empty_tiles = []
-        for row in range(GRID_SZE_ROW):
-            for col in range(GRID_SZE_COL):
-                if ((row, col) not in PROTECTED_TILES and isinstance(tiles[row][col], Tile)
-                        and not isinstance(tiles[row][col], Wall)):
-                    empty_tiles.append((row, col))
-
-        placed_bombs = []
-
-        while selecting:
-            screen.blit(bg_overlay, (0, 0))
-
-            for row in range(GRID_SZE_ROW):
-                for col in range(GRID_SZE_COL):
-                    x, y = col * TILE_SIZE, row * TILE_SIZE
-
-                    # Checks if there is a Wall. If so, color it Black
-                    if isinstance(tiles[row][col], Wall):
-                        pygame.draw.rect(screen, (0, 0, 0),
-                                         (x, y, TILE_SIZE, TILE_SIZE))
-                    elif (row, col) in PROTECTED_TILES:
-                        pygame.draw.rect(screen, (75, 82, 89),
-                                         (x, y, TILE_SIZE, TILE_SIZE))
-                    elif (row, col) in empty_tiles:
-                        pygame.draw.rect(screen, (0, 0, 0),
-                                         (x, y, TILE_SIZE, TILE_SIZE), 2)
-
-                    # If already selected, fill it in
-                    if (row, col) in placed_bombs:
-                        pygame.draw.rect(screen, (200, 50, 50),
-                                         (x + 5, y + 5, TILE_SIZE - 10, TILE_SIZE - 10))
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    mx, my = pygame.mouse.get_pos()
-                    col, row = mx // TILE_SIZE, my // TILE_SIZE
-                    if (row, col) in empty_tiles:
-                        if (row, col) in placed_bombs:
-                            placed_bombs.remove((row, col))  # Remove if clicked again
-                        else:
-                            placed_bombs.append((row, col))  # Add bomb location
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN and placed_bombs:  # Finish selection
-                        selecting = False
-
-            pygame.display.flip()
-
-        return placed_bombs
+            game.add_bomb(new_bomb)
 
-    @staticmethod
-    def get_bomb_turns(game, placed_bombs):
-        """
-        Ask the user for turns for each manually placed bomb.
-        :param game:
-        :param placed_bombs: List of (row, col) tuples where bombs were placed.
-        :return: Dictionary mapping bomb positions to turn values.
-        """
-        screen = game.screen
-        bomb_turns = {}  # Store turns for each bomb position
-
-        font = pygame.font.Font(None, 28)
-        selecting_turns = True
-
-        while selecting_turns:
-            screen.fill((30, 30, 30))
-            instruction_text = font.render("Enter turns for each bomb (1-3). Press Enter when done.",
-                                           True, (255, 255, 255))
-            screen.blit(instruction_text, (20, 20))
-
-            # Display the bombs
-            for i, (row, col) in enumerate(placed_bombs):
-                x, y = col * TILE_SIZE, row * TILE_SIZE
-
-                turn_text = font.render(f"Bomb {i + 1}: ({row},{col}) - Turns: {bomb_turns.get((row, col), '?')}",
-                                        True, (255, 255, 255))
-                screen.blit(turn_text, (20, 50 + i * 30))
-
-            pygame.display.flip()
-
-            # Handle turn input
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN and len(bomb_turns) == len(placed_bombs):
-                        selecting_turns = False
-                    elif pygame.K_1 <= event.key <= pygame.K_3:
-                        turn = event.key - pygame.K_0  # Convert key to integer
-                        if len(bomb_turns) < len(placed_bombs):
-                            bomb_turns[placed_bombs[len(bomb_turns)]] = turn  # Assign turn
-
-        return bomb_turns
-
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
         """
         Draw the bomb on the screen.
 
         :param screen: The Pygame screen object.
+        :param offset: (x, y) added to the bomb's position, e.g. by a camera.
         """
+        from assets import assets, TURN_FONT_SIZE, TURN_COLOR  # Here, so headless games never load pygame
+        center = (self.x + TILE_SIZE // 2 + offset[0], self.y + TILE_SIZE // 2 + offset[1])
         if self.type == "initial":
-            bomb_rect = Bomb.bomb_surf_2.get_rect(
-                center=(self.x + TILE_SIZE // 2, self.y + TILE_SIZE // 2)
-            )
-            font = pygame.font.Font(None, 18)
-            text_surf = font.render(str(self.turn), True, (0, 255, 0))
-            text_rect = text_surf.get_rect(center=(self.x + TILE_SIZE // 2, self.y + TILE_SIZE // 2))
-            screen.blit(Bomb.bomb_surf_2, bomb_rect)
-            screen.blit(text_surf, text_rect)
+            bomb_surf = assets.sprite("initial_bomb")
+            text_surf = assets.text(str(self.turn), TURN_FONT_SIZE, TURN_COLOR)
+            screen.blit(bomb_surf, bomb_surf.get_rect(center=center))
+            screen.blit(text_surf, text_surf.get_rect(center=center))
         elif self.type == "player":
-            bomb_rect = Bomb.bomb_surf.get_rect(
-                center=(self.x + TILE_SIZE // 2, self.y + TILE_SIZE // 2)
-            )
-            screen.blit(Bomb.bomb_surf, bomb_rect)
+            bomb_surf = assets.sprite("bomb")
+            screen.blit(bomb_surf, bomb_surf.get_rect(center=center))
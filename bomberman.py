@@ -1,141 +1,240 @@
-import pygame
+import argparse
 import random
+import time
+import pygame
 from bomb import Bomb
-from wall import Wall
-from tile import Tile
-from player import Player
-from collections import deque
-from config import (WIDTH, HEIGHT, TILE_SIZE, FPS, EXCLUDED_ROWS,
-                    EXCLUDED_COLS, GRID_SZE_ROW, GRID_SZE_COL)
+from bot import with_bot_input
+from game_state import GameState
+from renderer import DirtyRectRenderer
+from camera import ViewportRenderer, CAMERA_MODES
+from replay import Replay, ReplayPlayer, ReplayRecorder, SEED_MIN, SEED_MAX
+from level_pack import Level, LevelPack
+from profiler import FrameProfiler, PerformanceOverlay
+from scene import run_scene, PromptScene, PlacementScene, TurnsScene
+from assets import assets, ATLAS
+from config import (WIDTH, HEIGHT, TILE_SIZE, TICK_RATE, RENDER_FPS,
+                    MAX_FRAME_TIME, MAX_TICKS_PER_FRAME, GRID_SZE_ROW, GRID_SZE_COL)
+
+OVERLAY_KEY = pygame.K_F3
+# Keyboard layout of each human player, in ACTIONS order; players without one are bots
+KEY_BINDINGS = [
+    (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_SPACE),
+    (pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_LSHIFT),
+    (pygame.K_j, pygame.K_l, pygame.K_i, pygame.K_k, pygame.K_RSHIFT),
+    (pygame.K_KP4, pygame.K_KP6, pygame.K_KP8, pygame.K_KP5, pygame.K_KP0),
+]
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None, dirty_rects=True, prompt=True, board=None, bomb_layout=None, bots=(),
+                 camera=None, bombs=5, num_players=2, breakable_chance=0.0, level=None, first_frame_only=False,
+                 fuse_ticks=None):
         """
         Initialize the Game object.
 
-        - Sets up the screen, clock, and game state.
-        - Initializes players, bombs, bomb queue, and explosions.
-        - Generates the game map and adds initial bombs.
+        - Sets up the screen and clock.
+        - Creates the headless game state that holds the rules.
+        - Adds initial bombs, manually or at random.
+
+        :param seed: Optional seed for map and bomb generation.
+        :param dirty_rects: Use the cached board layer and push only changed rectangles.
+        :param prompt: Ask whether to place bombs manually; if False, bombs are random.
+        :param board: Optional ArrayBoard to play on instead of a generated map.
+        :param bomb_layout: Optional (row, col, turn, bomb_type) list of initial bombs,
+                            e.g. from a replay. Skips the placement prompt.
+        :param bots: Player numbers controlled by the computer.
+        :param camera: "follow" or "split" to draw through scrolling cameras. Used
+                       by default when the map is larger than the window.
+        :param bombs: Number of random initial bombs.
+        :param num_players: Number of players. Players beyond the KEY_BINDINGS are
+                            always controlled by the computer.
+        :param breakable_chance: Chance of each free cell of the generated map
+                                 holding a breakable wall.
+        :param level: Optional Level to play, with its own map and bombs. Skips the
+                      placement prompt.
+        :param first_frame_only: Exit once the first frame is on screen, printing the
+                                 time to first frame (for startup benchmarks).
+        :param fuse_ticks: Ticks a bomb burns before it detonates, or None for the
+                           original rule of the oldest of three queued bombs exploding.
         """
-        pygame.init()
+        self.started = time.perf_counter()
+        self.first_frame_time = None  # Seconds from here until the first frame was shown
+        self.first_frame_only = first_frame_only
+        # Only the modules the game uses; pygame.init() would also start audio, joysticks, etc.
+        pygame.display.init()
+        pygame.font.init()
         self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
         self.clock = pygame.time.Clock()
         pygame.display.set_caption("Bomberman")
+        assets.start_loading()  # Sprites load while the prompt is already on screen
+        assets.preload()
         self.running = True
-        self.players = [Player(self, 1), Player(self, 2)]
-        self.bombs = []
-        self.bomb_queue = deque()
-        self.bomb_counter = 0
-        self.explosions = []
-        self.tiles = Game.create_map()
-
-        self.setup_initial_bombs()
-
-    @staticmethod
-    def create_map():
-        """
-        Generate the game map with a mix of walls and empty tiles.
-
-        :return: A 2D list representing the map tiles.
-        """
-        tiles = []
-        for row in range(GRID_SZE_ROW):
-            row_tiles = []
-            for col in range(GRID_SZE_COL):
-                if row in EXCLUDED_ROWS and col in EXCLUDED_COLS:
-                    row_tiles.append(Tile(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, 0))  # 0 = Empty tile
-                else:
-                    if random.random() < 0.2:  # 20% chance to be a wall
-                        row_tiles.append(Wall(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE))
-                    else:
-                        row_tiles.append(Tile(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, 0))
-            tiles.append(row_tiles)
-        return tiles
+        self.tick_rate = TICK_RATE
+        self.fps = RENDER_FPS
+        self.max_speed = False  # One unthrottled tick per frame, e.g. for replays
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        bots = set(bots) | set(range(len(KEY_BINDINGS) + 1, num_players + 1))
+        self.state = GameState(self.seed, board=board, bots=bots, num_players=num_players,
+                               breakable_chance=breakable_chance,
+                               tiles=level.tile_grid() if level is not None else None,
+                               fuse_ticks=fuse_ticks)
+        # (input key, pygame key) of every human player's actions
+        self.bindings = [(key, code) for player in self.state.players if player.player_num not in bots
+                         for key, code in zip(player.input_keys, KEY_BINDINGS[player.player_num - 1])]
+        self.input_source = self.get_input_state
+        self.recorder = None
+
+        if level is not None:
+            self.state.load_bomb_layout(level.bombs)
+        elif bomb_layout is not None:
+            self.state.load_bomb_layout(bomb_layout)
+        elif prompt and board is None:  # The placement screen shows the default map only
+            self.setup_initial_bombs()
+        else:
+            Bomb.add_initial_bombs(self.state, bombs)
+
+        occupancy = self.state.occupancy
+        if camera is None and (occupancy.cols * TILE_SIZE > WIDTH or occupancy.rows * TILE_SIZE > HEIGHT):
+            camera = "follow"
+        if camera is not None:
+            self.renderer = ViewportRenderer(self.screen, self.state, camera)
+        elif dirty_rects:
+            self.renderer = DirtyRectRenderer(self.screen, self.state)
+        else:
+            self.renderer = None
+        self.profiler = FrameProfiler()
+        self.overlay = PerformanceOverlay(self.profiler)
 
-    @staticmethod
-    def get_input_state():
+    def get_input_state(self):
         """
-        Retrieve the current state of player inputs.
+        Retrieve the current state of the human players' inputs.
 
         :return: Dictionary mapping movement and bomb actions to key states.
         """
         keys = pygame.key.get_pressed()
-        return {
-            "p1_left": keys[pygame.K_LEFT],
-            "p1_right": keys[pygame.K_RIGHT],
-            "p1_up": keys[pygame.K_UP],
-            "p1_down": keys[pygame.K_DOWN],
-            "p1_bomb": keys[pygame.K_SPACE],
-
-            "p2_left": keys[pygame.K_a],
-            "p2_right": keys[pygame.K_d],
-            "p2_up": keys[pygame.K_w],
-            "p2_down": keys[pygame.K_s],
-            "p2_bomb": keys[pygame.K_LSHIFT]
-        }
+        return {key: keys[code] for key, code in self.bindings}
 
     def run(self):
         """
         Run the main game loop.
 
         - Handles user input events.
-        - Updates the game state.
-        - Renders all game elements on the screen.
+        - Updates the game state at a fixed tick rate, independent of the display:
+          real time is accumulated and spent in whole ticks, so a slow frame runs
+          several ticks before drawing and a fast one may run none.
+        - Renders all game elements, interpolating players between ticks.
+        - Records the time spent in each phase with the frame profiler.
         """
+        profiler = self.profiler
+        state = self.state
+        tick_time = 1 / self.tick_rate
+        accumulator = 0.0
+        previous = time.perf_counter()
         while self.running:
+            profiler.begin_frame()
             self.handle_events()
-            self.update_game()
-            self.render()
-            self.clock.tick(FPS)
+            profiler.lap("events")
+
+            now = time.perf_counter()
+            accumulator += min(now - previous, MAX_FRAME_TIME)
+            previous = now
+            if self.max_speed:
+                accumulator = tick_time  # One tick per frame, as fast as possible
+
+            ticks = 0
+            while self.running and accumulator >= tick_time and ticks < MAX_TICKS_PER_FRAME:
+                self.update_game()
+                accumulator -= tick_time
+                ticks += 1
+            if ticks == MAX_TICKS_PER_FRAME:
+                accumulator = min(accumulator, tick_time)  # Too far behind: slow down instead
+            profiler.lap("update")
+
+            self.render(1.0 if self.max_speed else accumulator / tick_time)
+            profiler.lap("render")
+            self.clock.tick(0 if self.max_speed else self.fps)
+            profiler.lap("wait")
+            profiler.end_frame(len(state.bombs), len(state.explosions), len(state.occupancy.walls))
 
     def handle_events(self):
         """
-        Process game events such as quitting the game.
+        Process game events such as quitting the game or toggling the performance overlay.
         """
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.KEYDOWN and event.key == OVERLAY_KEY:
+                self.overlay.toggle()
+                if self.renderer is not None and not self.overlay.visible:
+                    self.renderer.invalidate()  # Repaint what the overlay covered
 
     def update_game(self):
         """
         Update the game state, including player movements, bomb explosions, and ongoing animations.
 
-        - Updates players based on user input.
-        - Processes bomb explosions using the bomb queue.
-        - Updates ongoing explosions.
-        """
-        walls = Wall.get_walls(self.tiles)
-        input_state = self.get_input_state()
-
-        for player in self.players:
-            player.update(input_state, walls, self.bombs)
+        - Reads the input source (the keyboard, or a replay) and advances the game state by one tick.
+        - Records the input if a replay is being recorded.
 
-        if len(self.bomb_queue) >= 3:
-            first_bomb = self.bomb_queue.popleft()
-            first_bomb.explode()
-
-        for explosion in self.explosions:
-            explosion.update()
-
-    def render(self):
+        :return: List of events produced during this tick.
+        """
+        input_state = self.input_source()
+        if input_state is None:  # Replay finished
+            self.running = False
+            return []
+        events = self.state.step(input_state)
+        if self.renderer is not None:
+            for event in events:
+                if event["type"] == "tile_changed":
+                    self.renderer.invalidate_tile((event["row"], event["col"]))
+        if self.recorder is not None:
+            # Record the keys the bots chose too, so the replay plays without bots
+            self.recorder.record(with_bot_input(input_state, self.state.players))
+        return events
+
+    def render(self, alpha=1.0):
         """
         Render all game elements onto the screen.
 
         - Draws the game board, including tiles, players, bombs, and explosions.
+        - In dirty-rect mode, only the changed parts of the screen are redrawn.
+
+        :param alpha: Fraction of a tick elapsed since the last update, used to
+                      interpolate player positions.
         """
+        if self.renderer is not None:
+            rects = self.renderer.render(present=False, alpha=alpha)
+            overlay_rect = self.overlay.draw(self.screen)
+            if overlay_rect is not None:
+                rects.append(overlay_rect)
+            pygame.display.update(rects)
+            self.frame_presented()
+            return
+
         self.screen.fill((0, 0, 0))
 
-        for row in self.tiles:
+        for row in self.state.tiles:
             for tile in row:
                 tile.draw(self.screen)
 
-        for player in self.players:
-            player.draw(self.screen)
-        for bomb in self.bombs:
+        for player in self.state.players:
+            player.draw(self.screen, alpha)
+        for bomb in self.state.bombs:
             bomb.draw(self.screen)
+        for explosion in self.state.explosions:
+            explosion.draw(self.screen)
 
+        self.overlay.draw(self.screen)
         pygame.display.flip()
+        self.frame_presented()
+
+    def frame_presented(self):
+        """Record the time to first frame when the first frame reaches the display."""
+        if self.first_frame_time is not None:
+            return
+        self.first_frame_time = time.perf_counter() - self.started
+        if self.first_frame_only:
+            print(f"time to first frame: {self.first_frame_time * 1000:.1f}ms")
+            raise SystemExit(0)
 
     def setup_initial_bombs(self):
         """
@@ -146,14 +245,14 @@ class Game:
         """
         prompt = self.user_prompt()
         if prompt:
-            placed_bombs = Bomb.show_bomb_placement_screen(self)
-            bomb_turns = Bomb.get_bomb_turns(self, placed_bombs)
+            placed_bombs = run_scene(self.screen, PlacementScene(self.state.tiles, self.state.config.protected_tiles))
+            bomb_turns = run_scene(self.screen, TurnsScene(placed_bombs))
 
             for (row, col), turn in bomb_turns.items():
                 bomb_x, bomb_y = col * TILE_SIZE, row * TILE_SIZE
-                self.bombs.append(Bomb(bomb_x, bomb_y, self, turn=turn, bomb_type="initial"))
+                self.state.add_bomb(Bomb(bomb_x, bomb_y, self.state, turn=turn, bomb_type="initial"))
         else:
-            Bomb.add_initial_bombs(self, 5)
+            Bomb.add_initial_bombs(self.state, 5)
 
     def user_prompt(self):
         """
@@ -161,35 +260,106 @@ class Game:
 
         :return: True if the player chooses manual placement, False otherwise.
         """
-        font = pygame.font.Font(None, 36)
-        selecting = True
-        choice = False
-
-        while selecting:
-            self.screen.fill((30, 30, 30))
-            bg_image = pygame.image.load("assets/background_image.png")
-            bg_image = pygame.transform.scale(bg_image, (600, 600))
-            self.screen.blit(bg_image, (0, 0))
-
-            text = font.render("Do you want to manually place bombs? (Y/N)", True, (255, 200, 100))
-            self.screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - 50))
-
-            pygame.display.flip()
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_y:
-                        choice = True
-                        selecting = False
-                    elif event.key == pygame.K_n:
-                        selecting = False
-
-        return choice
+        return run_scene(self.screen, PromptScene(), on_frame=self.frame_presented)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Bomberman.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the map and bombs.")
+    parser.add_argument("--full-redraw", action="store_true", help="Redraw the whole screen every frame.")
+    parser.add_argument("--profile-dump", metavar="PATH", help="Write per-frame timings to a CSV file on exit.")
+    parser.add_argument("--record", metavar="PATH", help="Record a replay of this match.")
+    parser.add_argument("--replay", metavar="PATH", help="Watch a recorded replay.")
+    parser.add_argument("--max-speed", action="store_true", help="Do not throttle to the frame rate.")
+    parser.add_argument("--players", type=int, default=2, metavar="N",
+                        help=f"Number of players; players after {len(KEY_BINDINGS)} are bots.")
+    parser.add_argument("--bot", type=int, action="append", default=[],
+                        help="Let the computer control this player (repeatable).")
+    parser.add_argument("--map-size", type=int, default=None, metavar="N",
+                        help="Play on a generated N x N map; larger maps scroll.")
+    parser.add_argument("--breakable", type=float, default=0.0, metavar="CHANCE",
+                        help="Chance of each free cell holding a wall that explosions destroy.")
+    parser.add_argument("--level", metavar="PACK", help="Play a level from a level pack.")
+    parser.add_argument("--level-index", type=int, default=0, metavar="N",
+                        help="Index of the level to play in the --level pack.")
+    parser.add_argument("--save-level", metavar="PATH",
+                        help="Save the starting map and bombs (e.g. a manual layout) as a level pack.")
+    parser.add_argument("--no-prompt", action="store_true",
+                        help="Place random bombs without asking about manual placement.")
+    parser.add_argument("--first-frame", action="store_true",
+                        help="Exit once the first frame is shown and print the time to first frame.")
+    parser.add_argument("--fuse", type=int, default=None, metavar="TICKS",
+                        help="Bombs detonate after burning this many ticks (60 per second) instead of "
+                             "the oldest of three queued bombs exploding.")
+    parser.add_argument("--camera", choices=CAMERA_MODES, default=None,
+                        help="Follow player 1, or split the screen between both players.")
+    parser.add_argument("--atlas", default=ATLAS, metavar="PATH",
+                        help="Sprite atlas cache file, rebuilt when missing or out of date.")
+    args = parser.parse_args(argv)
+    if args.map_size is not None and (args.record or args.replay):
+        parser.error("replays only store the default map, so --map-size cannot be combined with them")
+    if args.players != 2 and (args.record or args.replay):
+        parser.error("replays only store two players, so --players cannot be combined with them")
+    if args.breakable and (args.record or args.replay):
+        parser.error("replays only store the default map, so --breakable cannot be combined with them")
+    if args.level and (args.record or args.replay or args.map_size is not None or args.breakable):
+        parser.error("--level brings its own map, so it cannot be combined with replays, "
+                     "--map-size or --breakable")
+    if args.fuse is not None and (args.record or args.replay):
+        parser.error("replays only store the bomb queue rule, so --fuse cannot be combined with them")
+    if args.record and args.seed is not None and not SEED_MIN <= args.seed <= SEED_MAX:
+        parser.error(f"replays store the seed as a signed 64-bit number, so --seed must be "
+                     f"from {SEED_MIN} to {SEED_MAX} to be combined with --record")
+    if args.fuse is not None and args.fuse < 1:
+        parser.error("--fuse must be at least 1")
+    if args.players < 1:
+        parser.error("--players must be at least 1")
+    if args.camera == "split" and args.players < 2:
+        parser.error("--camera split follows two players, so it needs --players 2 or more")
+    for num in args.bot:
+        if not 1 <= num <= args.players:
+            parser.error(f"--bot must be a player number from 1 to {args.players}")
+
+    assets.atlas_path = args.atlas
+
+    board = None
+    bombs = 5
+    if args.map_size is not None:
+        from array_board import ArrayBoard  # Needs NumPy, so only imported for custom maps
+        board = ArrayBoard.generate(args.map_size, args.map_size, seed=args.seed,
+                                    breakable_chance=args.breakable, num_players=args.players)
+        bombs = max(5, 5 * args.map_size ** 2 // (GRID_SZE_ROW * GRID_SZE_COL))  # Same density
+
+    level = None
+    if args.level:
+        with LevelPack(args.level) as pack:
+            level = pack[args.level_index]
+
+    if args.replay:
+        player = ReplayPlayer(Replay.load(args.replay))
+        game = Game(seed=player.replay.seed, dirty_rects=not args.full_redraw,
+                    bomb_layout=player.replay.bombs, camera=args.camera, first_frame_only=args.first_frame)
+        player.state = game.state
+        game.input_source = player.next_input
+    else:
+        game = Game(seed=args.seed, dirty_rects=not args.full_redraw, prompt=not args.no_prompt, bots=args.bot,
+                    board=board, camera=args.camera, bombs=bombs, num_players=args.players,
+                    breakable_chance=args.breakable, level=level, first_frame_only=args.first_frame,
+                    fuse_ticks=args.fuse)
+        if args.record:
+            game.recorder = ReplayRecorder(args.record, game.seed, game.state)
+    game.max_speed = args.max_speed
+    if args.save_level:
+        LevelPack.write(args.save_level, [Level.from_state(game.state)])
+
+    try:
+        game.run()
+    finally:
+        if game.recorder is not None:
+            game.recorder.close()
+        if args.profile_dump:
+            game.profiler.dump(args.profile_dump)
 
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    main()
@@ -0,0 +1,266 @@
+import argparse
+import time
+from collections import deque
+from player import Player, ACTIONS
+from config import BOT_TICK_BUDGET
+
+IDLE = {"left": False, "right": False, "up": False, "down": False, "bomb": False}
+DIRECTIONS = {
+    (0, -1): "left",
+    (0, 1): "right",
+    (-1, 0): "up",
+    (1, 0): "down",
+}
+CLOCK_CHECK_NODES = 32  # Nodes expanded between deadline checks
+
+
+class PathSearch:
+    def __init__(self, occupancy, start, is_goal, is_blocked):
+        """
+        Initialize the PathSearch object.
+
+        A breadth-first search that can be paused when its time budget runs out
+        and resumed on a later tick.
+
+        :param occupancy: The game's OccupancyGrid.
+        :param start: (row, col) cell the search starts from.
+        :param is_goal: Callable taking a cell, True for cells to stop at.
+        :param is_blocked: Callable taking a cell, True for cells that cannot be entered.
+        """
+        self.occupancy = occupancy
+        self.start = start
+        self.is_goal = is_goal
+        self.is_blocked = is_blocked
+        self.frontier = deque([start])
+        self.came_from = {start: None}
+        self.goal = None
+        self.done = False
+
+    def run(self, deadline=None):
+        """
+        Expand nodes until a goal is found, the search is exhausted or the deadline passes.
+
+        :param deadline: time.perf_counter() value to stop at, or None for no limit.
+        :return: True once the search is finished.
+        """
+        frontier = self.frontier
+        came_from = self.came_from
+        neighbors = self.occupancy.neighbors
+        expanded = 0
+        while frontier:
+            cell = frontier.popleft()
+            if self.is_goal(cell):
+                self.goal = cell
+                break
+            for neighbor in neighbors(cell):
+                if neighbor not in came_from and not self.is_blocked(neighbor):
+                    came_from[neighbor] = cell
+                    frontier.append(neighbor)
+            expanded += 1
+            if deadline is not None and expanded % CLOCK_CHECK_NODES == 0 and time.perf_counter() > deadline:
+                return False
+        self.done = True
+        return True
+
+    def path(self):
+        """
+        Get the path found.
+
+        :return: List of cells from the cell after start to the goal, empty if none.
+        """
+        path = []
+        cell = self.goal
+        while cell is not None and cell != self.start:
+            path.append(cell)
+            cell = self.came_from[cell]
+        path.reverse()
+        return path
+
+
+class BotPlayer(Player):
+    __slots__ = ("budget", "decision", "path", "search", "plan_key")
+
+    def __init__(self, game, player_num=1, budget=BOT_TICK_BUDGET):
+        """
+        Initialize the BotPlayer object.
+
+        A computer-controlled player. It ignores the input state and picks its own
+        keys each tick: it leaves cells the next chain reactions would detonate,
+        walks towards the nearest opponent and drops a bomb next to it when it can
+        still get clear. Pathfinding gets at most `budget` seconds per tick; an
+        unfinished search carries over to the next tick.
+
+        :param game: Reference to the GameState object.
+        :param player_num: Player number.
+        :param budget: Seconds of pathfinding per tick, or None for no limit (which
+                       makes the bot deterministic, e.g. for replays and batch runs).
+        """
+        super().__init__(game, player_num)
+        self.budget = budget
+        self.decision = IDLE
+        self.path = []
+        self.search = None
+        self.plan_key = None
+
+    def get_player_input(self, input_state):
+        """Return the keys chosen by the bot for this tick."""
+        return self.decision
+
+    def update(self, input_state):
+        """
+        Decide on this tick's keys, then update like any other player.
+
+        :param input_state: Dictionary of input states (ignored by the bot).
+        """
+        if self.x == self.target_x and self.y == self.target_y:
+            self.decision = self.think()
+        super().update(input_state)
+
+    def nearest_opponent(self):
+        """Get the closest other player by Manhattan distance."""
+        row, col = self.cell
+        others = [p for p in self.game.players if p is not self]
+        if not others:
+            return None
+        return min(others, key=lambda p: abs(p.cell[0] - row) + abs(p.cell[1] - col))
+
+    def is_blocked(self, cell):
+        """Check if the bot cannot walk into a cell."""
+        if self.game.occupancy.is_wall(cell):
+            return True
+        return any(p is not self for p in self.game.occupancy.players_at(cell))
+
+    def is_safe(self, cell):
+        """Check if a cell can be stood on: no bomb and not about to detonate."""
+        return cell not in self.game.occupancy.bombs and not self.game.danger_map.is_dangerous(cell)
+
+    def can_escape(self, cell):
+        """Check if there is a safe cell to step to after dropping a bomb on a cell."""
+        return any(not self.is_blocked(n) and self.is_safe(n) for n in self.game.occupancy.neighbors(cell))
+
+    def plan(self, key, is_goal, is_blocked):
+        """
+        Search for a path, continuing the search of earlier ticks while the key is unchanged.
+
+        :param key: Identifies the goal and the state it was planned against.
+        :param is_goal: Goal predicate for a new search.
+        :param is_blocked: Blocked-cell predicate for a new search.
+        """
+        if key != self.plan_key or (self.search is None and not self.path):
+            self.plan_key = key
+            self.path = []
+            self.search = PathSearch(self.game.occupancy, self.cell, is_goal, is_blocked)
+        if self.search is not None:
+            deadline = None if self.budget is None else time.perf_counter() + self.budget
+            if self.search.run(deadline):
+                self.path = self.search.path()
+                self.search = None
+
+    def step_along_path(self):
+        """
+        Get the keys that move the bot one cell along its path.
+
+        :return: Input dictionary, IDLE if the path is empty or blocked.
+        """
+        cell = self.cell
+        while self.path and self.path[0] == cell:
+            self.path.pop(0)
+        if not self.path:
+            return IDLE
+        next_cell = self.path[0]
+        direction = DIRECTIONS.get((next_cell[0] - cell[0], next_cell[1] - cell[1]))
+        if direction is None or self.is_blocked(next_cell):
+            self.path = []  # Knocked off the path; plan again next tick
+            return IDLE
+        return dict(IDLE, **{direction: True})
+
+    def think(self):
+        """
+        Choose this tick's keys.
+
+        :return: Dictionary with the left/right/up/down/bomb keys.
+        """
+        danger_map = self.game.danger_map
+        danger = danger_map.danger_cells()
+        cell = self.cell
+
+        # Get off bombs, and out of cells the next chains would detonate
+        if cell in danger or cell in self.game.occupancy.bombs:
+            self.plan(("flee", danger_map.version, tuple(danger_map.threat_origins())),
+                      self.is_safe, self.is_blocked)
+            return self.step_along_path()
+
+        opponent = self.nearest_opponent()
+        if opponent is None:
+            return IDLE
+        target = opponent.cell
+        if abs(target[0] - cell[0]) + abs(target[1] - cell[1]) <= 1:
+            if not danger_map.would_endanger(cell) and self.can_escape(cell):
+                return dict(IDLE, bomb=True)
+            return IDLE
+
+        def is_goal(goal_cell):
+            return abs(target[0] - goal_cell[0]) + abs(target[1] - goal_cell[1]) == 1
+
+        def is_blocked(next_cell):
+            return next_cell in danger or self.is_blocked(next_cell)
+
+        self.plan(("hunt", danger_map.version, target), is_goal, is_blocked)
+        return self.step_along_path()
+
+
+def with_bot_input(input_state, players):
+    """
+    Replace the keys of bot-controlled players with the keys they chose this tick.
+
+    :param input_state: Dictionary mapping the p<n>_* actions to booleans.
+    :param players: The game's players.
+    :return: A new input state dictionary.
+    """
+    merged = dict(input_state)
+    for player in players:
+        if isinstance(player, BotPlayer):
+            for action, key in zip(ACTIONS, player.input_keys):
+                merged[key] = player.decision[action]
+    return merged
+
+
+def main(argv=None):
+    from game_state import GameState
+    from bomb import Bomb
+
+    parser = argparse.ArgumentParser(description="Run headless bot-versus-bot matches and time the bots.")
+    parser.add_argument("--matches", type=int, default=6, help="Matches run side by side (two bots each).")
+    parser.add_argument("--ticks", type=int, default=3600, help="Ticks per match.")
+    parser.add_argument("--budget", type=float, default=BOT_TICK_BUDGET,
+                        help="Pathfinding seconds per bot per tick (0 = unlimited).")
+    args = parser.parse_args(argv)
+
+    states = []
+    for seed in range(args.matches):
+        state = GameState(seed, bots=(1, 2))
+        Bomb.add_initial_bombs(state, 5)
+        for player in state.players:
+            player.budget = args.budget or None
+        states.append(state)
+
+    tick_times = []
+    hits = [0] * len(states)
+    for _ in range(args.ticks):
+        start = time.perf_counter()
+        for i, state in enumerate(states):
+            for event in state.step({}):
+                if event["type"] == "player_hit":
+                    hits[i] += 1
+        tick_times.append(time.perf_counter() - start)
+
+    tick_times.sort()
+    bots = 2 * len(states)
+    print(f"{bots} bots, {args.ticks} ticks: mean {sum(tick_times) / len(tick_times) * 1000:.3f}ms, "
+          f"p99 {tick_times[int(len(tick_times) * 0.99)] * 1000:.3f}ms, "
+          f"max {tick_times[-1] * 1000:.3f}ms per tick (frame budget {1000 / 60:.1f}ms)")
+    print(f"bombs placed {sum(s.bomb_counter for s in states)}, player hits {sum(hits)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import pygame
+from config import TILE_SIZE
+
+CAMERA_MODES = ("follow", "split")
+CACHE_MARGIN = 4 * TILE_SIZE  # Board drawn around the view, so small scrolls reuse the cache
+DIVIDER_COLOR = (0, 0, 0)
+DIVIDER_WIDTH = 4
+
+
+class Camera:
+    def __init__(self, view, map_width, map_height):
+        """
+        Initialize the Camera object.
+
+        :param view: Rect of the screen the camera draws into.
+        :param map_width: Width of the map in pixels.
+        :param map_height: Height of the map in pixels.
+        """
+        self.view = pygame.Rect(view)
+        self.map_width = map_width
+        self.map_height = map_height
+        self.x = 0  # Map position shown at the view's top-left corner
+        self.y = 0
+
+    @staticmethod
+    def clamp(center, view_size, map_size):
+        """Get the top-left coordinate that centres a view on a point without leaving the map."""
+        if map_size <= view_size:
+            return -((view_size - map_size) // 2)  # Map smaller than the view: centre it
+        return max(0, min(center - view_size // 2, map_size - view_size))
+
+    def follow(self, x, y):
+        """
+        Centre the camera on a tile-sized object.
+
+        :param x: x-coordinate of the object on the map.
+        :param y: y-coordinate of the object on the map.
+        """
+        self.x = Camera.clamp(x + TILE_SIZE // 2, self.view.width, self.map_width)
+        self.y = Camera.clamp(y + TILE_SIZE // 2, self.view.height, self.map_height)
+
+    @property
+    def world_rect(self):
+        """The part of the map that is visible, in map pixels."""
+        return pygame.Rect(self.x, self.y, self.view.width, self.view.height)
+
+    @property
+    def offset(self):
+        """Offset that turns map coordinates into screen coordinates."""
+        return self.view.x - self.x, self.view.y - self.y
+
+    def visible_cells(self, rect=None):
+        """
+        Get the cell range covered by a map rectangle.
+
+        :param rect: Rect in map pixels; defaults to the visible part of the map.
+        :return: (first row, end row, first col, end col), end exclusive and clipped
+                 to the map.
+        """
+        rect = self.world_rect if rect is None else rect
+        rows = self.map_height // TILE_SIZE
+        cols = self.map_width // TILE_SIZE
+        return (max(0, rect.top // TILE_SIZE), min(rows, -(-rect.bottom // TILE_SIZE)),
+                max(0, rect.left // TILE_SIZE), min(cols, -(-rect.right // TILE_SIZE)))
+
+
+class ViewportRenderer:
+    def __init__(self, screen, state, mode="follow"):
+        """
+        Initialize the ViewportRenderer object.
+
+        Draws the map through one camera following player 1, or two cameras side by
+        side following each player. Each camera keeps the tiles around its view in
+        an offscreen cache that is redrawn only when the view scrolls out of it.
+        Bombs, players and explosions outside the view are skipped, so the cost of
+        a frame depends on the window size, not the map size.
+
+        :param screen: The Pygame screen object.
+        :param state: The GameState to draw.
+        :param mode: "follow" or "split".
+        :raises ValueError: If the mode is unknown, or "split" with fewer than two players.
+        """
+        if mode not in CAMERA_MODES:
+            raise ValueError(f"camera mode must be one of {CAMERA_MODES}, not {mode!r}")
+        if mode == "split" and len(state.players) < 2:
+            raise ValueError(f"the split camera follows two players, but the game has {len(state.players)}")
+        self.screen = screen
+        self.state = state
+        self.mode = mode
+        map_width = state.occupancy.cols * TILE_SIZE
+        map_height = state.occupancy.rows * TILE_SIZE
+
+        width, height = screen.get_size()
+        if mode == "split":
+            half = width // 2
+            views = [(0, 0, half - DIVIDER_WIDTH // 2, height),
+                     (half + DIVIDER_WIDTH // 2, 0, width - half - DIVIDER_WIDTH // 2, height)]
+        else:
+            views = [(0, 0, width, height)]
+        self.cameras = [Camera(view, map_width, map_height) for view in views]
+        self.targets = state.players[:len(self.cameras)]
+        self.caches = [None] * len(self.cameras)  # (surface, map rect) per camera
+        self.dirty_tiles = set()
+
+    def invalidate(self):
+        """Nothing to do: every frame redraws the whole view."""
+
+    def invalidate_board(self):
+        """Redraw the cached tiles on the next frame."""
+        self.caches = [None] * len(self.cameras)
+
+    def invalidate_tile(self, cell):
+        """
+        Redraw a single tile of the cached board on the next frame.
+
+        :param cell: (row, col) tuple of the tile that changed.
+        """
+        self.dirty_tiles.add(cell)
+
+    def build_cache(self, camera):
+        """
+        Draw the tiles around a camera's view onto a new offscreen surface.
+
+        :return: (surface, map rect covered by the surface).
+        """
+        rect = camera.world_rect.inflate(2 * CACHE_MARGIN, 2 * CACHE_MARGIN)
+        surface = pygame.Surface(rect.size)
+        surface.fill((0, 0, 0))
+        offset = (-rect.x, -rect.y)
+        tiles = self.state.tiles
+        first_row, end_row, first_col, end_col = camera.visible_cells(rect)
+        for row in range(first_row, end_row):
+            row_tiles = tiles[row]
+            for col in range(first_col, end_col):
+                row_tiles[col].draw(surface, offset)
+        return surface, rect
+
+    def visible_bombs(self, camera):
+        """Get the bombs in a camera's view, scanning whichever is smaller: bombs or cells."""
+        first_row, end_row, first_col, end_col = camera.visible_cells()
+        if len(self.state.bombs) <= (end_row - first_row) * (end_col - first_col):
+            return [bomb for bomb in self.state.bombs
+                    if first_row <= bomb.cell[0] < end_row and first_col <= bomb.cell[1] < end_col]
+        bombs = self.state.occupancy.bombs
+        return [bombs[(row, col)] for row in range(first_row, end_row)
+                for col in range(first_col, end_col) if (row, col) in bombs]
+
+    def draw_view(self, index, alpha):
+        """Draw one camera's view of the map."""
+        screen = self.screen
+        camera = self.cameras[index]
+        x, y = self.targets[index].interpolated_position(alpha)
+        camera.follow(x, y)
+        world = camera.world_rect
+
+        cache = self.caches[index]
+        if cache is None or not cache[1].contains(world):
+            cache = self.caches[index] = self.build_cache(camera)
+        surface, cache_rect = cache
+        for row, col in self.dirty_tiles:
+            self.state.tiles[row][col].draw(surface, (-cache_rect.x, -cache_rect.y))
+
+        screen.set_clip(camera.view)
+        if camera.x < 0 or camera.y < 0:
+            screen.fill((0, 0, 0), camera.view)  # Map smaller than the view
+        screen.blit(surface, camera.view, world.move(-cache_rect.x, -cache_rect.y))
+
+        offset = camera.offset
+        for bomb in self.visible_bombs(camera):
+            bomb.draw(screen, offset)
+        for player in self.state.players:
+            px, py = player.interpolated_position(alpha)
+            if world.colliderect((px, py, TILE_SIZE, TILE_SIZE)):
+                player.draw(screen, alpha, offset)
+        first_row, end_row, first_col, end_col = camera.visible_cells()
+        for explosion in self.state.explosions:
+            for cell in explosion.cells:
+                if first_row <= cell[0] < end_row and first_col <= cell[1] < end_col:
+                    explosion.draw_cell(screen, cell, offset)
+        screen.set_clip(None)
+
+    def render(self, present=True, alpha=1.0):
+        """
+        Draw every camera's view.
+
+        :param present: Push the views to the display. If False, the caller is
+                        expected to draw on top and call pygame.display.update itself.
+        :param alpha: Fraction of a tick elapsed since the last update.
+        :return: List of rectangles that were updated.
+        """
+        for index in range(len(self.cameras)):
+            self.draw_view(index, alpha)
+        self.dirty_tiles.clear()
+
+        rects = [self.screen.get_rect()]
+        if self.mode == "split":
+            divider = pygame.Rect(0, 0, DIVIDER_WIDTH, self.screen.get_height())
+            divider.centerx = self.screen.get_width() // 2
+            self.screen.fill(DIVIDER_COLOR, divider)
+        if present:
+            pygame.display.update(rects)
+        return rects
@@ -0,0 +1,72 @@
+from collections import deque
+
+
+class ChainResult:
+    def __init__(self, origin):
+        """
+        Initialize the ChainResult object.
+
+        :param origin: (row, col) cell of the bomb that started the chain.
+        """
+        self.origin = origin
+        self.detonated = []    # Cells whose bombs were removed, in detonation order
+        self.propagated = []   # Every cell the chain spread from, in order
+        self.decremented = []  # (cell, new_turn) for each "initial" bomb that lost a turn
+        self.broken = []       # Cells whose breakable walls were destroyed
+        self.depth = 0         # Number of chain steps away from the origin
+
+    def __repr__(self):
+        return (f"ChainResult(origin={self.origin}, detonated={len(self.detonated)}, "
+                f"decremented={len(self.decremented)}, depth={self.depth})")
+
+
+def resolve_chain(game, bomb):
+    """
+    Resolve the chain reaction started by a bomb in time linear in the affected bombs.
+
+    - "player" bombs next to an exploding cell detonate immediately.
+    - "initial" bombs lose one turn; they keep spreading the chain only if they still
+      have a neighboring bomb, and detonate once their turn reaches 0.
+
+    :param game: Reference to the GameState object.
+    :param bomb: The Bomb that exploded.
+    :return: ChainResult describing the detonation.
+    """
+    occupancy = game.occupancy
+    origin = bomb.cell
+    result = ChainResult(origin)
+
+    # Remove current bomb
+    if occupancy.bomb_at(origin) is bomb:
+        game.remove_bomb(bomb)
+    result.detonated.append(origin)
+
+    to_explode = deque([(origin, 0)])
+    processed = {origin}
+
+    while to_explode:
+        cell, depth = to_explode.popleft()
+        result.propagated.append(cell)
+        if depth > result.depth:
+            result.depth = depth
+
+        for neighbor in occupancy.neighbors(cell):
+            if neighbor in processed:
+                continue
+            other = occupancy.bomb_at(neighbor)
+            if other is None:
+                continue
+
+            if other.type == "player" or other.turn <= 0:
+                game.remove_bomb(other)
+                result.detonated.append(neighbor)
+            else:  # It's an "initial" bomb with turns left
+                game.decrement_bomb(other)
+                result.decremented.append((neighbor, other.turn))
+                if not occupancy.has_neighboring_bomb(neighbor):
+                    continue
+
+            processed.add(neighbor)
+            to_explode.append((neighbor, depth + 1))
+
+    return result
@@ -1,10 +1,10 @@
 # Game Constants
 TILE_SIZE = 40
-GRID_SZE_ROW = 15
+GRID_SZE_ROW = 15  # Default map size; the map may be larger than the window
 GRID_SZE_COL = 15
-WIDTH = 600
+WIDTH = 600  # Window size
 HEIGHT = 600
-FPS = 60
+FPS = 60  # Default frame rate; see TICK_RATE and RENDER_FPS
 PLAYER_SIZE = 40
 EXCLUDED_ROWS = {0, 1, (GRID_SZE_ROW * GRID_SZE_COL // GRID_SZE_COL - 2),
                  (GRID_SZE_ROW * GRID_SZE_COL // GRID_SZE_COL - 1)}
@@ -15,3 +15,75 @@ PROTECTED_TILES = {
     (0, 0),  # Player 1 start
     (GRID_SZE_ROW - 1, GRID_SZE_COL - 1)  # Player 2 start
 }
+EXPLOSION_DURATION = 30  # Ticks an explosion stays on screen
+EXPLOSION_POOL_SIZE = 64  # Maximum explosions alive at once
+TICK_RATE = 60  # Simulation ticks per second, independent of the display
+RENDER_FPS = 144  # Cap on rendered frames per second
+MAX_FRAME_TIME = 0.25  # Longest frame (seconds) fed into the simulation at once
+MAX_TICKS_PER_FRAME = 10  # Ticks run before a frame is drawn, even if behind
+BOT_TICK_BUDGET = 0.0005  # Seconds of pathfinding each bot may spend per tick
+
+
+class MatchConfig:
+    def __init__(self, rows=GRID_SZE_ROW, cols=GRID_SZE_COL, num_players=2, bots=(), bombs=5, turn_range=(1, 3),
+                 wall_chance=0.2, breakable_chance=0.0, fuse_ticks=None, tick_rate=TICK_RATE,
+                 explosion_duration=EXPLOSION_DURATION, explosion_pool_size=EXPLOSION_POOL_SIZE, max_ticks=None):
+        """
+        Initialize the MatchConfig object.
+
+        The settings of one match. The module constants above are the defaults;
+        a process hosting several matches gives each its own config instead of
+        changing them.
+
+        :param rows: Number of rows on the map.
+        :param cols: Number of columns on the map.
+        :param num_players: Number of players.
+        :param bots: Player numbers controlled by the computer.
+        :param bombs: Number of random initial bombs.
+        :param turn_range: Inclusive (min, max) turns of the initial bombs.
+        :param wall_chance: Chance of each cell outside the spawn corners being a wall.
+        :param breakable_chance: Chance of each other cell being a breakable wall.
+        :param fuse_ticks: Ticks per bomb fuse, or None for the bomb queue rule.
+        :param tick_rate: Simulation ticks per second.
+        :param explosion_duration: Ticks an explosion stays on screen.
+        :param explosion_pool_size: Maximum explosions alive at once.
+        :param max_ticks: Tick limit before the match is a draw, or None.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.num_players = num_players
+        self.bots = tuple(sorted(bots))
+        self.bombs = bombs
+        self.turn_range = turn_range
+        self.wall_chance = wall_chance
+        self.breakable_chance = breakable_chance
+        self.fuse_ticks = fuse_ticks
+        self.tick_rate = tick_rate
+        self.explosion_duration = explosion_duration
+        self.explosion_pool_size = explosion_pool_size
+        self.max_ticks = max_ticks
+        # Same shape as EXCLUDED_ROWS/EXCLUDED_COLS, for this map size
+        self.excluded_rows = frozenset({0, 1, rows - 2, rows - 1})
+        self.excluded_cols = frozenset({0, 1, 2, cols - 3, cols - 2, cols - 1})
+
+    @property
+    def protected_tiles(self):
+        """The players' start cells, which never hold a random bomb; PROTECTED_TILES for two players."""
+        from player import spawn_cells  # config is imported by every module, so not at the top
+        return frozenset(spawn_cells(self.rows, self.cols, self.num_players))
+
+    def create_state(self, seed=None):
+        """
+        Create a game state with these settings and its initial bombs.
+
+        :param seed: Optional seed for the game's RNG.
+        :return: A new GameState.
+        """
+        from game_state import GameState  # config is imported by every module, so not at the top
+        from bomb import Bomb
+        state = GameState(seed, config=self)
+        Bomb.add_initial_bombs(state, self.bombs, self.turn_range)
+        return state
+
+
+DEFAULT_CONFIG = MatchConfig()
@@ -0,0 +1,185 @@
+DANGER_QUEUE_DEPTH = 2  # Queued bombs treated as about to explode
+DANGER_FUSE_TICKS = 30  # With fuses, bombs detonating within this many ticks are about to explode
+
+
+class DangerMap:
+    def __init__(self, game):
+        """
+        Initialize the DangerMap object.
+
+        Tracks which cells the next chain reactions would detonate. A chain spreads
+        through orthogonally connected bombs, so bomb cells are grouped into connected
+        clusters that are updated as bombs come and go instead of being rebuilt:
+
+        - adding a bomb merges the clusters around it (smaller into larger),
+        - removing a bomb marks its cluster dirty; dirty clusters are re-flooded once,
+          the next time the danger is read, so a chain clearing a cluster bomb by
+          bomb costs one flood instead of one per bomb, and a cluster whose bombs
+          all went off is dropped without any,
+        - decrementing a bomb only changes whether its own cell can detonate.
+
+        Only detonated cells hit players: the origin of an exploding bomb, "player"
+        bombs and "initial" bombs with no turns left. The danger set is those cells
+        in clusters reached by the first DANGER_QUEUE_DEPTH queued bombs, or with
+        fuses, by the bombs detonating within DANGER_FUSE_TICKS.
+
+        :param game: Reference to the GameState object.
+        """
+        self.game = game
+        self.occupancy = game.occupancy
+        self.cluster_of = {}   # (row, col) -> cluster id
+        self.clusters = {}     # cluster id -> set of cells
+        self.dirty = set()     # Ids of clusters that lost a bomb and may have split
+        self.next_id = 0
+        self.version = 0       # Increases on every change to the bombs
+        self.cached_key = None
+        self.cached_cells = frozenset()
+        self.origins_key = None  # (tick, version) the fuse origins were found at
+        self.origins = ()
+
+        for bomb in game.bombs:
+            self.bomb_added(bomb)
+
+    def bomb_added(self, bomb):
+        """Merge the new bomb's cell with the clusters next to it."""
+        cell = bomb.cell
+        self.version += 1
+        if cell in self.cluster_of:
+            return
+        neighbor_ids = {self.cluster_of[n] for n in self.occupancy.neighbors(cell) if n in self.cluster_of}
+        if not neighbor_ids:
+            cluster_id = self.next_id
+            self.next_id += 1
+            self.clusters[cluster_id] = {cell}
+            self.cluster_of[cell] = cluster_id
+            return
+
+        # Relabel the smaller clusters into the largest one
+        cluster_id = max(neighbor_ids, key=lambda i: len(self.clusters[i]))
+        cluster = self.clusters[cluster_id]
+        for other_id in neighbor_ids:
+            if other_id != cluster_id:
+                for other_cell in self.clusters.pop(other_id):
+                    self.cluster_of[other_cell] = cluster_id
+                    cluster.add(other_cell)
+                if other_id in self.dirty:
+                    # Its cells may not be connected among themselves, so neither is the merge
+                    self.dirty.discard(other_id)
+                    self.dirty.add(cluster_id)
+        cluster.add(cell)
+        self.cluster_of[cell] = cluster_id
+
+    def bomb_removed(self, bomb):
+        """Drop the bomb's cell and mark its cluster for splitting, if anything is left of it."""
+        cell = bomb.cell
+        self.version += 1
+        cluster_id = self.cluster_of.pop(cell, None)
+        if cluster_id is None:
+            return
+        cluster = self.clusters[cluster_id]
+        cluster.discard(cell)
+        if cluster:
+            self.dirty.add(cluster_id)
+        else:
+            del self.clusters[cluster_id]
+            self.dirty.discard(cluster_id)
+
+    def split_dirty(self):
+        """Re-flood every dirty cluster once; each flood becomes a cluster."""
+        neighbors = self.occupancy.neighbors
+        while self.dirty:
+            remaining = self.clusters.pop(self.dirty.pop())
+            while remaining:
+                start = remaining.pop()
+                new_id = self.next_id
+                self.next_id += 1
+                members = {start}
+                stack = [start]
+                while stack:
+                    for neighbor in neighbors(stack.pop()):
+                        if neighbor in remaining:
+                            remaining.discard(neighbor)
+                            members.add(neighbor)
+                            stack.append(neighbor)
+                for member in members:
+                    self.cluster_of[member] = new_id
+                self.clusters[new_id] = members
+
+    def bomb_decremented(self, bomb):
+        """An "initial" bomb lost a turn, which may make its cell detonate."""
+        self.version += 1
+
+    def threat_origins(self):
+        """
+        Get the cells of the bombs that explode next.
+
+        With fuses, looking them up in the timer wheel is cached until the tick or
+        the bombs change, since every fuse is set by adding or decrementing a bomb.
+
+        :return: Tuple of (row, col) cells, in detonation order.
+        """
+        game = self.game
+        if game.fuses is not None:
+            key = (game.tick, self.version)
+            if key != self.origins_key:
+                self.origins_key = key
+                self.origins = tuple(bomb.cell for bomb in game.upcoming_bombs(DANGER_FUSE_TICKS))
+            return self.origins
+        queue = game.bomb_queue
+        return tuple(queue[i].cell for i in range(min(DANGER_QUEUE_DEPTH, len(queue))))
+
+    def danger_cells(self):
+        """
+        Get every cell the next chain reactions would detonate.
+
+        Cached until the bombs or the head of the bomb queue change.
+
+        :return: frozenset of (row, col) cells.
+        """
+        origins = self.threat_origins()
+        key = (self.version, origins)
+        if key == self.cached_key:
+            return self.cached_cells
+
+        self.split_dirty()
+        bombs = self.occupancy.bombs
+        cells = set(origins)
+        seen = set()
+        for origin in origins:
+            for cell in (origin,) + self.occupancy.neighbors(origin):
+                cluster_id = self.cluster_of.get(cell)
+                if cluster_id is None or cluster_id in seen:
+                    continue
+                seen.add(cluster_id)
+                for member in self.clusters[cluster_id]:
+                    bomb = bombs[member]
+                    if bomb.type == "player" or bomb.turn <= 0:
+                        cells.add(member)
+
+        self.cached_key = key
+        self.cached_cells = frozenset(cells)
+        return self.cached_cells
+
+    def is_dangerous(self, cell):
+        """Check if the next chain reactions would detonate a cell."""
+        return cell in self.danger_cells()
+
+    def would_endanger(self, cell):
+        """
+        Check if placing a player bomb on a cell would put it in a chain about to go off.
+
+        :param cell: (row, col) cell.
+        :return: True if the cell is, or would join a cluster that is, in danger.
+        """
+        danger = self.danger_cells()
+        if cell in danger:
+            return True
+        self.split_dirty()
+        origins = self.threat_origins()
+        for neighbor in self.occupancy.neighbors(cell):
+            cluster_id = self.cluster_of.get(neighbor)
+            if cluster_id is not None and not danger.isdisjoint(self.clusters[cluster_id]):
+                return True
+            if neighbor in origins:
+                return True
+        return False
@@ -1,22 +1,69 @@
-import pygame
+from config import TILE_SIZE, EXPLOSION_DURATION, EXPLOSION_POOL_SIZE
+
+EXPLOSION_COLOR = (255, 0, 0)
 
 
 class Explosion:
-    def __init__(self, x, y):
+    __slots__ = ("x", "y", "cells", "duration", "age", "serial")
+
+    def __init__(self, x=0, y=0, cells=(), duration=EXPLOSION_DURATION):
         """
         Initialize the Explosion object.
 
         :param x: x-coordinate of the explosion.
         :param y: y-coordinate of the explosion.
+        :param cells: (row, col) cells covered by the explosion.
+        :param duration: Number of ticks the explosion stays on screen.
+        """
+        self.reset(x, y, cells, duration)
+
+    def reset(self, x, y, cells, duration=EXPLOSION_DURATION):
+        """
+        Reuse the explosion for a new detonation.
+
+        :param x: x-coordinate of the explosion.
+        :param y: y-coordinate of the explosion.
+        :param cells: (row, col) cells covered by the explosion.
+        :param duration: Number of ticks the explosion stays on screen.
         """
         self.x = x
         self.y = y
+        self.cells = cells
+        self.duration = duration
+        self.age = 0
+        self.serial = 0  # Unique id assigned by the ExplosionPool
+
+    @property
+    def alive(self):
+        """Whether the explosion is still shown."""
+        return self.age < self.duration
+
+    @property
+    def radius(self):
+        """Radius of the blast circles, shrinking as the explosion fades."""
+        return max(1, (TILE_SIZE // 2) * (self.duration - self.age) // self.duration)
 
     def update(self):
         """
         Update the explosion state.
+
+        :return: True while the explosion is alive.
+        """
+        self.age += 1
+        return self.age < self.duration
+
+    def draw_cell(self, screen, cell, offset=(0, 0)):
+        """
+        Draw the explosion over one of its cells.
+
+        :param screen: The Pygame screen object.
+        :param cell: (row, col) tuple.
+        :param offset: (x, y) added to the cell's position, e.g. by a camera.
         """
-        pass
+        import pygame
+        row, col = cell
+        center = (col * TILE_SIZE + TILE_SIZE // 2 + offset[0], row * TILE_SIZE + TILE_SIZE // 2 + offset[1])
+        pygame.draw.circle(screen, EXPLOSION_COLOR, center, self.radius)
 
     def draw(self, screen):
         """
@@ -24,4 +71,57 @@ class Explosion:
 
         :param screen: The Pygame screen object.
         """
-        pygame.draw.circle(screen, (255, 0, 0), (self.x, self.y), 30)
+        for cell in self.cells:
+            self.draw_cell(screen, cell)
+
+
+class ExplosionPool:
+    def __init__(self, size=EXPLOSION_POOL_SIZE):
+        """
+        Initialize the ExplosionPool object.
+
+        All explosions are allocated up front. When every explosion is in use, the
+        oldest one is recycled, so memory and per-tick work stay constant.
+
+        :param size: Maximum number of explosions alive at once.
+        """
+        self.free = [Explosion() for _ in range(size)]
+        self.active = []  # Oldest first
+        self.serial = 0   # Increases with every explosion started
+
+    def acquire(self, x, y, cells, duration=EXPLOSION_DURATION):
+        """
+        Start a new explosion.
+
+        :param x: x-coordinate of the explosion.
+        :param y: y-coordinate of the explosion.
+        :param cells: (row, col) cells covered by the explosion.
+        :param duration: Number of ticks the explosion stays on screen.
+        :return: The Explosion.
+        """
+        if self.free:
+            explosion = self.free.pop()
+        else:
+            explosion = self.active.pop(0)  # Recycle the oldest explosion
+        explosion.reset(x, y, cells, duration)
+        explosion.serial = self.serial
+        self.serial += 1
+        self.active.append(explosion)
+        return explosion
+
+    def update(self):
+        """Age every active explosion and return expired ones to the pool."""
+        active = self.active
+        kept = 0
+        for explosion in active:
+            if explosion.update():
+                active[kept] = explosion
+                kept += 1
+            else:
+                self.free.append(explosion)
+        del active[kept:]
+
+    def clear(self):
+        """Return every active explosion to the pool."""
+        self.free.extend(self.active)
+        self.active.clear()
@@ -0,0 +1,695 @@
+import random
+import time
+from array import array
+from collections import deque
+from bomb import Bomb, BombPool, ON_BOARD, QUEUED
+from wall import Wall
+from tile import Tile
+from player import Player, input_keys, spawn_cells
+from bot import BotPlayer
+from occupancy import OccupancyGrid
+from explosion import ExplosionPool
+from danger_map import DangerMap
+from timer_wheel import TimerWheel
+from shared_cache import shared
+from config import TILE_SIZE, MatchConfig, DEFAULT_CONFIG
+
+INPUT_KEYS = input_keys(2)  # Keys of the two-player game, as packed by pack_input
+CHECKSUM_MASK = (1 << 64) - 1
+
+# First field of the tuples hashed into the checksum, one per kind of state
+HASH_TILE = 1
+HASH_BOMB = 2
+HASH_PLAYER = 3
+HASH_QUEUE = 4
+HASH_COUNTERS = 5
+
+SHARED_TILE_CELLS = 128 * 128  # Largest map whose tiles are built once and shared
+
+
+def tile_table(rows, cols):
+    """
+    Build every tile a map of a given size can hold.
+
+    Tiles are never modified (a changed cell gets another tile), so one table
+    per map size is shared by every game in the process.
+
+    :param rows: Number of rows on the map.
+    :param cols: Number of columns on the map.
+    :return: Nested tuples, indexed [row][col][tile_type].
+    """
+    return tuple(tuple((Tile(row, col, 0), Wall(row, col), Tile(row, col, 2)) for col in range(cols))
+                 for row in range(rows))
+
+
+def shared_tile_table(rows, cols):
+    """
+    Get the shared tile table of a map size.
+
+    :param rows: Number of rows on the map.
+    :param cols: Number of columns on the map.
+    :return: The table from tile_table(), or None for maps larger than
+             SHARED_TILE_CELLS, whose tiles are created one at a time instead.
+    """
+    if rows * cols > SHARED_TILE_CELLS:
+        return None
+    return shared.get(("tiles", rows, cols), lambda: tile_table(rows, cols))
+
+
+def new_tile(row, col, tile_type):
+    """Create the tile of one cell of a map too large for a shared tile table."""
+    return Wall(row, col) if tile_type == 1 else Tile(row, col, tile_type)
+
+
+class StateSnapshot:
+    __slots__ = ("tick", "bomb_counter", "rng_state", "pool_arrays", "pool_free", "bombs", "queue",
+                 "queue_pushed", "queue_popped", "players", "bot_plans", "explosions", "explosion_serial",
+                 "tile_history", "state_hash", "player_hashes", "danger_version")
+
+    @property
+    def nbytes(self):
+        """Bytes held by the snapshot's encoded arrays."""
+        return (sum(len(data) for data in self.pool_arrays) + len(self.pool_free) + len(self.bombs)
+                + len(self.queue) + len(self.players))
+
+
+class GameState:
+    def __init__(self, seed=None, board=None, bots=None, num_players=None, breakable_chance=None, tiles=None,
+                 fuse_ticks=None, config=None):
+        """
+        Initialize the headless game state.
+
+        - Holds players, bombs, bomb queue, tiles and explosions.
+        - Never touches the display, so it can run without a video driver.
+
+        The match settings come from the config. Without one, a MatchConfig is
+        built from the other arguments and the size of the board or tiles, with
+        the defaults from config.py for the rest.
+
+        :param seed: Optional seed for the map and bomb RNG.
+        :param board: Optional ArrayBoard to play on. Tiles are then created as views
+                      on demand and bombs are mirrored into the board's arrays.
+        :param bots: Player numbers controlled by BotPlayers instead of the input state.
+        :param num_players: Number of players, spread around the edge of the map.
+        :param breakable_chance: Chance of each free cell of a generated map holding
+                                 a breakable wall. Ignored when a board is given.
+        :param tiles: Optional 2D list of tiles to play on instead of a generated
+                      map, e.g. from a level pack. The state modifies it.
+        :param fuse_ticks: Ticks a player bomb burns before it detonates, with each
+                           turn of an "initial" bomb also lasting this long. None
+                           keeps the original rule instead: the oldest player bomb
+                           explodes once three are queued, and "initial" bombs only
+                           lose turns to neighboring explosions.
+        :param config: Optional MatchConfig. The arguments above may then be left
+                       out; any that are given must match it.
+        :raises ValueError: If an argument conflicts with the config.
+        """
+        options = {"bots": tuple(sorted(bots)) if bots is not None else None, "num_players": num_players,
+                   "breakable_chance": breakable_chance, "fuse_ticks": fuse_ticks}
+        if board is not None:
+            size = board.rows, board.cols
+        elif tiles is not None:
+            size = len(tiles), len(tiles[0]) if tiles else 0
+        else:
+            size = None
+        if config is None:
+            rows, cols = size if size is not None else (DEFAULT_CONFIG.rows, DEFAULT_CONFIG.cols)
+            config = MatchConfig(rows, cols, **{name: value for name, value in options.items() if value is not None})
+        else:
+            for name, value in options.items():
+                if value is not None and value != getattr(config, name):
+                    raise ValueError(f"{name}={value!r} conflicts with the config's {getattr(config, name)!r}")
+            if size is not None and size != (config.rows, config.cols):
+                raise ValueError(f"a {size[0]}x{size[1]} map does not match the config's "
+                                 f"{config.rows}x{config.cols}")
+        if config.fuse_ticks is not None and config.fuse_ticks < 1:
+            raise ValueError(f"fuse_ticks must be at least 1, not {config.fuse_ticks}")
+        self.config = config
+        self.rng = random.Random(seed)
+        self.tick = 0
+        self.events = []
+        self.board = board
+        if board is None:
+            self.tiles = tiles if tiles is not None else GameState.create_map(self.rng, config.breakable_chance,
+                                                                                      config)
+            self.occupancy = OccupancyGrid.from_tiles(self.tiles)
+        else:
+            self.tiles = board.tiles
+            self.occupancy = OccupancyGrid.from_board(board)
+        # Checksum of the state, updated by every change instead of being recomputed
+        self.state_hash = GameState.tile_hash(self.occupancy)
+        self.tile_history = None  # (depth, cell, old type, new type, parent) of the last tile change
+        self.bomb_pool = BombPool(self)
+        self.bombs = {}  # Bomb -> None, used as an insertion-ordered set
+        self.bomb_queue = deque()
+        self.queue_pushed = 0  # Bombs ever queued / popped, numbering queue positions for the checksum
+        self.queue_popped = 0
+        self.bomb_counter = 0
+        self.fuse_ticks = config.fuse_ticks
+        self.fuses = TimerWheel() if config.fuse_ticks is not None else None  # Bombs by detonation tick
+        self.explosion_pool = ExplosionPool(config.explosion_pool_size)
+        self.explosions = self.explosion_pool.active
+        self.danger_map = DangerMap(self) if config.bots else None  # Only bots read it
+
+        rows, cols, num_players = self.occupancy.rows, self.occupancy.cols, config.num_players
+        self.spawn_cells = shared.get(("spawn_cells", rows, cols, num_players),
+                                      lambda: tuple(spawn_cells(rows, cols, num_players)))
+        for cell in self.spawn_cells:
+            # Players may start away from the cleared corners; give them room to move
+            for clear_cell in (cell,) + self.occupancy.neighbors(cell):
+                if self.occupancy.is_wall(clear_cell):
+                    self.clear_tile(clear_cell)
+        self.players = [BotPlayer(self, num) if num in config.bots else Player(self, num)
+                        for num in range(1, num_players + 1)]
+
+        for player in self.players:
+            self.occupancy.add_player(player, player.cell)
+        self.player_hashes = [GameState.player_hash(player) for player in self.players]
+        for player_hash in self.player_hashes:
+            self.state_hash ^= player_hash
+
+    @staticmethod
+    def create_map(rng=random, breakable_chance=0.0, config=DEFAULT_CONFIG):
+        """
+        Generate the game map with a mix of walls, breakable walls and empty tiles.
+
+        :param rng: Random number generator used to place walls.
+        :param breakable_chance: Chance of each cell that is not a wall being a
+                                 breakable wall. At 0 the map matches older versions.
+        :param config: MatchConfig with the map size, wall chance and spawn area.
+        :return: A 2D list representing the map tiles.
+        """
+        rows, cols = config.rows, config.cols
+        table = shared_tile_table(rows, cols)
+        excluded_rows, excluded_cols = config.excluded_rows, config.excluded_cols
+        wall_chance = config.wall_chance
+        tiles = []
+        for row in range(rows):
+            row_tiles = []
+            for col in range(cols):
+                if row in excluded_rows and col in excluded_cols:
+                    tile_type = 0  # 0 = Empty tile
+                elif rng.random() < wall_chance:  # 20% chance to be a wall by default
+                    tile_type = 1
+                elif breakable_chance and rng.random() < breakable_chance:
+                    tile_type = 2  # 2 = Breakable tile
+                else:
+                    tile_type = 0
+                row_tiles.append(table[row][col][tile_type] if table is not None else new_tile(row, col, tile_type))
+            tiles.append(row_tiles)
+        return tiles
+
+    def set_tile_type(self, cell, tile_type):
+        """
+        Change the type of one cell in the tiles, the board arrays and the occupancy grid.
+
+        :param cell: (row, col) tuple.
+        :param tile_type: 0 = Empty, 1 = Wall, 2 = Breakable.
+        """
+        row, col = cell
+        if self.board is None:
+            table = shared_tile_table(self.occupancy.rows, self.occupancy.cols)
+            self.tiles[row][col] = table[row][col][tile_type] if table is not None else new_tile(row, col, tile_type)
+        else:
+            self.board.tile_types[cell] = tile_type
+        self.occupancy.remove_wall(cell)
+        if tile_type == 1:
+            self.occupancy.add_wall(cell)
+        elif tile_type == 2:
+            self.occupancy.add_breakable(cell)
+
+    def change_tile(self, cell, tile_type):
+        """
+        Change the type of one cell during a match.
+
+        Only the cell itself is updated, in the tiles, the board arrays and the
+        occupancy grid, and the change is recorded in the checksum and the tile
+        history; a "tile_changed" event tells renderers to redraw it.
+
+        :param cell: (row, col) tuple.
+        :param tile_type: 0 = Empty, 1 = Wall, 2 = Breakable.
+        """
+        row, col = cell
+        old_type = 2 if self.occupancy.is_breakable(cell) else 1 if self.occupancy.is_wall(cell) else 0
+        self.set_tile_type(cell, tile_type)
+        if old_type:
+            self.state_hash ^= hash((HASH_TILE, row, col, old_type))
+        if tile_type:
+            self.state_hash ^= hash((HASH_TILE, row, col, tile_type))
+        depth = self.tile_history[0] + 1 if self.tile_history is not None else 1
+        self.tile_history = (depth, cell, old_type, tile_type, self.tile_history)
+        self.emit("tile_changed", row=row, col=col, tile_type=tile_type)
+
+    def clear_tile(self, cell):
+        """
+        Turn a cell into an empty tile.
+
+        :param cell: (row, col) tuple.
+        """
+        self.change_tile(cell, 0)  # 0 = Empty tile
+
+    def break_walls(self, cells):
+        """
+        Destroy the breakable walls next to exploded cells.
+
+        :param cells: (row, col) cells that exploded.
+        :return: List of cells whose walls were destroyed.
+        """
+        occupancy = self.occupancy
+        broken = []
+        for cell in cells:
+            for neighbor in occupancy.neighbors(cell):
+                if occupancy.is_breakable(neighbor):
+                    self.clear_tile(neighbor)
+                    broken.append(neighbor)
+        return broken
+
+    def add_bomb(self, bomb):
+        """
+        Add a bomb to the board and the occupancy grid.
+
+        :param bomb: The Bomb to add.
+        """
+        self.bombs[bomb] = None
+        if self.fuses is not None:
+            turns = 1 if bomb.type == "player" else max(bomb.turn, 1)
+            self.schedule_bomb(bomb, self.tick + turns * self.fuse_ticks)
+        self.state_hash ^= GameState.bomb_hash(bomb)
+        self.bomb_pool.set_flag(bomb.index, ON_BOARD)
+        self.occupancy.add_bomb(bomb)
+        if self.board is not None:
+            self.board.set_bomb(bomb.cell, bomb.type, bomb.turn)
+        if self.danger_map is not None:
+            self.danger_map.bomb_added(bomb)
+
+    def remove_bomb(self, bomb):
+        """
+        Remove a bomb from the board and the occupancy grid.
+
+        :param bomb: The Bomb to remove.
+        """
+        del self.bombs[bomb]
+        self.state_hash ^= GameState.bomb_hash(bomb)
+        self.occupancy.remove_bomb(bomb)
+        if self.board is not None:
+            self.board.clear_bomb(bomb.cell)
+        if self.danger_map is not None:
+            self.danger_map.bomb_removed(bomb)
+        self.bomb_pool.clear_flag(bomb.index, ON_BOARD)
+
+    def queue_bomb(self, bomb):
+        """
+        Add a player bomb to the queue of bombs waiting to explode.
+
+        With fuses, the bomb's fuse was already lit by add_bomb and nothing is queued.
+
+        :param bomb: The Bomb to queue.
+        """
+        if self.fuses is not None:
+            return
+        self.bomb_queue.append(bomb)
+        self.state_hash ^= hash((HASH_QUEUE, self.queue_pushed) + bomb.cell)
+        self.queue_pushed += 1
+        self.bomb_pool.set_flag(bomb.index, QUEUED)
+
+    def decrement_bomb(self, bomb):
+        """
+        Take one turn off an "initial" bomb.
+
+        :param bomb: The Bomb to update.
+        """
+        self.state_hash ^= GameState.bomb_hash(bomb)
+        bomb.turn -= 1
+        if self.fuses is not None:
+            # The remaining turns now burn from this tick, unless the fuse was already shorter
+            fuse = self.tick + max(bomb.turn, 1) * self.fuse_ticks
+            if fuse < bomb.fuse:
+                self.schedule_bomb(bomb, fuse)
+        self.state_hash ^= GameState.bomb_hash(bomb)
+        if self.board is not None:
+            self.board.bomb_turns[bomb.cell] = bomb.turn
+        if self.danger_map is not None:
+            self.danger_map.bomb_decremented(bomb)
+
+    def schedule_bomb(self, bomb, fuse):
+        """
+        Set the tick a bomb detonates at.
+
+        A bomb whose fuse changes keeps its earlier entry in the timer wheel;
+        expired_bombs() skips entries that no longer match the bomb.
+
+        :param bomb: The Bomb, on the board.
+        :param fuse: Detonation tick.
+        """
+        self.bomb_pool.fuses[bomb.index] = fuse
+        self.fuses.schedule(fuse, bomb)
+
+    def expired_bombs(self, tick):
+        """
+        Remove the bombs whose fuse runs out by a tick from the timer wheel.
+
+        :param tick: Last tick to expire.
+        :return: List of Bombs still on the board, in detonation order.
+        """
+        bombs = self.bombs
+        fuses = self.bomb_pool.fuses
+        expired = [bomb for fuse, bomb in self.fuses.advance(tick) if bomb in bombs and fuses[bomb.index] == fuse]
+        # Bombs due at the same tick go off in slot order, which a restored state shares
+        expired.sort(key=lambda bomb: (fuses[bomb.index], bomb.index))
+        return expired
+
+    def upcoming_bombs(self, ticks):
+        """
+        Get the bombs whose fuse runs out within a number of ticks.
+
+        :param ticks: Ticks to look ahead.
+        :return: List of Bombs, in detonation order.
+        """
+        bombs = self.bombs
+        fuses = self.bomb_pool.fuses
+        upcoming = [bomb for fuse, bomb in self.fuses.peek(self.tick + ticks)
+                    if bomb in bombs and fuses[bomb.index] == fuse]
+        upcoming.sort(key=lambda bomb: (fuses[bomb.index], bomb.index))
+        return upcoming
+
+    def bomb_layout(self):
+        """
+        Describe the bombs on the board, e.g. to record or restore a setup.
+
+        :return: List of (row, col, turn, bomb_type) tuples.
+        """
+        return [(bomb.cell[0], bomb.cell[1], bomb.turn, bomb.type) for bomb in self.bombs]
+
+    def load_bomb_layout(self, layout):
+        """
+        Place bombs from a layout produced by bomb_layout().
+
+        :param layout: Iterable of (row, col, turn, bomb_type) tuples.
+        """
+        for row, col, turn, bomb_type in layout:
+            self.add_bomb(Bomb(col * TILE_SIZE, row * TILE_SIZE, self, turn=turn, bomb_type=bomb_type))
+
+    def add_explosion(self, x, y, cells):
+        """
+        Start a timed explosion effect from the explosion pool.
+
+        :param x: x-coordinate of the bomb that exploded.
+        :param y: y-coordinate of the bomb that exploded.
+        :param cells: (row, col) cells covered by the explosion.
+        :return: The Explosion.
+        """
+        return self.explosion_pool.acquire(x, y, cells, self.config.explosion_duration)
+
+    def emit(self, event_type, **data):
+        """
+        Record an event for the current step.
+
+        :param event_type: Name of the event (e.g. 'bomb_placed', 'explosion').
+        :param data: Extra fields stored on the event.
+        """
+        data["type"] = event_type
+        data["tick"] = self.tick
+        self.events.append(data)
+
+    def step(self, input_state):
+        """
+        Advance the simulation by one tick.
+
+        - Updates players based on the given input state.
+        - Processes bomb explosions using the bomb queue, or the fuses that run out.
+        - Ages ongoing explosions and removes expired ones.
+
+        :param input_state: Dictionary mapping the p<n>_* actions to booleans; missing
+                            keys count as released.
+        :return: List of events produced during this tick.
+        """
+        self.events = []
+
+        for player in self.players:
+            player.update(input_state)
+
+        if self.fuses is not None:
+            for bomb in self.expired_bombs(self.tick):
+                if bomb in self.bombs:  # An earlier bomb of this tick may have set it off
+                    bomb.explode()
+        elif len(self.bomb_queue) >= 3:
+            first_bomb = self.bomb_queue.popleft()
+            self.state_hash ^= hash((HASH_QUEUE, self.queue_popped) + first_bomb.cell)
+            self.queue_popped += 1
+            first_bomb.explode()
+            self.bomb_pool.clear_flag(first_bomb.index, QUEUED)
+
+        self.explosion_pool.update()
+
+        # Players move every tick, so their part of the checksum is refreshed here
+        player_hashes = self.player_hashes
+        for i, player in enumerate(self.players):
+            player_hash = GameState.player_hash(player)
+            if player_hash != player_hashes[i]:
+                self.state_hash ^= player_hashes[i] ^ player_hash
+                player_hashes[i] = player_hash
+
+        self.tick += 1
+        return self.events
+
+    @staticmethod
+    def tile_hash(occupancy):
+        """Hash every wall of the map, the starting point of the checksum."""
+        state_hash = 0
+        for row, col in occupancy.walls:
+            state_hash ^= hash((HASH_TILE, row, col, 2 if (row, col) in occupancy.breakables else 1))
+        return state_hash
+
+    @staticmethod
+    def bomb_hash(bomb):
+        """Hash one bomb's cell, type and turns."""
+        pool = bomb.pool
+        index = bomb.index
+        return hash((HASH_BOMB, pool.rows[index], pool.cols[index], pool.types[index], pool.turns[index],
+                     pool.fuses[index]))
+
+    @staticmethod
+    def player_hash(player):
+        """Hash one player's position, target and the cell it is leaving."""
+        return hash((HASH_PLAYER, player.player_num, player.x, player.y, player.target_x, player.target_y)
+                    + player.origin_cell)
+
+    def checksum(self):
+        """
+        Get a 64-bit checksum of the simulation state.
+
+        The checksum is kept up to date by every change to the map, bombs, bomb
+        queue and players, so reading it costs the same whatever the board size.
+        Two states that have run the same inputs from the same start have the same
+        checksum, in any process, so it can be compared between a client and a
+        server or against a replay to find the exact tick they diverged.
+
+        :return: Integer checksum.
+        """
+        counters = hash((HASH_COUNTERS, self.tick, self.bomb_counter, len(self.bomb_queue)))
+        return (self.state_hash ^ counters) & CHECKSUM_MASK
+
+    def full_checksum(self):
+        """
+        Recompute checksum() from scratch, e.g. to check the incremental one.
+
+        :return: Integer checksum.
+        """
+        state_hash = GameState.tile_hash(self.occupancy)
+        for bomb in self.bombs:
+            state_hash ^= GameState.bomb_hash(bomb)
+        for position, bomb in enumerate(self.bomb_queue, self.queue_popped):
+            state_hash ^= hash((HASH_QUEUE, position) + bomb.cell)
+        for player in self.players:
+            state_hash ^= GameState.player_hash(player)
+        counters = hash((HASH_COUNTERS, self.tick, self.bomb_counter, len(self.bomb_queue)))
+        return (state_hash ^ counters) & CHECKSUM_MASK
+
+    def snapshot(self):
+        """
+        Capture the whole simulation state.
+
+        Bombs are stored as copies of the bomb pool's arrays and every other part
+        as small tuples. Map changes are shared with the state through its tile
+        history, so a snapshot costs the same whatever the map size.
+
+        :return: A StateSnapshot for restore().
+        """
+        pool = self.bomb_pool
+        snapshot = StateSnapshot()
+        snapshot.tick = self.tick
+        snapshot.bomb_counter = self.bomb_counter
+        snapshot.rng_state = self.rng.getstate()
+        snapshot.pool_arrays = (pool.rows.tobytes(), pool.cols.tobytes(), pool.turns.tobytes(),
+                                pool.types.tobytes(), pool.flags.tobytes(), pool.fuses.tobytes())
+        snapshot.pool_free = array("I", pool.free).tobytes()
+        snapshot.bombs = array("I", [bomb.index for bomb in self.bombs]).tobytes()
+        snapshot.queue = array("I", [bomb.index for bomb in self.bomb_queue]).tobytes()
+        snapshot.queue_pushed = self.queue_pushed
+        snapshot.queue_popped = self.queue_popped
+        positions = array("i")
+        for player in self.players:
+            positions.extend((player.x, player.y, player.target_x, player.target_y,
+                              player.prev_x, player.prev_y) + player.origin_cell)
+        snapshot.players = positions.tobytes()
+        snapshot.bot_plans = tuple((player.decision, tuple(player.path), player.plan_key)
+                                   if isinstance(player, BotPlayer) else None for player in self.players)
+        snapshot.explosions = tuple((e.x, e.y, e.cells, e.duration, e.age, e.serial) for e in self.explosions)
+        snapshot.explosion_serial = self.explosion_pool.serial
+        snapshot.tile_history = self.tile_history
+        snapshot.state_hash = self.state_hash
+        snapshot.player_hashes = tuple(self.player_hashes)
+        snapshot.danger_version = self.danger_map.version if self.danger_map is not None else 0
+        return snapshot
+
+    def restore(self, snapshot):
+        """
+        Put the state back to a snapshot taken by snapshot() on this state.
+
+        Map cells changed since (or before) the snapshot are reverted one by one,
+        walking the tile history back to the point both share.
+
+        :param snapshot: The StateSnapshot.
+        :return: List of "tile_changed" events for the cells that were reverted, so
+                 renderers can redraw them.
+        """
+        self.events = []
+
+        # Map: undo this state's changes back to the common history, then redo the snapshot's
+        current, target = self.tile_history, snapshot.tile_history
+        undo, redo = [], []
+        while current is not target:
+            if target is None or (current is not None and current[0] >= target[0]):
+                undo.append(current)
+                current = current[4]
+            else:
+                redo.append(target)
+                target = target[4]
+        for _, cell, old_type, _, _ in undo:
+            self.set_tile_type(cell, old_type)
+        for _, cell, _, new_type, _ in reversed(redo):
+            self.set_tile_type(cell, new_type)
+        for cell in {node[1] for node in undo + redo}:
+            tile_type = self.tiles[cell[0]][cell[1]].tile_type
+            self.emit("tile_changed", row=cell[0], col=cell[1], tile_type=tile_type)
+        self.tile_history = snapshot.tile_history
+
+        # Bombs: the pool's arrays, then one handle per live slot
+        pool = self.bomb_pool
+        arrays = [array(typecode) for typecode in "HHbBBI"]
+        for arr, data in zip(arrays, snapshot.pool_arrays):
+            arr.frombytes(data)
+        pool.rows, pool.cols, pool.turns, pool.types, pool.flags, pool.fuses = arrays
+        free = array("I")
+        free.frombytes(snapshot.pool_free)
+        pool.free = free.tolist()
+        handles = {}
+
+        def handle(index):
+            bomb = handles.get(index)
+            if bomb is None:
+                bomb = handles[index] = Bomb.from_slot(pool, index)
+            return bomb
+
+        indexes = array("I")
+        indexes.frombytes(snapshot.bombs)
+        self.bombs = dict.fromkeys(handle(index) for index in indexes)
+        indexes = array("I")
+        indexes.frombytes(snapshot.queue)
+        self.bomb_queue = deque(handle(index) for index in indexes)
+        self.queue_pushed = snapshot.queue_pushed
+        self.queue_popped = snapshot.queue_popped
+        self.occupancy.bombs = {bomb.cell: bomb for bomb in self.bombs}
+        if self.board is not None:
+            self.board.bomb_types[:] = 0
+            self.board.bomb_turns[:] = 0
+            for bomb in self.bombs:
+                self.board.set_bomb(bomb.cell, bomb.type, bomb.turn)
+
+        # Players, registered on the cell they are leaving and the cell they move to
+        positions = array("i")
+        positions.frombytes(snapshot.players)
+        self.occupancy.players = {}
+        for i, player in enumerate(self.players):
+            (player.x, player.y, player.target_x, player.target_y,
+             player.prev_x, player.prev_y, origin_row, origin_col) = positions[i * 8:i * 8 + 8]
+            player.origin_cell = (origin_row, origin_col)
+            self.occupancy.add_player(player, player.origin_cell)
+            if player.cell != player.origin_cell:
+                self.occupancy.add_player(player, player.cell)
+            plan = snapshot.bot_plans[i]
+            if plan is not None:
+                player.decision, path, player.plan_key = plan
+                player.path = list(path)
+                player.search = None
+
+        self.explosion_pool.clear()
+        for x, y, cells, duration, age, serial in snapshot.explosions:
+            explosion = self.explosion_pool.acquire(x, y, cells, duration)
+            explosion.age = age
+            explosion.serial = serial
+        self.explosion_pool.serial = snapshot.explosion_serial
+
+        if self.danger_map is not None:
+            self.danger_map = DangerMap(self)
+            self.danger_map.version = snapshot.danger_version
+
+        self.tick = snapshot.tick
+        if self.fuses is not None:
+            # The wheel is rebuilt from the bombs' fuses, dropping entries that no longer matter
+            self.fuses = TimerWheel(self.tick)
+            for bomb in self.bombs:
+                self.fuses.schedule(pool.fuses[bomb.index], bomb)
+        self.bomb_counter = snapshot.bomb_counter
+        self.rng.setstate(snapshot.rng_state)
+        self.state_hash = snapshot.state_hash
+        self.player_hashes = list(snapshot.player_hashes)
+        return self.events
+
+
+def pack_input(input_state):
+    """
+    Pack an input state into a bit field, one bit per INPUT_KEYS entry.
+
+    :param input_state: Dictionary mapping the p1_*/p2_* actions to booleans.
+    :return: Integer that fits in two bytes.
+    """
+    bits = 0
+    for i, key in enumerate(INPUT_KEYS):
+        if input_state[key]:
+            bits |= 1 << i
+    return bits
+
+
+def unpack_input(bits):
+    """
+    Unpack a bit field produced by pack_input().
+
+    :param bits: Packed input.
+    :return: Dictionary mapping every input key to a boolean.
+    """
+    return {key: bool(bits >> i & 1) for i, key in enumerate(INPUT_KEYS)}
+
+
+def random_input_state(rng, press_chance=0.2, keys=INPUT_KEYS):
+    """
+    Build a random input state, used to drive headless matches.
+
+    :param rng: Random number generator.
+    :param press_chance: Chance of each key being pressed.
+    :param keys: Keys to include, e.g. input_keys(8) for eight players.
+    :return: Dictionary mapping every key to a boolean.
+    """
+    return {key: rng.random() < press_chance for key in keys}
+
+
+if __name__ == "__main__":
+    state = GameState(seed=0)
+    Bomb.add_initial_bombs(state, 5)
+    input_rng = random.Random(1)
+    ticks = 20000
+    start = time.perf_counter()
+    for _ in range(ticks):
+        state.step(random_input_state(input_rng))
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks in {elapsed:.3f}s ({ticks / elapsed:.0f} ticks/sec)")
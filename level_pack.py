@@ -0,0 +1,235 @@
+import argparse
+import mmap
+import struct
+import time
+from bomb import Bomb, BOMB_TYPE_CODES, BOMB_TYPE_NAMES
+from game_state import GameState
+from tile import Tile
+from wall import Wall
+
+MAGIC = b"BMLV"
+VERSION = 1
+HEADER = struct.Struct("<4sHIQ")  # magic, version, level count, offset of the index
+OFFSET = struct.Struct("<Q")      # Start of a level, from the start of the file
+LEVEL = struct.Struct("<HHH")     # rows, cols, bomb count; then one byte per tile, then the bombs
+BOMB = struct.Struct("<HHBB")     # row, col, turn, type
+TILE_TYPES = (0, 1, 2)            # Empty, Wall, Breakable
+
+
+class Level:
+    def __init__(self, rows, cols, tiles, bombs=()):
+        """
+        Initialize the Level object.
+
+        A level is a fixed map and bomb layout, so a match can start without
+        generating anything.
+
+        :param rows: Number of rows on the map.
+        :param cols: Number of columns on the map.
+        :param tiles: Tile types, one byte per cell in row-major order.
+        :param bombs: Initial bomb layout, as (row, col, turn, bomb_type) tuples.
+        """
+        if len(tiles) != rows * cols:
+            raise ValueError(f"a {rows}x{cols} level needs {rows * cols} tiles, not {len(tiles)}")
+        self.rows = rows
+        self.cols = cols
+        self.tiles = bytes(tiles)
+        self.bombs = list(bombs)
+
+    @staticmethod
+    def from_state(state):
+        """
+        Capture the map and bombs of a game state, e.g. right after bombs were placed.
+
+        :param state: The GameState.
+        :return: A new Level.
+        """
+        rows, cols = state.occupancy.rows, state.occupancy.cols
+        if state.board is not None:
+            tiles = state.board.tile_types.tobytes()
+        else:
+            tiles = bytes(tile.tile_type for row in state.tiles for tile in row)
+        return Level(rows, cols, tiles, state.bomb_layout())
+
+    def pack(self):
+        """
+        Encode the level.
+
+        :return: Bytes of one level record.
+        """
+        parts = [LEVEL.pack(self.rows, self.cols, len(self.bombs)), self.tiles]
+        for row, col, turn, bomb_type in self.bombs:
+            parts.append(BOMB.pack(row, col, turn, BOMB_TYPE_CODES[bomb_type]))
+        return b"".join(parts)
+
+    @staticmethod
+    def unpack(data, offset=0):
+        """
+        Decode a level record produced by pack().
+
+        :param data: Buffer holding the record (bytes, or a memory map).
+        :param offset: Start of the record in the buffer.
+        :return: A new Level.
+        """
+        rows, cols, bomb_count = LEVEL.unpack_from(data, offset)
+        offset += LEVEL.size
+        tiles = data[offset:offset + rows * cols]
+        if tiles.translate(None, bytes(TILE_TYPES)):
+            raise ValueError("level holds an unknown tile type")
+        offset += rows * cols
+        bombs = []
+        for _ in range(bomb_count):
+            row, col, turn, type_code = BOMB.unpack_from(data, offset)
+            bombs.append((row, col, turn, BOMB_TYPE_NAMES[type_code]))
+            offset += BOMB.size
+        return Level(rows, cols, tiles, bombs)
+
+    def tile_grid(self):
+        """
+        Build the 2D Tile/Wall list of the map.
+
+        :return: A new 2D list of tiles.
+        """
+        tiles = self.tiles
+        cols = self.cols
+        return [[Wall(row, col) if tiles[row * cols + col] == 1 else Tile(row, col, tiles[row * cols + col])
+                 for col in range(cols)] for row in range(self.rows)]
+
+    def create_state(self, seed=None, **options):
+        """
+        Create a game state playing this level.
+
+        :param seed: Optional seed for the game's RNG.
+        :param options: Other GameState options, e.g. bots or num_players.
+        :return: A new GameState with the level's map and bombs.
+        """
+        state = GameState(seed, tiles=self.tile_grid(), **options)
+        state.load_bomb_layout(self.bombs)
+        return state
+
+
+class LevelPack:
+    def __init__(self, path):
+        """
+        Initialize the LevelPack object.
+
+        Opens a level pack through a memory map. Only the header is read up front;
+        a level is decoded when it is requested, by looking up its offset in the
+        pack's index, so picking any level costs the same whatever the pack size.
+
+        :param path: Level pack file path.
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.index_offset = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} level pack")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        """
+        Load one level.
+
+        :param index: Level index; negative values count from the end.
+        :return: The Level.
+        """
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"{self.path} has {self.count} levels, no level {index}")
+        (offset,) = OFFSET.unpack_from(self.data, self.index_offset + index * OFFSET.size)
+        return Level.unpack(self.data, offset)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def close(self):
+        """Release the memory map and the file."""
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def write(path, levels):
+        """
+        Write a level pack.
+
+        Levels are written as they are produced, so a generator of thousands of
+        levels is never held in memory at once. The offset index follows the
+        levels, and the header is rewritten at the end to point at it.
+
+        :param path: Output file path.
+        :param levels: Iterable of Levels.
+        :return: Number of levels written.
+        """
+        offsets = []
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, 0, 0))  # Placeholder until the index is written
+            for level in levels:
+                offsets.append(file.tell())
+                file.write(level.pack())
+            index_offset = file.tell()
+            file.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+            file.seek(0)
+            file.write(HEADER.pack(MAGIC, VERSION, len(offsets), index_offset))
+        return len(offsets)
+
+
+def generate_levels(count, seed=0, bombs=5, breakable_chance=0.0):
+    """
+    Generate random levels, as a match started with the same seed would.
+
+    :param count: Number of levels.
+    :param seed: Seed of the first level; each next level uses the next seed.
+    :param bombs: Initial bombs per level.
+    :param breakable_chance: Chance of each free cell holding a breakable wall.
+    :return: Generator of Levels.
+    """
+    for level_seed in range(seed, seed + count):
+        state = GameState(level_seed, breakable_chance=breakable_chance)
+        Bomb.add_initial_bombs(state, bombs)
+        yield Level.from_state(state)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bake Bomberman levels into a level pack.")
+    parser.add_argument("path", help="Level pack file to write.")
+    parser.add_argument("--count", type=int, default=1000, help="Random levels to generate.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first random level.")
+    parser.add_argument("--bombs", type=int, default=5, help="Initial bombs per random level.")
+    parser.add_argument("--breakable", type=float, default=0.0, metavar="CHANCE",
+                        help="Chance of each free cell holding a breakable wall.")
+    parser.add_argument("--include", nargs="+", default=[], metavar="PACK",
+                        help="Copy the levels of these packs (e.g. saved manual layouts) first.")
+    args = parser.parse_args(argv)
+
+    def levels():
+        for include in args.include:
+            with LevelPack(include) as pack:
+                yield from pack
+        yield from generate_levels(args.count, args.seed, args.bombs, args.breakable)
+
+    start = time.perf_counter()
+    count = LevelPack.write(args.path, levels())
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with LevelPack(args.path) as pack:
+        pack[len(pack) // 2]
+    lookup = time.perf_counter() - start
+    print(f"wrote {count} levels to {args.path} in {elapsed:.3f}s; "
+          f"opening it and loading a level takes {lookup * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
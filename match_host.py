@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import gc
+import heapq
+import random
+import time
+import tracemalloc
+from array import array
+from collections import deque
+from game_state import random_input_state
+from player import input_keys
+from shared_cache import shared
+from config import MatchConfig
+
+LATENCY_SAMPLES = 600    # Ticks of latency kept per match (10 seconds at 60 ticks per second)
+TIME_SLICE = 0.005       # Seconds of ticking before the scheduler yields to other tasks
+MAX_CATCHUP_TICKS = 10   # Ticks a match may fall behind before it skips ahead
+
+
+class HostedMatch:
+    def __init__(self, match_id, config, seed, press_chance=0.2):
+        """
+        Initialize the HostedMatch object.
+
+        A headless match with its own settings, game state and input RNG. Players
+        that are not bots press random keys, as in batch_runner.
+
+        :param match_id: Id of the match on the host.
+        :param config: The match's MatchConfig.
+        :param seed: Seed for the map, bombs and inputs.
+        :param press_chance: Chance of each key being pressed on a tick.
+        """
+        self.match_id = match_id
+        self.config = config
+        self.seed = seed
+        self.state = config.create_state(seed)
+        self.input_rng = random.Random(seed * 7919 + 1)
+        self.keys = input_keys(config.num_players)
+        self.press_chance = press_chance
+        self.tick_interval = 1 / config.tick_rate
+        self.next_tick = 0.0      # Loop time the next tick is due, set by the host
+        self.winner = None
+        self.latencies = array("d", [0.0]) * LATENCY_SAMPLES  # Ring of the latest tick latencies
+        self.tick_costs = 0.0     # Seconds spent ticking
+        self.ticks_run = 0
+        self.ticks_skipped = 0
+        self.max_latency = 0.0
+        self.played = 0           # Matches finished in this slot, counting rematches
+
+    @property
+    def finished(self):
+        return self.winner is not None
+
+    def tick(self):
+        """
+        Run one simulation tick.
+
+        The match ends when a player stands in a detonated cell or after the
+        config's max_ticks.
+
+        :return: True once the match is over.
+        """
+        hit = set()
+        for event in self.state.step(random_input_state(self.input_rng, self.press_chance, self.keys)):
+            if event["type"] == "player_hit":
+                hit.add(event["player"])
+        if hit:
+            survivors = [player.player_num for player in self.state.players if player.player_num not in hit]
+            self.winner = survivors[0] if len(survivors) == 1 else 0
+        elif self.config.max_ticks is not None and self.state.tick >= self.config.max_ticks:
+            self.winner = 0
+        return self.finished
+
+    def rematch(self):
+        """Start a new match with the same settings and the next seed, keeping the statistics."""
+        self.played += 1
+        self.seed += 1
+        self.state = self.config.create_state(self.seed)
+        self.input_rng = random.Random(self.seed * 7919 + 1)
+        self.winner = None
+
+    def record(self, latency, cost):
+        """
+        Record how late a tick started and how long it took.
+
+        :param latency: Seconds between the tick being due and it starting.
+        :param cost: Seconds the tick took.
+        """
+        self.latencies[self.ticks_run % LATENCY_SAMPLES] = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.tick_costs += cost
+        self.ticks_run += 1
+
+    def stats(self):
+        """
+        Summarise the match's latency.
+
+        :return: Dictionary with the ticks run and skipped, the p50/p99/max tick
+                 latency over the last LATENCY_SAMPLES ticks and the mean tick cost,
+                 in milliseconds.
+        """
+        samples = sorted(self.latencies[:min(self.ticks_run, LATENCY_SAMPLES)])
+
+        def percentile(fraction):
+            return samples[min(len(samples) - 1, int(fraction * len(samples)))] * 1000 if samples else 0.0
+
+        return {
+            "match": self.match_id,
+            "size": f"{self.config.rows}x{self.config.cols}",
+            "players": self.config.num_players,
+            "ticks": self.ticks_run,
+            "played": self.played + self.finished,
+            "skipped": self.ticks_skipped,
+            "p50_ms": round(percentile(0.50), 3),
+            "p99_ms": round(percentile(0.99), 3),
+            "max_ms": round(self.max_latency * 1000, 3),
+            "tick_cost_ms": round(self.tick_costs / self.ticks_run * 1000, 4) if self.ticks_run else 0.0,
+            "winner": self.winner,
+        }
+
+
+class MatchHost:
+    def __init__(self, rematch=False):
+        """
+        Initialize the MatchHost object.
+
+        Runs many matches in one process on one event loop. Each match keeps its
+        own config and RNG; board-size tables come from the shared cache, and the
+        scheduler ticks every match at its own tick rate.
+
+        :param rematch: Start a new match in a match's place whenever it ends,
+                        so the host keeps the same load until run() stops.
+        """
+        self.rematch = rematch
+        self.matches = []
+        self.running = []  # Heap of (next tick time, match id, match)
+        self.rematches = deque()  # Finished matches waiting for their next state to be built
+        self.next_id = 1
+
+    def add_match(self, config, seed=None, press_chance=0.2):
+        """
+        Create a match. It starts ticking when run() starts, or straight away if
+        run() is already going.
+
+        :param config: The match's MatchConfig.
+        :param seed: Seed for the match; None picks a random one.
+        :param press_chance: Chance of each key being pressed on a tick.
+        :return: The HostedMatch.
+        """
+        seed = seed if seed is not None else random.getrandbits(32)
+        match = HostedMatch(self.next_id, config, seed, press_chance)
+        self.next_id += 1
+        self.matches.append(match)
+        try:
+            match.next_tick = asyncio.get_running_loop().time()
+            heapq.heappush(self.running, (match.next_tick, match.match_id, match))
+        except RuntimeError:
+            pass  # No loop yet; run() schedules it
+        return match
+
+    async def run(self, duration=None):
+        """
+        Tick the matches until all are over or the duration has passed.
+
+        The match whose tick is the most overdue always runs first, and each match
+        runs one tick at a time, so a match that fell behind catches up
+        interleaved with the others instead of holding the loop. After each
+        TIME_SLICE of work the scheduler yields, so other tasks (e.g. network
+        I/O) keep running while hundreds of matches tick.
+
+        Building a rematch's state costs far more than a tick, so finished matches
+        wait out of the tick loop and are rebuilt one at a time when no tick is due
+        (or once one has waited a whole tick interval). Everything alive when the
+        run starts is frozen out of the garbage collector, whose full passes over
+        hundreds of game states would otherwise stall every match at once.
+
+        :param duration: Seconds to run, or None to run until every match is over.
+        """
+        gc.collect()
+        gc.freeze()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        deadline = None if duration is None else start + duration
+        queued = {entry[1] for entry in self.running}
+        waiting = [match for match in self.matches if not match.finished and match.match_id not in queued]
+        for i, match in enumerate(waiting):
+            # Spread the first ticks over one tick interval, so matches are not all due at once
+            match.next_tick = start + match.tick_interval * i / len(waiting)
+            heapq.heappush(self.running, (match.next_tick, match.match_id, match))
+
+        clock = time.perf_counter
+        running = self.running
+        rematches = self.rematches
+        while running or rematches:
+            now = loop.time()
+            if deadline is not None and now >= deadline:
+                break
+            slice_end = clock() + TIME_SLICE
+            while running and running[0][0] <= now:
+                _, match_id, match = heapq.heappop(running)
+                latency = loop.time() - match.next_tick
+                tick_start = clock()
+                over = match.tick()
+                match.record(latency, clock() - tick_start)
+                match.next_tick += match.tick_interval
+                if now - match.next_tick > MAX_CATCHUP_TICKS * match.tick_interval:
+                    # Too far behind to catch up; skip ahead rather than snowball
+                    skipped = int((now - match.next_tick) / match.tick_interval)
+                    match.ticks_skipped += skipped
+                    match.next_tick += skipped * match.tick_interval
+                if over and self.rematch:
+                    rematches.append(match)
+                elif not over:
+                    heapq.heappush(running, (match.next_tick, match_id, match))
+                if clock() >= slice_end:
+                    break
+            now = loop.time()
+            if rematches and (not running or running[0][0] > now
+                              or now - rematches[0].next_tick > rematches[0].tick_interval):
+                match = rematches.popleft()
+                match.rematch()
+                match.next_tick = loop.time()
+                heapq.heappush(running, (match.next_tick, match.match_id, match))
+                await asyncio.sleep(0)
+            elif running:
+                await asyncio.sleep(max(0.0, running[0][0] - now))
+
+    def stats(self):
+        """
+        Summarise every match and the host as a whole.
+
+        :return: (list of per-match dictionaries, dictionary of host totals).
+        """
+        matches = [match.stats() for match in self.matches]
+        p99s = sorted(match["p99_ms"] for match in matches)
+        totals = {
+            "matches": len(matches),
+            "played": sum(match["played"] for match in matches),
+            "ticks": sum(match["ticks"] for match in matches),
+            "skipped": sum(match["skipped"] for match in matches),
+            "worst_p99_ms": p99s[-1] if p99s else 0.0,
+            "median_p99_ms": p99s[len(p99s) // 2] if p99s else 0.0,
+            "shared_tables": len(shared),
+        }
+        return matches, totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many headless matches with different settings in one process.")
+    parser.add_argument("--matches", type=int, default=200, help="Number of matches.")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first match; later ones count up.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 21, 31],
+                        help="Map sizes, given to the matches in turn.")
+    parser.add_argument("--players", type=int, nargs="+", default=[2, 4],
+                        help="Player counts, given to the matches in turn.")
+    parser.add_argument("--tick-rates", type=int, nargs="+", default=[60, 30],
+                        help="Tick rates, given to the matches in turn.")
+    parser.add_argument("--fuse", type=int, default=None, metavar="TICKS",
+                        help="Give every other match fuses of this many ticks.")
+    parser.add_argument("--press-chance", type=float, default=0.05,
+                        help="Chance of each key being pressed on a tick.")
+    parser.add_argument("--no-rematch", action="store_true",
+                        help="Let matches end instead of starting a new one in their place.")
+    parser.add_argument("--details", action="store_true", help="Print every match, not just the summary.")
+    args = parser.parse_args(argv)
+
+    # Configs are built once per combination and shared by the matches using them
+    configs = {}
+    host = MatchHost(rematch=not args.no_rematch)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(args.matches):
+        size = args.sizes[i % len(args.sizes)]
+        players = args.players[i % len(args.players)]
+        tick_rate = args.tick_rates[i % len(args.tick_rates)]
+        fuse = args.fuse if i % 2 else None
+        key = (size, players, tick_rate, fuse)
+        if key not in configs:
+            configs[key] = MatchConfig(rows=size, cols=size, num_players=players, tick_rate=tick_rate,
+                                       fuse_ticks=fuse, bombs=max(5, 5 * size * size // 225), max_ticks=3600)
+        host.add_match(configs[key], seed=args.seed + i * 1000, press_chance=args.press_chance)
+    per_match = (tracemalloc.get_traced_memory()[0] - before) / args.matches
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    asyncio.run(host.run(args.duration))
+    elapsed = time.perf_counter() - start
+
+    matches, totals = host.stats()
+    if args.details:
+        for match in matches:
+            print(match)
+    print(f"{totals['matches']} matches ({len(configs)} configs, {totals['shared_tables']} shared tables, "
+          f"{per_match / 1024:.1f} KiB each) ran {totals['ticks']} ticks in {elapsed:.2f}s; "
+          f"{totals['played']} matches played, {totals['skipped']} ticks skipped")
+    print(f"tick latency p99: median match {totals['median_p99_ms']:.3f}ms, worst match {totals['worst_p99_ms']:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import random
+from net_protocol import (
+    MSG_HELLO, MSG_WELCOME, MSG_INPUT, MSG_SNAPSHOT, MSG_MATCH_OVER, WELCOME, INPUT, MATCH_OVER,
+    PLAYER_KEYS, frame, read_message, pack_player_input, decode_snapshot, capture_snapshot,
+)
+from net_server import MatchServer, SNAPSHOT_HISTORY
+from config import TICK_RATE
+
+
+class GameClient:
+    def __init__(self, host="127.0.0.1", port=None):
+        """
+        Initialize the GameClient object.
+
+        Keeps the latest snapshot received from the server, plus the recent ones the
+        server may send deltas against.
+
+        :param host: Server address.
+        :param port: Server port.
+        """
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.player_num = None
+        self.match_id = None
+        self.snapshots = {}      # snapshot id -> Snapshot
+        self.latest_id = 0
+        self.latest = None
+        self.winner = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    async def connect(self):
+        """Connect, join a match and wait to be seated."""
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.send(MSG_HELLO)
+        message_type, payload = await self.read()
+        if message_type != MSG_WELCOME:
+            raise ConnectionError(f"expected a welcome message, got type {message_type}")
+        self.player_num, self.match_id = WELCOME.unpack(payload)
+
+    def send(self, message_type, payload=b""):
+        data = frame(message_type, payload)
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+    async def read(self):
+        message_type, payload = await read_message(self.reader)
+        self.bytes_received += 3 + len(payload)
+        return message_type, payload
+
+    def send_input(self, player_input):
+        """
+        Send the keys currently held, acknowledging the latest snapshot.
+
+        :param player_input: Dictionary with the left/right/up/down/bomb keys.
+        """
+        self.send(MSG_INPUT, INPUT.pack(self.latest_id, pack_player_input(player_input)))
+
+    def on_snapshot(self, snapshot):
+        """Called after each snapshot is applied; override to react to new state."""
+
+    async def run(self):
+        """
+        Receive snapshots until the match is over or the server disconnects.
+
+        :return: The winner, or None if the connection was lost.
+        """
+        try:
+            while True:
+                message_type, payload = await self.read()
+                if message_type == MSG_SNAPSHOT:
+                    snapshot_id, snapshot = decode_snapshot(payload, self.snapshots)
+                    self.snapshots[snapshot_id] = snapshot
+                    self.snapshots.pop(snapshot_id - SNAPSHOT_HISTORY, None)
+                    self.latest_id, self.latest = snapshot_id, snapshot
+                    self.on_snapshot(snapshot)
+                elif message_type == MSG_MATCH_OVER:
+                    (self.winner,) = MATCH_OVER.unpack(payload)
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.writer.close()
+        return self.winner
+
+
+class ScriptedClient(GameClient):
+    def __init__(self, script, host="127.0.0.1", port=None):
+        """
+        Initialize the ScriptedClient object.
+
+        Answers every snapshot with the input the script gives for its tick, which
+        also acknowledges the snapshot.
+
+        :param script: Callable taking a tick and returning the held keys as a dictionary.
+        :param host: Server address.
+        :param port: Server port.
+        """
+        super().__init__(host, port)
+        self.script = script
+
+    def on_snapshot(self, snapshot):
+        self.send_input(self.script(snapshot.tick))
+
+
+def random_script(seed, press_chance=0.2):
+    """
+    Build a script pressing random keys, the same for the same seed and tick.
+
+    :param seed: Seed of the script.
+    :param press_chance: Chance of each key being pressed on a tick.
+    :return: Script callable for ScriptedClient.
+    """
+    def script(tick):
+        rng = random.Random(seed * 1000003 + tick)
+        return {key: rng.random() < press_chance for key in PLAYER_KEYS}
+    return script
+
+
+async def local_match(seed=0, bombs=5, tick_rate=600, max_ticks=3600, clients=None):
+    """
+    Play one match over localhost between two scripted clients.
+
+    :param clients: Optional two unconnected clients to play instead; they are
+                    pointed at the server's port before connecting.
+    :return: (server match, list of clients).
+    """
+    server = MatchServer(port=0, seed=seed, bombs=bombs, tick_rate=tick_rate, max_ticks=max_ticks)
+    await server.start()
+    if clients is None:
+        clients = [ScriptedClient(random_script(seed + n)) for n in (1, 2)]
+    for client in clients:
+        client.port = server.port
+        await client.connect()
+    await asyncio.gather(*(client.run() for client in clients))
+    await server.close()
+    return server.matches[0], clients
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a scripted match against a local server.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the match and scripts.")
+    parser.add_argument("--bombs", type=int, default=5, help="Initial bombs.")
+    parser.add_argument("--tick-rate", type=int, default=600, help="Server ticks per second.")
+    parser.add_argument("--max-ticks", type=int, default=3600, help="Tick limit of the match.")
+    args = parser.parse_args(argv)
+
+    match, clients = asyncio.run(local_match(args.seed, args.bombs, args.tick_rate, args.max_ticks))
+    expected = capture_snapshot(match.state, match.tiles)
+    print(f"match over after {match.state.tick} ticks, winner {match.winner}, "
+          f"{match.snapshot_id} snapshots")
+    for client in clients:
+        in_sync = client.latest == expected
+        seconds = match.state.tick / TICK_RATE  # Bandwidth at the normal tick rate
+        print(f"player {client.player_num}: received {client.bytes_received} bytes "
+              f"({client.bytes_received / seconds:.0f} B/s at {TICK_RATE} ticks/s), "
+              f"sent {client.bytes_sent} bytes, in sync: {in_sync}")
+
+
+if __name__ == "__main__":
+    main()
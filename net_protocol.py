@@ -0,0 +1,242 @@
+import struct
+from bomb import BOMB_TYPE_CODES
+
+# Every message is framed as <payload length, message type> followed by the payload
+FRAME = struct.Struct("<HB")
+
+MSG_HELLO = 1     # client -> server: join a match
+MSG_WELCOME = 2   # server -> client: assigned player number
+MSG_INPUT = 3     # client -> server: held keys and last snapshot received
+MSG_SNAPSHOT = 4  # server -> client: full or delta-compressed state
+MSG_MATCH_OVER = 5  # server -> client: winner, sent before the connection closes
+
+WELCOME = struct.Struct("<BI")            # player number, match id
+INPUT = struct.Struct("<IB")              # acknowledged snapshot id, input bits
+SNAPSHOT_HEADER = struct.Struct("<III")   # snapshot id, base snapshot id (0 = full), tick
+COUNT = struct.Struct("<H")
+PLAYER = struct.Struct("<BHHHH")          # player number, x, y, target x, target y
+CELL = struct.Struct("<HH")               # row, col
+BOMB = struct.Struct("<HHBB")             # row, col, turn, type
+TILE = struct.Struct("<HHB")              # row, col, tile type
+EXPLOSION = struct.Struct("<IH")          # serial, number of cells
+SERIAL = struct.Struct("<I")
+MATCH_OVER = struct.Struct("<B")          # winner (0 = draw)
+
+PLAYER_KEYS = ("left", "right", "up", "down", "bomb")
+
+
+def pack_player_input(player_input):
+    """
+    Pack one player's keys into a byte.
+
+    :param player_input: Dictionary with the left/right/up/down/bomb keys.
+    :return: Integer bit field.
+    """
+    bits = 0
+    for i, key in enumerate(PLAYER_KEYS):
+        if player_input.get(key):
+            bits |= 1 << i
+    return bits
+
+
+def unpack_player_input(bits, player_num):
+    """
+    Unpack a player's input byte into p<n>_* input state entries.
+
+    :param bits: Packed input.
+    :param player_num: Player the input belongs to.
+    :return: Dictionary of p<n>_* keys to booleans.
+    """
+    return {f"p{player_num}_{key}": bool(bits >> i & 1) for i, key in enumerate(PLAYER_KEYS)}
+
+
+def frame(message_type, payload=b""):
+    """Frame a message for sending."""
+    return FRAME.pack(len(payload), message_type) + payload
+
+
+async def read_message(reader):
+    """
+    Read one framed message from an asyncio stream.
+
+    :param reader: asyncio.StreamReader.
+    :return: (message type, payload bytes).
+    """
+    length, message_type = FRAME.unpack(await reader.readexactly(FRAME.size))
+    payload = await reader.readexactly(length) if length else b""
+    return message_type, payload
+
+
+class Snapshot:
+    def __init__(self, tick=0, players=None, bombs=None, tiles=None, explosions=None):
+        """
+        Initialize the Snapshot object.
+
+        A snapshot is the part of the game state clients need to draw the match.
+
+        :param tick: Simulation tick.
+        :param players: Dictionary player number -> (x, y, target x, target y).
+        :param bombs: Dictionary (row, col) -> (turn, bomb type code).
+        :param tiles: Dictionary (row, col) -> tile type, for non-empty tiles.
+        :param explosions: Dictionary serial -> tuple of (row, col) cells.
+        """
+        self.tick = tick
+        self.players = players if players is not None else {}
+        self.bombs = bombs if bombs is not None else {}
+        self.tiles = tiles if tiles is not None else {}
+        self.explosions = explosions if explosions is not None else {}
+
+    def copy(self):
+        """Get a copy that can be modified without touching this snapshot."""
+        return Snapshot(self.tick, dict(self.players), dict(self.bombs),
+                        dict(self.tiles), dict(self.explosions))
+
+    def __eq__(self, other):
+        return (isinstance(other, Snapshot) and self.tick == other.tick
+                and self.players == other.players and self.bombs == other.bombs
+                and self.tiles == other.tiles and self.explosions == other.explosions)
+
+
+def tile_snapshot(tiles):
+    """
+    Collect the non-empty tiles of a map.
+
+    :param tiles: 2D tiles grid.
+    :return: Dictionary (row, col) -> tile type.
+    """
+    return {(row, col): tile.tile_type
+            for row, row_tiles in enumerate(tiles)
+            for col, tile in enumerate(row_tiles) if tile.tile_type}
+
+
+def capture_snapshot(state, tiles):
+    """
+    Capture a snapshot of a GameState.
+
+    :param state: The GameState.
+    :param tiles: Tile dictionary from tile_snapshot(); shared between snapshots
+                  until the map changes, so it is not rebuilt every tick.
+    :return: A Snapshot.
+    """
+    players = {p.player_num: (p.x, p.y, p.target_x, p.target_y) for p in state.players}
+    bombs = {bomb.cell: (bomb.turn, BOMB_TYPE_CODES[bomb.type]) for bomb in state.bombs}
+    explosions = {e.serial: tuple(e.cells) for e in state.explosions}
+    return Snapshot(state.tick, players, bombs, tiles, explosions)
+
+
+def _changed(current, base):
+    """Get the entries of current that are new or differ from base."""
+    if current is base:
+        return []
+    return [(key, value) for key, value in current.items() if base.get(key) != value]
+
+
+def _removed(current, base):
+    """Get the keys of base that are missing from current."""
+    if current is base:
+        return []
+    return [key for key in base if key not in current]
+
+
+def encode_snapshot(snapshot_id, snapshot, base_id=0, base=None):
+    """
+    Encode a snapshot, as a delta against a base snapshot the client has.
+
+    :param snapshot_id: Id of the snapshot being sent.
+    :param snapshot: The Snapshot.
+    :param base_id: Id of the base snapshot, or 0 to send everything.
+    :param base: The base Snapshot (ignored when base_id is 0).
+    :return: Payload bytes.
+    """
+    if base_id == 0 or base is None:
+        base_id, base = 0, Snapshot()
+
+    parts = [SNAPSHOT_HEADER.pack(snapshot_id, base_id, snapshot.tick)]
+
+    players = _changed(snapshot.players, base.players)
+    parts.append(bytes((len(players),)))
+    parts += [PLAYER.pack(num, *position) for num, position in players]
+
+    removed = _removed(snapshot.bombs, base.bombs)
+    parts.append(COUNT.pack(len(removed)))
+    parts += [CELL.pack(*cell) for cell in removed]
+    changed = _changed(snapshot.bombs, base.bombs)
+    parts.append(COUNT.pack(len(changed)))
+    parts += [BOMB.pack(cell[0], cell[1], turn, type_code) for cell, (turn, type_code) in changed]
+
+    removed = _removed(snapshot.tiles, base.tiles)
+    parts.append(COUNT.pack(len(removed)))
+    parts += [CELL.pack(*cell) for cell in removed]
+    changed = _changed(snapshot.tiles, base.tiles)
+    parts.append(COUNT.pack(len(changed)))
+    parts += [TILE.pack(cell[0], cell[1], tile_type) for cell, tile_type in changed]
+
+    removed = _removed(snapshot.explosions, base.explosions)
+    parts.append(COUNT.pack(len(removed)))
+    parts += [SERIAL.pack(serial) for serial in removed]
+    changed = _changed(snapshot.explosions, base.explosions)
+    parts.append(COUNT.pack(len(changed)))
+    for serial, cells in changed:
+        parts.append(EXPLOSION.pack(serial, len(cells)))
+        parts += [CELL.pack(*cell) for cell in cells]
+
+    return b"".join(parts)
+
+
+def decode_snapshot(payload, bases):
+    """
+    Decode a snapshot payload.
+
+    :param payload: Bytes produced by encode_snapshot().
+    :param bases: Dictionary snapshot id -> Snapshot the client still holds.
+    :return: (snapshot id, Snapshot).
+    :raises KeyError: If the base snapshot is no longer held.
+    """
+    snapshot_id, base_id, tick = SNAPSHOT_HEADER.unpack_from(payload, 0)
+    snapshot = bases[base_id].copy() if base_id else Snapshot()
+    snapshot.tick = tick
+    offset = SNAPSHOT_HEADER.size
+
+    count = payload[offset]
+    offset += 1
+    for _ in range(count):
+        num, *position = PLAYER.unpack_from(payload, offset)
+        snapshot.players[num] = tuple(position)
+        offset += PLAYER.size
+
+    def read_count():
+        nonlocal offset
+        (value,) = COUNT.unpack_from(payload, offset)
+        offset += COUNT.size
+        return value
+
+    for _ in range(read_count()):
+        del snapshot.bombs[CELL.unpack_from(payload, offset)]
+        offset += CELL.size
+    for _ in range(read_count()):
+        row, col, turn, type_code = BOMB.unpack_from(payload, offset)
+        snapshot.bombs[(row, col)] = (turn, type_code)
+        offset += BOMB.size
+
+    for _ in range(read_count()):
+        del snapshot.tiles[CELL.unpack_from(payload, offset)]
+        offset += CELL.size
+    for _ in range(read_count()):
+        row, col, tile_type = TILE.unpack_from(payload, offset)
+        snapshot.tiles[(row, col)] = tile_type
+        offset += TILE.size
+
+    for _ in range(read_count()):
+        (serial,) = SERIAL.unpack_from(payload, offset)
+        del snapshot.explosions[serial]
+        offset += SERIAL.size
+    for _ in range(read_count()):
+        serial, cell_count = EXPLOSION.unpack_from(payload, offset)
+        offset += EXPLOSION.size
+        cells = []
+        for _ in range(cell_count):
+            cells.append(CELL.unpack_from(payload, offset))
+            offset += CELL.size
+        snapshot.explosions[serial] = tuple(cells)
+
+    return snapshot_id, snapshot
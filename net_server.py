@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import random
+import struct
+from bomb import Bomb
+from game_state import GameState
+from config import TICK_RATE
+from net_protocol import (
+    MSG_HELLO, MSG_WELCOME, MSG_INPUT, MSG_SNAPSHOT, MSG_MATCH_OVER, WELCOME, INPUT, MATCH_OVER,
+    frame, read_message, unpack_player_input, tile_snapshot, capture_snapshot, encode_snapshot,
+)
+
+DEFAULT_PORT = 5555
+SNAPSHOT_INTERVAL = 3        # Ticks between snapshots (20 per second at 60 ticks per second)
+SNAPSHOT_HISTORY = 64        # Snapshots kept as delta bases
+WRITE_BUFFER_LIMIT = 64 * 1024  # Skip snapshots to a client that is not reading them
+MAX_CATCHUP_TICKS = 10       # Ticks run at once after the loop falls behind
+
+
+class ClientConnection:
+    def __init__(self, reader, writer, player_num):
+        """
+        Initialize the ClientConnection object.
+
+        :param reader: asyncio.StreamReader of the connection.
+        :param writer: asyncio.StreamWriter of the connection.
+        :param player_num: Player controlled by the client.
+        """
+        self.reader = reader
+        self.writer = writer
+        self.player_num = player_num
+        self.acked = 0           # Latest snapshot id the client acknowledged
+        self.input_bits = 0      # Keys currently held by the client
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.connected = True
+
+    def send(self, message_type, payload=b""):
+        """Queue a message without waiting for it to be written."""
+        data = frame(message_type, payload)
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+    @property
+    def backlogged(self):
+        """Whether too much unsent data is queued for the client."""
+        return self.writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT
+
+    async def receive_inputs(self):
+        """Read input messages until the client disconnects or sends one that cannot be decoded."""
+        try:
+            while True:
+                message_type, payload = await read_message(self.reader)
+                self.bytes_received += 3 + len(payload)
+                if message_type == MSG_INPUT:
+                    acked, self.input_bits = INPUT.unpack(payload)
+                    self.acked = max(self.acked, acked)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (struct.error, ValueError):
+            self.close()  # Malformed message; drop the client as if it had left
+        finally:
+            self.connected = False
+
+    def close(self):
+        self.writer.close()
+
+
+class Match:
+    def __init__(self, match_id, seed, bombs=5, tick_rate=TICK_RATE,
+                 snapshot_interval=SNAPSHOT_INTERVAL, max_ticks=None):
+        """
+        Initialize the Match object.
+
+        The server owns the only GameState; clients send inputs and draw the
+        snapshots they receive.
+
+        :param match_id: Id of the match on this server.
+        :param seed: Seed for the map and initial bombs.
+        :param bombs: Number of initial bombs.
+        :param tick_rate: Simulation ticks per second.
+        :param snapshot_interval: Ticks between snapshots.
+        :param max_ticks: Tick limit before the match is a draw, or None.
+        """
+        self.match_id = match_id
+        self.seed = seed
+        self.state = GameState(seed)
+        Bomb.add_initial_bombs(self.state, bombs)
+        self.tick_rate = tick_rate
+        self.snapshot_interval = snapshot_interval
+        self.max_ticks = max_ticks
+        self.clients = {}        # player number -> ClientConnection
+        self.tiles = tile_snapshot(self.state.tiles)  # Replaced, not mutated, when walls break
+        self.snapshots = {}      # snapshot id -> Snapshot, the last SNAPSHOT_HISTORY sent
+        self.snapshot_id = 0
+        self.winner = None
+
+    @property
+    def full(self):
+        return len(self.clients) == len(self.state.players)
+
+    def add_client(self, reader, writer):
+        """
+        Seat a new client as the next free player.
+
+        :return: The ClientConnection.
+        """
+        player_num = len(self.clients) + 1
+        client = ClientConnection(reader, writer, player_num)
+        self.clients[player_num] = client
+        client.send(MSG_WELCOME, WELCOME.pack(player_num, self.match_id))
+        return client
+
+    def input_state(self):
+        """Combine the keys held by every client into one input state."""
+        input_state = {}
+        for player_num, client in self.clients.items():
+            input_state.update(unpack_player_input(client.input_bits, player_num))
+        return input_state
+
+    def tick(self):
+        """
+        Run one simulation tick.
+
+        :return: True once the match is over.
+        """
+        hit = set()
+        for event in self.state.step(self.input_state()):
+            if event["type"] == "player_hit":
+                hit.add(event["player"])
+            elif event["type"] == "tile_changed":
+                # Snapshots share the tile dictionary, so change a copy
+                self.tiles = dict(self.tiles)
+                cell = (event["row"], event["col"])
+                if event["tile_type"]:
+                    self.tiles[cell] = event["tile_type"]
+                else:
+                    self.tiles.pop(cell, None)
+        if hit:
+            self.winner = 0 if len(hit) > 1 else 2 if 1 in hit else 1
+        elif self.max_ticks is not None and self.state.tick >= self.max_ticks:
+            self.winner = 0
+        return self.winner is not None
+
+    def broadcast(self):
+        """Send every client the current state, as a delta against what it last acknowledged."""
+        self.snapshot_id += 1
+        snapshot = capture_snapshot(self.state, self.tiles)
+        self.snapshots[self.snapshot_id] = snapshot
+        self.snapshots.pop(self.snapshot_id - SNAPSHOT_HISTORY, None)
+
+        payloads = {}  # Clients acknowledging the same snapshot share one encoding
+        for client in self.clients.values():
+            if not client.connected or client.backlogged:
+                continue
+            base_id = client.acked if client.acked in self.snapshots else 0
+            if base_id not in payloads:
+                payloads[base_id] = encode_snapshot(self.snapshot_id, snapshot,
+                                                    base_id, self.snapshots.get(base_id))
+            client.send(MSG_SNAPSHOT, payloads[base_id])
+
+    async def run(self):
+        """
+        Run the match until a player is hit, max_ticks is reached or a client leaves.
+
+        :return: The winner (0 for a draw).
+        """
+        readers = [asyncio.create_task(client.receive_inputs()) for client in self.clients.values()]
+        loop = asyncio.get_running_loop()
+        tick_time = 1 / self.tick_rate
+        next_tick = loop.time()
+        try:
+            self.broadcast()
+            while self.winner is None:
+                gone = [num for num, client in self.clients.items() if not client.connected]
+                if gone:
+                    self.winner = 0 if len(gone) > 1 else 2 if 1 in gone else 1
+                    break
+
+                # Run the ticks that are due, capped so a stall does not snowball
+                ticks = 0
+                while loop.time() >= next_tick and ticks < MAX_CATCHUP_TICKS and not self.tick():
+                    next_tick += tick_time
+                    ticks += 1
+                    if self.state.tick % self.snapshot_interval == 0:
+                        self.broadcast()
+                if ticks == MAX_CATCHUP_TICKS:
+                    next_tick = loop.time()
+                await asyncio.sleep(max(0, next_tick - loop.time()))
+
+            self.broadcast()  # Final state, so clients end in sync with the server
+            for client in self.clients.values():
+                if client.connected:
+                    client.send(MSG_MATCH_OVER, MATCH_OVER.pack(self.winner))
+        finally:
+            for client in self.clients.values():
+                client.close()
+            for reader in readers:
+                reader.cancel()
+        return self.winner
+
+
+class MatchServer:
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, seed=None, **match_options):
+        """
+        Initialize the MatchServer object.
+
+        Pairs incoming clients into matches; every match runs as its own task on one
+        event loop, so a single process hosts as many matches as the CPU allows.
+
+        :param host: Address to listen on.
+        :param port: Port to listen on (0 picks a free port).
+        :param seed: Seed of the first match; later matches use seed + match id.
+                     None picks a random seed.
+        :param match_options: Keyword arguments passed to every Match.
+        """
+        self.host = host
+        self.port = port
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.match_options = match_options
+        self.server = None
+        self.waiting = None      # Match still looking for players
+        self.matches = []
+        self.tasks = set()
+        self.results = {}        # match id -> winner
+
+    async def start(self):
+        """Start listening. The port actually bound is stored in self.port."""
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle_client(self, reader, writer):
+        """Wait for a client's hello and seat it in the waiting match."""
+        try:
+            message_type, _ = await read_message(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        if message_type != MSG_HELLO:
+            writer.close()
+            return
+
+        if self.waiting is None:
+            match_id = len(self.matches) + 1
+            self.waiting = Match(match_id, self.seed + match_id - 1, **self.match_options)
+            self.matches.append(self.waiting)
+        match = self.waiting
+        match.add_client(reader, writer)
+        if match.full:
+            self.waiting = None
+            task = asyncio.create_task(self.run_match(match))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def run_match(self, match):
+        self.results[match.match_id] = await match.run()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """Stop accepting clients and wait for running matches to finish."""
+        self.server.close()
+        await self.server.wait_closed()
+        if self.tasks:
+            await asyncio.gather(*self.tasks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host authoritative Bomberman matches.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the first match.")
+    parser.add_argument("--bombs", type=int, default=5, help="Initial bombs per match.")
+    args = parser.parse_args(argv)
+
+    server = MatchServer(args.host, args.port, seed=args.seed, bombs=args.bombs)
+    print(f"listening on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
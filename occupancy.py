@@ -0,0 +1,157 @@
+from config import TILE_SIZE
+
+NEIGHBOR_OFFSETS = (
+    (0, 1),   # Right
+    (0, -1),  # Left
+    (1, 0),   # Down
+    (-1, 0),  # Up
+)
+
+
+class OccupancyGrid:
+    def __init__(self, rows, cols):
+        """
+        Initialize the OccupancyGrid object.
+
+        Keeps, for every (row, col) cell, the wall, bomb and players occupying it so
+        collision checks and bomb lookups are O(1) instead of list scans.
+
+        :param rows: Number of rows on the board.
+        :param cols: Number of columns on the board.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.walls = set()   # Cells holding a wall, breakable or not
+        self.breakables = set()  # Cells holding a breakable wall
+        self.bombs = {}      # (row, col) -> Bomb
+        self.players = {}    # (row, col) -> list of Players
+
+    @staticmethod
+    def cell_of(x, y):
+        """
+        Convert pixel coordinates to a (row, col) cell.
+
+        :param x: x-coordinate in pixels.
+        :param y: y-coordinate in pixels.
+        :return: The (row, col) tuple containing the point.
+        """
+        return y // TILE_SIZE, x // TILE_SIZE
+
+    @staticmethod
+    def from_tiles(tiles):
+        """
+        Build an occupancy grid from a 2D list of tiles.
+
+        :param tiles: 2D list of Tile/Wall objects.
+        :return: A new OccupancyGrid with all walls registered.
+        """
+        grid = OccupancyGrid(len(tiles), len(tiles[0]) if tiles else 0)
+        for row, row_tiles in enumerate(tiles):
+            for col, tile in enumerate(row_tiles):
+                if tile.tile_type == 1:  # 1 = Wall
+                    grid.walls.add((row, col))
+                elif tile.tile_type == 2:  # 2 = Breakable
+                    grid.add_breakable((row, col))
+        return grid
+
+    @staticmethod
+    def from_board(board):
+        """
+        Build an occupancy grid from an array-backed board.
+
+        :param board: ArrayBoard holding the tile types.
+        :return: A new OccupancyGrid with all walls registered.
+        """
+        grid = OccupancyGrid(board.rows, board.cols)
+        grid.walls.update(board.wall_cells())
+        for cell in board.breakable_cells():
+            grid.add_breakable(cell)
+        return grid
+
+    def in_bounds(self, cell):
+        """Check if a cell lies on the board."""
+        row, col = cell
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def neighbors(self, cell):
+        """
+        Get the in-bounds orthogonal neighbors of a cell.
+
+        :param cell: (row, col) tuple.
+        :return: Tuple of neighboring (row, col) tuples, in NEIGHBOR_OFFSETS order.
+        """
+        row, col = cell
+        if 0 < row < self.rows - 1 and 0 < col < self.cols - 1:
+            return (row, col + 1), (row, col - 1), (row + 1, col), (row - 1, col)
+        return tuple((row + d_row, col + d_col) for d_row, d_col in NEIGHBOR_OFFSETS
+                     if 0 <= row + d_row < self.rows and 0 <= col + d_col < self.cols)
+
+    def is_wall(self, cell):
+        """Check if a cell holds a wall."""
+        return cell in self.walls
+
+    def add_wall(self, cell):
+        """Register a wall at the given cell."""
+        self.walls.add(cell)
+
+    def remove_wall(self, cell):
+        """Unregister the wall at the given cell, if any, breakable or not."""
+        self.walls.discard(cell)
+        self.breakables.discard(cell)
+
+    def is_breakable(self, cell):
+        """Check if a cell holds a breakable wall."""
+        return cell in self.breakables
+
+    def add_breakable(self, cell):
+        """Register a breakable wall, which blocks movement like any other wall."""
+        self.walls.add(cell)
+        self.breakables.add(cell)
+
+    def bomb_at(self, cell):
+        """
+        Get the bomb at a cell.
+
+        :param cell: (row, col) tuple.
+        :return: The Bomb at the cell, or None.
+        """
+        return self.bombs.get(cell)
+
+    def add_bomb(self, bomb):
+        """Register a bomb at its cell."""
+        self.bombs[bomb.cell] = bomb
+
+    def remove_bomb(self, bomb):
+        """Unregister a bomb if it is still the occupant of its cell."""
+        if self.bombs.get(bomb.cell) is bomb:
+            del self.bombs[bomb.cell]
+
+    def has_neighboring_bomb(self, cell):
+        """Check if any orthogonal neighbor of a cell holds a bomb."""
+        bombs = self.bombs
+        row, col = cell
+        for d_row, d_col in NEIGHBOR_OFFSETS:
+            if (row + d_row, col + d_col) in bombs:
+                return True
+        return False
+
+    def players_at(self, cell):
+        """
+        Get the players occupying a cell.
+
+        :param cell: (row, col) tuple.
+        :return: List of players (possibly empty).
+        """
+        return self.players.get(cell, ())
+
+    def add_player(self, player, cell):
+        """Register a player as an occupant of a cell."""
+        self.players.setdefault(cell, []).append(player)
+
+    def remove_player(self, player, cell):
+        """Unregister a player from a cell."""
+        occupants = self.players.get(cell)
+        if occupants and player in occupants:
+            occupants.remove(player)
+            if not occupants:
+                del self.players[cell]
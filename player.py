@@ -1,72 +1,96 @@
-import pygame
 from bomb import Bomb
-from config import WIDTH, HEIGHT, TILE_SIZE, PLAYER_SIZE, GRID_SZE_ROW, GRID_SZE_COL
+from config import TILE_SIZE
+
+ACTIONS = ("left", "right", "up", "down", "bomb")
+
+
+def spawn_cells(rows, cols, count):
+    """
+    Get the starting cell of every player.
+
+    Players are spread evenly around the edge of the map, starting from the
+    top-left corner. Consecutive players start on opposite sides, so players 1
+    and 2 always start in opposite corners, and four players take the four corners
+    of a square map.
+
+    :param rows: Number of rows on the map.
+    :param cols: Number of columns on the map.
+    :param count: Number of players.
+    :return: List of (row, col) tuples, one per player.
+    """
+    edge = ([(0, col) for col in range(cols)]
+            + [(row, cols - 1) for row in range(1, rows)]
+            + [(rows - 1, col) for col in range(cols - 2, -1, -1)]
+            + [(row, 0) for row in range(rows - 2, 0, -1)])
+    if count > len(edge):
+        raise ValueError(f"a {rows}x{cols} map has room for {len(edge)} players, not {count}")
+    slots = [edge[i * len(edge) // count] for i in range(count)]
+    half = (count + 1) // 2
+    return [slots[i // 2] if i % 2 == 0 else slots[half + i // 2] for i in range(count)]
+
+
+def input_keys(num_players):
+    """
+    Get the input state keys of every player, e.g. "p3_left".
+
+    :param num_players: Number of players.
+    :return: Tuple of keys, grouped by player.
+    """
+    return tuple(f"p{num}_{action}" for num in range(1, num_players + 1) for action in ACTIONS)
 
 
 class Player:
-    player_1_surf = None
-    player_2_surf = None
-    
+    __slots__ = ("game", "player_num", "x", "y", "target_x", "target_y", "prev_x", "prev_y", "origin_cell",
+                 "input_keys")
+
     def __init__(self, game, player_num=1):
         """
         Initialize the Player object.
 
-        :param game: Reference to the Game object.
+        :param game: Reference to the GameState object.
+        :param player_num: Player number, from 1.
         """
         self.game = game
         self.player_num = player_num
+        self.input_keys = input_keys(player_num)[-len(ACTIONS):]  # This player's p<n>_* keys
         self.x, self.y = self.set_initial_position()
         self.target_x, self.target_y = self.x, self.y
+        self.prev_x, self.prev_y = self.x, self.y  # Position at the start of the tick
+        self.origin_cell = self.cell  # Cell being left while moving towards the target
 
-        # Load bomb images if not already loaded
-        if Player.player_1_surf is None:
-            Player.player_1_surf = pygame.transform.scale(
-                pygame.image.load("assets/bomberman_p1.png").convert_alpha(),
-                (TILE_SIZE, TILE_SIZE),
-            )
-        if Player.player_2_surf is None:
-            Player.player_2_surf = pygame.transform.scale(
-                pygame.image.load("assets/bomberman_p2.png").convert_alpha(),
-                (TILE_SIZE, TILE_SIZE),
-            )
+    @property
+    def cell(self):
+        """The (row, col) cell the player is moving to (or standing on)."""
+        return self.target_y // TILE_SIZE, self.target_x // TILE_SIZE
 
     def set_initial_position(self):
-        """Set different starting positions for players"""
-        if self.player_num == 1:
-            return 0, 0
-        return (GRID_SZE_COL - 1) * TILE_SIZE, (GRID_SZE_ROW - 1) * TILE_SIZE
+        """Set different starting positions for players, spread around the map's edge"""
+        row, col = self.game.spawn_cells[self.player_num - 1]
+        return col * TILE_SIZE, row * TILE_SIZE
 
     def get_player_input(self, input_state):
-        """Get movement direction for this specific player"""
-        if self.player_num == 1:
-            return {
-                "left": input_state["p1_left"],
-                "right": input_state["p1_right"],
-                "up": input_state["p1_up"],
-                "down": input_state["p1_down"],
-                "bomb": input_state["p1_bomb"]
-            }
-        else:
-            return {
-                "left": input_state["p2_left"],
-                "right": input_state["p2_right"],
-                "up": input_state["p2_up"],
-                "down": input_state["p2_down"],
-                "bomb": input_state["p2_bomb"]
-            }
-
-    def update(self, input_state, walls, bombs):
+        """Get movement direction for this specific player; missing keys count as released"""
+        get = input_state.get
+        return {action: get(key, False) for action, key in zip(ACTIONS, self.input_keys)}
+
+    def update(self, input_state):
         """
         Update the player's position and actions.
 
+        While moving, the player occupies both the cell it left and its target cell
+        in the game's occupancy grid, matching the rectangles used for collisions.
+
         :param input_state: Dictionary of input states (e.g., movement and bomb drop).
-        :param walls: List of wall objects to check for collisions.
-        :param bombs: List of active bombs.
         """
+        self.prev_x, self.prev_y = self.x, self.y
         player_input = self.get_player_input(input_state)
+        occupancy = self.game.occupancy
         # If the player is not at their target position, don't accept new input
         if self.x != self.target_x or self.y != self.target_y:
             self.move_towards_target()
+            if self.x == self.target_x and self.y == self.target_y:
+                occupancy.remove_player(self, self.origin_cell)
+                self.origin_cell = self.cell
             return
 
         # Set new target position based on input
@@ -78,31 +102,24 @@ class Player:
             return 
 
         # Check for collisions with walls
-        player_rect = pygame.Rect(new_target_x, new_target_y, PLAYER_SIZE, PLAYER_SIZE)
-        for wall in walls:
-            wall_rect = pygame.Rect(wall.x, wall.y, TILE_SIZE, TILE_SIZE)
-            if player_rect.colliderect(wall_rect):
-                return
+        new_cell = (new_target_y // TILE_SIZE, new_target_x // TILE_SIZE)
+        if occupancy.is_wall(new_cell):
+            return
 
-        for other_player in self.game.players:
-            if other_player != self:
-                """
-               A collision is detected if any of the following conditions are met:
-                   - The player's current position overlaps with another player's current position.
-                   - The player's target position overlaps with another player's current position.
-                   - The player's current position overlaps with another player's target position.
-                   - The player's target position overlaps with another player's target position.
-               """
-                other_current_rect = pygame.Rect(other_player.x, other_player.y, PLAYER_SIZE, PLAYER_SIZE)
-                other_target_rect = pygame.Rect(other_player.target_x, other_player.target_y, PLAYER_SIZE, PLAYER_SIZE)
-
-                if player_rect.colliderect(other_current_rect) or player_rect.colliderect(other_target_rect):
-                    return
+        """
+        A collision is detected if the target cell is occupied by another player,
+        either as the cell it stands on, the cell it is leaving or the cell it is moving to.
+        """
+        for other_player in occupancy.players_at(new_cell):
+            if other_player is not self:
+                return
 
         # Update target position
+        if new_cell != self.cell:
+            occupancy.add_player(self, new_cell)
         self.target_x, self.target_y = new_target_x, new_target_y
 
-        self.drop_bomb(bombs, input_state)
+        self.drop_bomb(input_state)
 
     def player_movement(self, input_state, new_target_x, new_target_y):
         """
@@ -113,33 +130,37 @@ class Player:
         :param new_target_y: Current target y-coordinate.
         :return: Updated target x and y coordinates.
         """
+        # The map, not the window, bounds movement
+        map_width = self.game.occupancy.cols * TILE_SIZE
+        map_height = self.game.occupancy.rows * TILE_SIZE
+
         # Only allow horizontal or vertical movement, but not both at the same time
         if input_state["left"] and self.target_x > 0:
             new_target_x -= TILE_SIZE
-        elif input_state["right"] and self.target_x < (WIDTH - TILE_SIZE):
+        elif input_state["right"] and self.target_x < (map_width - TILE_SIZE):
             new_target_x += TILE_SIZE
         if input_state["up"] and self.target_y > 0:
             new_target_y -= TILE_SIZE
-        elif input_state["down"] and self.target_y < (HEIGHT - TILE_SIZE):
+        elif input_state["down"] and self.target_y < (map_height - TILE_SIZE):
             new_target_y += TILE_SIZE
         return new_target_x, new_target_y
 
-    def drop_bomb(self, bombs, input_state):
+    def drop_bomb(self, input_state):
         """
         Drop a bomb at the player's current position.
 
-        :param bombs: List of active bombs.
         :param input_state: Dictionary of input states.
         """
         player_input = self.get_player_input(input_state)
         if player_input["bomb"]:
             bomb_x = round(self.target_x / TILE_SIZE) * TILE_SIZE
             bomb_y = round(self.target_y / TILE_SIZE) * TILE_SIZE
-            if not any(b.x == bomb_x and b.y == bomb_y for b in bombs):
+            if self.game.occupancy.bomb_at((bomb_y // TILE_SIZE, bomb_x // TILE_SIZE)) is None:
                 new_bomb = Bomb(bomb_x, bomb_y, self.game)
-                bombs.append(new_bomb)
-                self.game.bomb_queue.append(new_bomb)
+                self.game.add_bomb(new_bomb)
+                self.game.queue_bomb(new_bomb)
                 self.game.bomb_counter += 1
+                self.game.emit("bomb_placed", player=self.player_num, x=bomb_x, y=bomb_y)
 
     def move_towards_target(self):
         """
@@ -154,20 +175,29 @@ class Player:
         if self.y > self.target_y:
             self.y -= 5
 
-    def draw(self, screen):
+    def interpolated_position(self, alpha):
+        """
+        Get the position between the previous and current tick.
+
+        :param alpha: Fraction of a tick elapsed since the last update (0 to 1).
+        :return: (x, y) in pixels.
+        """
+        return (round(self.prev_x + (self.x - self.prev_x) * alpha),
+                round(self.prev_y + (self.y - self.prev_y) * alpha))
+
+    def draw(self, screen, alpha=1.0, offset=(0, 0)):
         """
         Draw the player on the screen.
 
         :param screen: The Pygame screen object.
+        :param alpha: Fraction of a tick elapsed since the last update, used to
+                      interpolate the position between ticks.
+        :param offset: (x, y) added to the player's position, e.g. by a camera.
         """
-        if self.player_num == 1:
-            player_1_rect = Player.player_1_surf.get_rect(
-                center=(self.x + TILE_SIZE // 2, self.y + TILE_SIZE // 2)
-            )
-            screen.blit(Player.player_1_surf, player_1_rect)
-
-        else:
-            player_2_rect = Player.player_2_surf.get_rect(
-                center=(self.x + TILE_SIZE // 2, self.y + TILE_SIZE // 2)
-            )
-            screen.blit(Player.player_2_surf, player_2_rect)
+        from assets import assets  # Drawing is the only use of assets, and of pygame
+        x, y = self.interpolated_position(alpha)
+        player_surf = assets.player_sprite(self.player_num)
+        player_rect = player_surf.get_rect(
+            center=(x + TILE_SIZE // 2 + offset[0], y + TILE_SIZE // 2 + offset[1])
+        )
+        screen.blit(player_surf, player_rect)
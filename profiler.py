@@ -0,0 +1,165 @@
+import csv
+import time
+from array import array
+import pygame
+from assets import assets
+
+PHASES = ("events", "update", "render", "wait")
+COUNTERS = ("bombs", "explosions", "walls")
+
+OVERLAY_SIZE = (220, 110)
+OVERLAY_BG = (0, 0, 0)  # Opaque, so redrawing it over itself every frame is stable
+OVERLAY_TEXT_COLOR = (255, 255, 255)
+SPARKLINE_COLOR = (0, 255, 0)
+OVERLAY_FONT_SIZE = 18
+OVERLAY_REFRESH_FRAMES = 15  # Rebuild the overlay text four times a second at 60 FPS
+
+
+class FrameProfiler:
+    def __init__(self, capacity=600):
+        """
+        Initialize the FrameProfiler object.
+
+        Records the time spent in each phase of every frame, plus entity counts, in
+        fixed-size ring buffers. Recording is a handful of perf_counter calls per
+        frame, so it can stay on in production builds.
+
+        :param capacity: Number of frames kept.
+        """
+        self.capacity = capacity
+        self.phase_times = {phase: array("d", [0.0]) * capacity for phase in PHASES}
+        self.counters = {name: array("l", [0]) * capacity for name in COUNTERS}
+        self.frames = 0       # Total frames recorded
+        self.index = 0        # Slot of the current frame
+        self.last = 0.0       # perf_counter at the last lap
+
+    def begin_frame(self):
+        """Start timing a new frame."""
+        self.index = self.frames % self.capacity
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        """
+        Record the time since the previous lap as the given phase.
+
+        :param phase: One of PHASES.
+        """
+        now = time.perf_counter()
+        self.phase_times[phase][self.index] = now - self.last
+        self.last = now
+
+    def end_frame(self, bombs=0, explosions=0, walls=0):
+        """
+        Finish the frame and store its entity counts.
+
+        :param bombs: Number of live bombs.
+        :param explosions: Number of live explosions.
+        :param walls: Number of walls.
+        """
+        index = self.index
+        self.counters["bombs"][index] = bombs
+        self.counters["explosions"][index] = explosions
+        self.counters["walls"][index] = walls
+        self.frames += 1
+
+    def recent(self):
+        """
+        Get the ring buffer slots in chronological order.
+
+        :return: List of slot indexes, oldest first.
+        """
+        count = min(self.frames, self.capacity)
+        start = self.frames - count
+        return [(start + i) % self.capacity for i in range(count)]
+
+    def frame_time(self, index):
+        """Get the total time of the frame stored in a slot."""
+        return sum(self.phase_times[phase][index] for phase in PHASES)
+
+    def averages(self, frames=60):
+        """
+        Get the average time of each phase over the latest frames.
+
+        :param frames: Number of frames to average.
+        :return: Dictionary mapping each phase to seconds.
+        """
+        slots = self.recent()[-frames:]
+        if not slots:
+            return {phase: 0.0 for phase in PHASES}
+        return {phase: sum(self.phase_times[phase][i] for i in slots) / len(slots) for phase in PHASES}
+
+    def dump(self, path):
+        """
+        Write the buffered frames to a CSV file.
+
+        :param path: Output file path.
+        """
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["frame"] + [f"{phase}_ms" for phase in PHASES] + ["total_ms"] + list(COUNTERS))
+            first = self.frames - min(self.frames, self.capacity)
+            for offset, index in enumerate(self.recent()):
+                times = [self.phase_times[phase][index] * 1000 for phase in PHASES]
+                writer.writerow([first + offset] + [round(t, 4) for t in times] + [round(sum(times), 4)]
+                                + [self.counters[name][index] for name in COUNTERS])
+
+
+class PerformanceOverlay:
+    def __init__(self, profiler):
+        """
+        Initialize the PerformanceOverlay object.
+
+        Shows FPS, the per-phase breakdown and a frame-time sparkline. Nothing is
+        drawn, or rendered, while the overlay is hidden.
+
+        :param profiler: The FrameProfiler to display.
+        """
+        self.profiler = profiler
+        self.visible = False
+        self.surface = None
+        self.rect = pygame.Rect((0, 0), OVERLAY_SIZE)
+        self.built_at = -OVERLAY_REFRESH_FRAMES
+
+    def toggle(self):
+        """Show or hide the overlay."""
+        self.visible = not self.visible
+        self.built_at = -OVERLAY_REFRESH_FRAMES
+
+    def build(self):
+        """Render the overlay contents onto its own surface."""
+        profiler = self.profiler
+        surface = pygame.Surface(OVERLAY_SIZE)
+        surface.fill(OVERLAY_BG)
+
+        averages = profiler.averages()
+        frame = sum(averages.values())
+        fps = 1 / frame if frame else 0
+        lines = [f"FPS {fps:5.1f}  frame {frame * 1000:5.2f}ms"]
+        lines += [f"{phase:<7}{averages[phase] * 1000:6.2f}ms" for phase in PHASES]
+        for i, line in enumerate(lines):
+            surface.blit(assets.text(line, OVERLAY_FONT_SIZE, OVERLAY_TEXT_COLOR), (6, 4 + i * 14))
+
+        # Frame-time sparkline, scaled to the slowest recent frame
+        times = [profiler.frame_time(i) for i in profiler.recent()[-OVERLAY_SIZE[0]:]]
+        if len(times) > 1:
+            top, height = 78, OVERLAY_SIZE[1] - 82
+            peak = max(times) or 1
+            points = [(x, top + height - int(t / peak * height)) for x, t in enumerate(times)]
+            pygame.draw.lines(surface, SPARKLINE_COLOR, False, points)
+
+        self.surface = surface
+        self.built_at = profiler.frames
+
+    def draw(self, screen):
+        """
+        Draw the overlay in the top-left corner if it is visible.
+
+        :param screen: The Pygame screen object.
+        :return: The rectangle drawn, or None if hidden.
+        """
+        if not self.visible:
+            return None
+        if self.profiler.frames - self.built_at >= OVERLAY_REFRESH_FRAMES:
+            self.build()
+        screen.blit(self.surface, self.rect)
+        return self.rect
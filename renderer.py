@@ -0,0 +1,134 @@
+import pygame
+from functools import partial
+from config import TILE_SIZE
+
+
+class DirtyRectRenderer:
+    def __init__(self, screen, state):
+        """
+        Initialize the DirtyRectRenderer object.
+
+        - Pre-renders the tile/wall layer into an offscreen surface.
+        - Tracks the rectangles covered by players, bombs and explosions so only
+          the parts of the screen that changed are pushed to the display.
+
+        :param screen: The Pygame screen object.
+        :param state: The GameState to draw.
+        """
+        self.screen = screen
+        self.state = state
+        self.board = pygame.Surface(screen.get_size())
+        self.board_dirty = True   # Whole board layer needs rebuilding
+        self.full_redraw = True   # Whole screen needs pushing
+        self.dirty_tiles = set()  # (row, col) cells to re-render on the board layer
+        self.sprites = {}         # sprite key -> Rect drawn last frame
+
+    def invalidate(self):
+        """Force the next frame to be fully redrawn (e.g. after a menu screen)."""
+        self.full_redraw = True
+
+    def invalidate_board(self):
+        """Rebuild the whole board layer on the next frame."""
+        self.board_dirty = True
+        self.full_redraw = True
+
+    def invalidate_tile(self, cell):
+        """
+        Re-render a single tile of the board layer on the next frame.
+
+        :param cell: (row, col) tuple of the tile that changed.
+        """
+        self.dirty_tiles.add(cell)
+
+    def build_board(self):
+        """Render every tile onto the offscreen board layer."""
+        self.board.fill((0, 0, 0))
+        for row in self.state.tiles:
+            for tile in row:
+                tile.draw(self.board)
+        self.board_dirty = False
+        self.dirty_tiles.clear()
+
+    def collect_sprites(self, alpha=1.0):
+        """
+        Collect the sprites to draw this frame, in drawing order.
+
+        :param alpha: Fraction of a tick elapsed, used to interpolate players.
+        :return: List of (key, rect, draw) tuples, where draw(screen) draws the
+                 sprite. The key changes whenever the sprite's appearance changes.
+        """
+        sprites = []
+        for player in self.state.players:
+            x, y = player.interpolated_position(alpha)
+            rect = pygame.Rect(x, y, TILE_SIZE, TILE_SIZE)
+            sprites.append((("player", player.player_num, x, y), rect, partial(player.draw, alpha=alpha)))
+        for bomb in self.state.bombs:
+            rect = pygame.Rect(bomb.x, bomb.y, TILE_SIZE, TILE_SIZE)
+            sprites.append((("bomb", bomb.x, bomb.y, bomb.type, bomb.turn), rect, bomb.draw))
+        for explosion in self.state.explosions:
+            radius = explosion.radius
+            for cell in explosion.cells:
+                row, col = cell
+                rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                sprites.append((("explosion", id(explosion), cell, radius), rect,
+                                partial(explosion.draw_cell, cell=cell)))
+        return sprites
+
+    def render(self, present=True, alpha=1.0):
+        """
+        Draw the frame, pushing only the dirty rectangles to the display.
+
+        :param alpha: Fraction of a tick elapsed since the last update.
+        :param present: Push the rectangles to the display. If False, the caller is
+                        expected to draw on top and call pygame.display.update itself.
+        :return: List of rectangles that were updated.
+        """
+        screen = self.screen
+        if self.board_dirty:
+            self.build_board()
+
+        dirty = []
+        for row, col in self.dirty_tiles:
+            tile = self.state.tiles[row][col]
+            tile.draw(self.board)
+            dirty.append(pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        self.dirty_tiles.clear()
+
+        sprites = self.collect_sprites(alpha)
+        current = {key: rect for key, rect, _ in sprites}
+
+        if self.full_redraw:
+            screen.blit(self.board, (0, 0))
+            for _, _, draw in sprites:
+                draw(screen)
+            if present:
+                pygame.display.flip()
+            self.full_redraw = False
+            self.sprites = current
+            return [screen.get_rect()]
+
+        # Sprites that moved, changed, appeared or disappeared
+        for key, rect in self.sprites.items():
+            if key not in current:
+                dirty.append(rect)
+        for key, rect in current.items():
+            if key not in self.sprites:
+                dirty.append(rect)
+        self.sprites = current
+
+        if not dirty:
+            return dirty
+
+        # Restore the board under each dirty area, then redraw the sprites over it.
+        # Clipping keeps translucent sprite edges from being blended twice.
+        for dirty_rect in dirty:
+            screen.set_clip(dirty_rect)
+            screen.blit(self.board, dirty_rect, dirty_rect)
+            for _, rect, draw in sprites:
+                if rect.colliderect(dirty_rect):
+                    draw(screen)
+        screen.set_clip(None)
+
+        if present:
+            pygame.display.update(dirty)
+        return dirty
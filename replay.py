@@ -0,0 +1,249 @@
+import argparse
+import struct
+import time
+import zlib
+from array import array
+from bomb import BOMB_TYPE_CODES, BOMB_TYPE_NAMES
+from game_state import GameState, pack_input, unpack_input
+from config import TICK_RATE
+
+MAGIC = b"BMRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHqI")  # magic, version, seed, bomb count
+SEED_MIN, SEED_MAX = -2 ** 63, 2 ** 63 - 1  # Seeds a replay header can store
+BOMB = struct.Struct("<HHBB")     # row, col, turn, type
+FLUSH_FRAMES = 4096  # Frames buffered before they are handed to the compressor
+
+
+class Replay:
+    def __init__(self, seed, bombs, frames=None):
+        """
+        Initialize the Replay object.
+
+        A replay is everything needed to re-run a match: the map seed, the initial
+        bomb layout and one packed input word per frame.
+
+        :param seed: Seed the GameState was created with.
+        :param bombs: Initial bomb layout, as (row, col, turn, bomb_type) tuples.
+        :param frames: array('H') of packed inputs, one per frame.
+        """
+        self.seed = seed
+        self.bombs = list(bombs)
+        self.frames = frames if frames is not None else array("H")
+
+    def __len__(self):
+        return len(self.frames)
+
+    @staticmethod
+    def pack_header(seed, bombs):
+        """
+        Encode the replay header and bomb layout.
+
+        :return: Bytes written at the start of a replay file.
+        """
+        parts = [HEADER.pack(MAGIC, VERSION, seed, len(bombs))]
+        for row, col, turn, bomb_type in bombs:
+            parts.append(BOMB.pack(row, col, turn, BOMB_TYPE_CODES[bomb_type]))
+        return b"".join(parts)
+
+    def save(self, path):
+        """
+        Write the replay to a file.
+
+        :param path: Output file path.
+        """
+        with open(path, "wb") as file:
+            file.write(Replay.pack_header(self.seed, self.bombs))
+            file.write(zlib.compress(self.frames.tobytes(), 9))
+
+    @staticmethod
+    def load(path):
+        """
+        Read a replay file.
+
+        :param path: Replay file path.
+        :return: A Replay.
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+
+        magic, version, seed, bomb_count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay file")
+
+        offset = HEADER.size
+        bombs = []
+        for _ in range(bomb_count):
+            row, col, turn, type_code = BOMB.unpack_from(data, offset)
+            bombs.append((row, col, turn, BOMB_TYPE_NAMES[type_code]))
+            offset += BOMB.size
+
+        frames = array("H")
+        frames.frombytes(zlib.decompress(data[offset:]))
+        return Replay(seed, bombs, frames)
+
+
+class ReplayRecorder:
+    def __init__(self, path, seed, state):
+        """
+        Initialize the ReplayRecorder object.
+
+        Streams packed inputs through a zlib compressor, so memory use stays flat
+        and an hour of play takes a few hundred kilobytes at most.
+
+        :param path: Output file path.
+        :param seed: Seed the GameState was created with.
+        :param state: The GameState, with its initial bombs already placed.
+        """
+        self.file = open(path, "wb")
+        self.file.write(Replay.pack_header(seed, state.bomb_layout()))
+        self.compressor = zlib.compressobj(9)
+        self.buffer = array("H")
+        self.frames = 0
+
+    def record(self, input_state):
+        """
+        Record the input of one frame.
+
+        :param input_state: Dictionary mapping the p1_*/p2_* actions to booleans.
+        """
+        self.buffer.append(pack_input(input_state))
+        self.frames += 1
+        if len(self.buffer) >= FLUSH_FRAMES:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered frames to the compressor."""
+        self.file.write(self.compressor.compress(self.buffer.tobytes()))
+        del self.buffer[:]
+
+    def close(self):
+        """Finish the compressed stream and close the file."""
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.write(self.compressor.flush())
+        self.file.close()
+
+
+class ReplayPlayer:
+    def __init__(self, replay, keyframe_interval=600):
+        """
+        Initialize the ReplayPlayer object.
+
+        Re-runs a replay deterministically. A snapshot of the state is kept every
+        keyframe_interval frames, so seeking only replays from the nearest keyframe.
+
+        :param replay: The Replay to play.
+        :param keyframe_interval: Frames between keyframes.
+        """
+        self.replay = replay
+        self.keyframe_interval = keyframe_interval
+        self.keyframes = {}  # frame -> StateSnapshot
+        self.state = self.initial_state()
+        self.frame = 0
+
+    def initial_state(self):
+        """
+        Create the state the replay starts from.
+
+        :return: A new GameState with the recorded map and bombs.
+        """
+        state = GameState(self.replay.seed)
+        state.load_bomb_layout(self.replay.bombs)
+        return state
+
+    @property
+    def finished(self):
+        """Whether every recorded frame has been played."""
+        return self.frame >= len(self.replay.frames)
+
+    def next_input(self):
+        """
+        Get the input of the next frame and advance the frame counter.
+
+        Used when another loop (e.g. the pygame frontend) steps the state.
+
+        :return: Input state dictionary, or None at the end of the replay.
+        """
+        if self.finished:
+            return None
+        if self.frame % self.keyframe_interval == 0 and self.frame not in self.keyframes:
+            self.keyframes[self.frame] = self.state.snapshot()
+        input_state = unpack_input(self.replay.frames[self.frame])
+        self.frame += 1
+        return input_state
+
+    def step(self):
+        """
+        Play one frame.
+
+        :return: Events of the frame, or None at the end of the replay.
+        """
+        input_state = self.next_input()
+        if input_state is None:
+            return None
+        return self.state.step(input_state)
+
+    def seek(self, frame):
+        """
+        Move to a frame by restoring the nearest earlier keyframe and replaying.
+
+        :param frame: Frame to seek to.
+        """
+        frame = max(0, min(frame, len(self.replay.frames)))
+        start = max((k for k in self.keyframes if k <= frame), default=None)
+        if start is None:
+            if frame < self.frame:
+                self.state, self.frame = self.initial_state(), 0
+        elif frame < self.frame or start > self.frame:
+            self.state.restore(self.keyframes[start])
+            self.frame = start
+        while self.frame < frame:
+            self.step()
+
+    def play(self, realtime=False, fps=TICK_RATE):
+        """
+        Play the rest of the replay.
+
+        :param realtime: Throttle to fps frames per second instead of max speed.
+        :param fps: Frame rate used in real time.
+        :return: The final GameState.
+        """
+        frame_time = 1 / fps
+        next_frame = time.perf_counter()
+        while self.step() is not None:
+            if realtime:
+                next_frame += frame_time
+                delay = next_frame - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        return self.state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a Bomberman replay headlessly.")
+    parser.add_argument("path", help="Replay file.")
+    parser.add_argument("--realtime", action="store_true", help="Play at the recorded frame rate.")
+    parser.add_argument("--seek", type=int, default=None, help="Seek to this frame instead of playing.")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.path)
+    player = ReplayPlayer(replay)
+    start = time.perf_counter()
+    if args.seek is not None:
+        player.seek(args.seek)
+        state = player.state
+    else:
+        state = player.play(realtime=args.realtime)
+    elapsed = time.perf_counter() - start
+
+    print(f"seed {replay.seed}, {len(replay)} frames, played to frame {player.frame} "
+          f"in {elapsed:.3f}s")
+    for player_state in state.players:
+        print(f"player {player_state.player_num}: ({player_state.x}, {player_state.y})")
+    print(f"bombs placed {state.bomb_counter}, live bombs {len(state.bombs)}")
+
+
+if __name__ == "__main__":
+    main()
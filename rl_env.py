@@ -0,0 +1,441 @@
+import argparse
+import time
+from collections import deque
+import numpy as np
+from array_board import EMPTY, WALL, BREAKABLE, NO_BOMB, PLAYER_BOMB, INITIAL_BOMB
+from level_pack import generate_levels
+from occupancy import NEIGHBOR_OFFSETS
+from player import ACTIONS, input_keys, spawn_cells
+from config import TILE_SIZE
+
+# Discrete actions, as the keys held for the tick
+ACTION_KEYS = ((), ("left",), ("right",), ("up",), ("down",), ("bomb",))
+ACTION_TABLE = np.array([[action in keys for action in ACTIONS] for keys in ACTION_KEYS], dtype=bool)
+
+# Observation channels; one more channel per player follows OBS_PLAYERS
+OBS_WALLS = 0
+OBS_BREAKABLES = 1
+OBS_PLAYER_BOMBS = 2
+OBS_BOMB_TURNS = 3  # Turns left on "initial" bombs
+OBS_PLAYERS = 4
+OBS_DTYPE = np.int8  # Every channel is a flag or a turn count; a quarter of the memory of float32
+
+PLAYER_SPEED = 5  # Pixels per tick, as in Player.move_towards_target
+MAX_TICKS = 3600
+
+
+def rewards_for_hits(hits, out):
+    """
+    Score a tick from the players each board's explosions hit.
+
+    A match ends when a player stands in a detonated cell, as in batch_runner:
+    players hit get -1 and the others +1. A tick where every player (or none)
+    was hit scores 0.
+
+    :param hits: Boolean array (..., players).
+    :param out: Float array of the same shape for the rewards.
+    :return: Boolean array (...) of the boards whose match ended.
+    """
+    any_hit = hits.any(axis=-1)
+    decided = any_hit & ~hits.all(axis=-1)
+    out[...] = np.where(hits, -1.0, 1.0) * decided[..., None]
+    return any_hit
+
+
+class BombermanEnv:
+    def __init__(self, levels=None, num_players=2, max_ticks=MAX_TICKS, seed=None):
+        """
+        Initialize the BombermanEnv object.
+
+        A Gym-style environment playing one match at a time on a GameState, with
+        one agent per player. Each step is one tick: every player holds the keys
+        of its action (see ACTION_KEYS) for that tick.
+
+        :param levels: Levels to start matches from, e.g. a LevelPack; a random one
+                       is picked on reset. Defaults to 64 generated levels.
+        :param num_players: Number of players.
+        :param max_ticks: Ticks before a match is cut short as a draw.
+        :param seed: Seed for picking levels.
+        """
+        self.levels = list(levels) if levels is not None else list(generate_levels(64))
+        self.num_players = num_players
+        self.max_ticks = max_ticks
+        self.rng = np.random.default_rng(seed)
+        self.player_keys = [input_keys(num)[-len(ACTIONS):] for num in range(1, num_players + 1)]
+        level = self.levels[0]
+        self.observation_shape = (OBS_PLAYERS + num_players, level.rows, level.cols)
+        self.obs = np.zeros(self.observation_shape, dtype=OBS_DTYPE)
+        self.rewards = np.zeros(num_players, dtype=np.float32)
+        self.state = None
+
+    def reset(self, level_index=None):
+        """
+        Start a new match.
+
+        :param level_index: Level to play, or None for a random one.
+        :return: The observation.
+        """
+        if level_index is None:
+            level_index = int(self.rng.integers(len(self.levels)))
+        self.state = self.levels[level_index].create_state(num_players=self.num_players)
+        return self.observe()
+
+    def step(self, actions):
+        """
+        Play one tick.
+
+        :param actions: One action index per player.
+        :return: (observation, rewards, done, info); info holds the players that
+                 were hit and whether the match was cut short by max_ticks.
+        """
+        input_state = {}
+        for keys, action in zip(self.player_keys, actions):
+            for key, pressed in zip(keys, ACTION_TABLE[action]):
+                input_state[key] = bool(pressed)
+
+        hits = np.zeros(self.num_players, dtype=bool)
+        for event in self.state.step(input_state):
+            if event["type"] == "player_hit":
+                hits[event["player"] - 1] = True
+        done = bool(rewards_for_hits(hits, self.rewards))
+        truncated = not done and self.state.tick >= self.max_ticks
+        return self.observe(), self.rewards.copy(), done or truncated, {"hits": hits, "truncated": truncated}
+
+    def observe(self):
+        """
+        Write the state into the observation array.
+
+        :return: The observation array, which the next reset() or step() overwrites;
+                 copy it to keep it.
+        """
+        state = self.state
+        obs = self.obs
+        obs[...] = 0
+        occupancy = state.occupancy
+        for row, col in occupancy.walls:
+            obs[OBS_BREAKABLES if (row, col) in occupancy.breakables else OBS_WALLS, row, col] = 1
+        for bomb in state.bombs:
+            row, col = bomb.cell
+            if bomb.type == "player":
+                obs[OBS_PLAYER_BOMBS, row, col] = 1
+            else:
+                obs[OBS_BOMB_TURNS, row, col] = bomb.turn
+        for player in state.players:
+            row, col = player.cell
+            obs[OBS_PLAYERS + player.player_num - 1, row, col] = 1
+        return obs
+
+
+class VectorBombermanEnv:
+    def __init__(self, num_envs, levels=None, num_players=2, max_ticks=MAX_TICKS, seed=None):
+        """
+        Initialize the VectorBombermanEnv object.
+
+        Plays num_envs matches at once, with the rules of GameState (players,
+        bomb queue, chain reactions, breakable walls) run on NumPy arrays that
+        hold every board: tile types, bombs and their turns, player positions and
+        each board's bomb queue. Player updates are vectorized across boards;
+        chain reactions run only on the boards whose queue sets a bomb off.
+
+        Levels are decoded once into a bank of arrays. A board whose match ends is
+        reset in place from the bank during step(), so no array is reallocated.
+
+        :param num_envs: Number of boards.
+        :param levels: Levels to start matches from, all the same size, e.g. a
+                       LevelPack. Defaults to 64 generated levels.
+        :param num_players: Number of players on each board.
+        :param max_ticks: Ticks before a match is cut short as a draw.
+        :param seed: Seed for picking levels.
+        """
+        levels = list(levels) if levels is not None else list(generate_levels(64))
+        rows, cols = levels[0].rows, levels[0].cols
+        if any(level.rows != rows or level.cols != cols for level in levels):
+            raise ValueError("every level of a VectorBombermanEnv must be the same size")
+        self.num_envs = num_envs
+        self.num_players = num_players
+        self.rows = rows
+        self.cols = cols
+        self.max_ticks = max_ticks
+        self.rng = np.random.default_rng(seed)
+
+        # Starting boards, taken from a GameState so spawn clearing matches the real rules
+        self.bank_tiles = np.zeros((len(levels), rows, cols), dtype=np.int8)
+        self.bank_bomb_types = np.zeros((len(levels), rows, cols), dtype=np.int8)
+        self.bank_bomb_turns = np.zeros((len(levels), rows, cols), dtype=np.int8)
+        for index, level in enumerate(levels):
+            state = level.create_state(num_players=num_players)
+            for row, col in state.occupancy.walls:
+                self.bank_tiles[index, row, col] = BREAKABLE if (row, col) in state.occupancy.breakables else WALL
+            for bomb in state.bombs:
+                self.bank_bomb_types[(index,) + bomb.cell] = PLAYER_BOMB if bomb.type == "player" else INITIAL_BOMB
+                self.bank_bomb_turns[(index,) + bomb.cell] = bomb.turn
+        self.spawn = np.array(spawn_cells(rows, cols, num_players), dtype=np.int32) * TILE_SIZE
+
+        boards = (num_envs, rows, cols)
+        self.tiles = np.zeros(boards, dtype=np.int8)
+        self.bomb_types = np.zeros(boards, dtype=np.int8)
+        self.bomb_turns = np.zeros(boards, dtype=np.int8)
+        self.bomb_ids = np.zeros(boards, dtype=np.int64)  # Tells a queued bomb from a later one on its cell
+        self.next_bomb_id = 1
+        players = (num_envs, num_players)
+        self.x = np.zeros(players, dtype=np.int32)  # Pixels, as Player.x/y/target_x/target_y
+        self.y = np.zeros(players, dtype=np.int32)
+        self.target_x = np.zeros(players, dtype=np.int32)
+        self.target_y = np.zeros(players, dtype=np.int32)
+        self.origin_row = np.zeros(players, dtype=np.int32)  # Player.origin_cell
+        self.origin_col = np.zeros(players, dtype=np.int32)
+        self.queue = np.zeros((num_envs, rows * cols, 3), dtype=np.int64)  # Ring of (row, col, bomb id)
+        self.queue_head = np.zeros(num_envs, dtype=np.int64)
+        self.queue_len = np.zeros(num_envs, dtype=np.int64)
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+        self.level_index = np.zeros(num_envs, dtype=np.int64)
+
+        self.obs = np.zeros((num_envs, OBS_PLAYERS + num_players, rows, cols), dtype=OBS_DTYPE)
+        self.rewards = np.zeros(players, dtype=np.float32)
+        self.hits = np.zeros(players, dtype=bool)
+        self.board_index = np.arange(num_envs)
+        # In-bounds orthogonal neighbors of each cell, in NEIGHBOR_OFFSETS order
+        self.neighbors = {(row, col): [(row + d_row, col + d_col) for d_row, d_col in NEIGHBOR_OFFSETS
+                                       if 0 <= row + d_row < rows and 0 <= col + d_col < cols]
+                          for row in range(rows) for col in range(cols)}
+
+    def reset(self, level_indexes=None):
+        """
+        Start a new match on every board.
+
+        :param level_indexes: Level to play on each board, or None for random ones.
+        :return: Observations, shaped (boards, channels, rows, cols).
+        """
+        for board in range(self.num_envs):
+            self.reset_board(board, None if level_indexes is None else level_indexes[board])
+        return self.observe()
+
+    def reset_board(self, board, level_index=None):
+        """
+        Start a new match on one board, copying a level from the bank into its arrays.
+
+        :param board: Board index.
+        :param level_index: Level to play, or None for a random one.
+        """
+        if level_index is None:
+            level_index = int(self.rng.integers(len(self.bank_tiles)))
+        self.level_index[board] = level_index
+        self.tiles[board] = self.bank_tiles[level_index]
+        self.bomb_types[board] = self.bank_bomb_types[level_index]
+        self.bomb_turns[board] = self.bank_bomb_turns[level_index]
+        self.bomb_ids[board] = 0
+        self.y[board], self.x[board] = self.spawn[:, 0], self.spawn[:, 1]
+        self.target_x[board] = self.x[board]
+        self.target_y[board] = self.y[board]
+        self.origin_row[board] = self.spawn[:, 0] // TILE_SIZE
+        self.origin_col[board] = self.spawn[:, 1] // TILE_SIZE
+        self.queue_head[board] = 0
+        self.queue_len[board] = 0
+        self.ticks[board] = 0
+
+    def step(self, actions):
+        """
+        Play one tick on every board, then reset the boards whose match ended.
+
+        :param actions: Integer array (boards, players) of action indexes.
+        :return: (observations, rewards, dones, info). Rewards are (boards,
+                 players). The observation of a finished board is the first one of
+                 its next match; info["hits"] and info["truncated"] describe the
+                 tick that ended it.
+        """
+        keys = ACTION_TABLE[np.asarray(actions)]  # (boards, players, len(ACTIONS))
+        self.hits[...] = False
+        for player in range(self.num_players):
+            self.update_player(player, keys[:, player])
+
+        # The oldest queued bomb explodes once three are queued
+        for board in np.flatnonzero(self.queue_len >= 3):
+            slot = self.queue_head[board]
+            row, col, bomb_id = self.queue[board, slot]
+            self.queue_head[board] = (slot + 1) % self.queue.shape[1]
+            self.queue_len[board] -= 1
+            self.explode(board, int(row), int(col), bomb_id)
+
+        self.ticks += 1
+        dones = rewards_for_hits(self.hits, self.rewards)
+        truncated = ~dones & (self.ticks >= self.max_ticks)
+        dones |= truncated
+        info = {"hits": self.hits.copy(), "truncated": truncated}
+        for board in np.flatnonzero(dones):
+            self.reset_board(board)
+        return self.observe(), self.rewards.copy(), dones, info
+
+    def update_player(self, player, keys):
+        """
+        Update one player on every board, as Player.update does.
+
+        :param player: Player index.
+        :param keys: Boolean array (boards, len(ACTIONS)) of the keys held.
+        """
+        x, y = self.x[:, player], self.y[:, player]
+        target_x, target_y = self.target_x[:, player], self.target_y[:, player]
+
+        # Players between cells keep moving and ignore input
+        moving = (x != target_x) | (y != target_y)
+        x += PLAYER_SPEED * np.sign(target_x - x) * moving
+        y += PLAYER_SPEED * np.sign(target_y - y) * moving
+        arrived = moving & (x == target_x) & (y == target_y)
+        self.origin_row[arrived, player] = target_y[arrived] // TILE_SIZE
+        self.origin_col[arrived, player] = target_x[arrived] // TILE_SIZE
+
+        left, right, up, down, bomb = (keys[:, i] for i in range(len(ACTIONS)))
+        move_left = left & (target_x > 0)
+        move_right = ~move_left & right & (target_x < (self.cols - 1) * TILE_SIZE)
+        move_up = up & (target_y > 0)
+        move_down = ~move_up & down & (target_y < (self.rows - 1) * TILE_SIZE)
+        new_x = target_x + TILE_SIZE * (move_right.astype(np.int32) - move_left)
+        new_y = target_y + TILE_SIZE * (move_down.astype(np.int32) - move_up)
+        new_row, new_col = new_y // TILE_SIZE, new_x // TILE_SIZE
+
+        accepted = ~moving & ~((left | right) & (up | down))  # No diagonal movement
+        accepted &= self.tiles[self.board_index, new_row, new_col] == EMPTY
+        for other in range(self.num_players):
+            if other != player:  # Players block the cell they leave and the cell they move to
+                accepted &= ~((self.origin_row[:, other] == new_row) & (self.origin_col[:, other] == new_col))
+                accepted &= ~((self.target_y[:, other] // TILE_SIZE == new_row)
+                              & (self.target_x[:, other] // TILE_SIZE == new_col))
+        target_x[accepted] = new_x[accepted]
+        target_y[accepted] = new_y[accepted]
+
+        # Drop a bomb on the (new) target cell and queue it
+        drop = accepted & bomb
+        drop &= self.bomb_types[self.board_index, new_row, new_col] == NO_BOMB
+        boards = np.flatnonzero(drop)
+        if not len(boards):
+            return
+        rows, cols = new_row[boards], new_col[boards]
+        ids = np.arange(self.next_bomb_id, self.next_bomb_id + len(boards))
+        self.next_bomb_id += len(boards)
+        self.bomb_types[boards, rows, cols] = PLAYER_BOMB
+        self.bomb_turns[boards, rows, cols] = 0
+        self.bomb_ids[boards, rows, cols] = ids
+        if self.queue_len.max() >= self.queue.shape[1]:
+            self.grow_queue()
+        slots = (self.queue_head[boards] + self.queue_len[boards]) % self.queue.shape[1]
+        self.queue[boards, slots] = np.stack([rows, cols, ids], axis=1)
+        self.queue_len[boards] += 1
+
+    def grow_queue(self):
+        """Double the bomb queue rings, unrolling each so it starts at slot 0."""
+        capacity = self.queue.shape[1]
+        order = (self.queue_head[:, None] + np.arange(capacity)) % capacity
+        unrolled = np.take_along_axis(self.queue, order[:, :, None], axis=1)
+        self.queue = np.concatenate([unrolled, np.zeros_like(unrolled)], axis=1)
+        self.queue_head[:] = 0
+
+    def explode(self, board, row, col, bomb_id):
+        """
+        Resolve a bomb going off on one board, as Bomb.explode does.
+
+        Follows resolve_chain() step for step, destroys the breakable walls next
+        to detonated cells and marks the players standing in them as hit.
+
+        :param board: Board index.
+        :param row: Row of the bomb.
+        :param col: Column of the bomb.
+        :param bomb_id: Id of the bomb, which may already have been removed by a chain.
+        """
+        types = self.bomb_types[board]
+        turns = self.bomb_turns[board]
+        tiles = self.tiles[board]
+        neighbors = self.neighbors
+
+        def has_neighboring_bomb(cell):
+            return any(types[neighbor] != NO_BOMB for neighbor in neighbors[cell])
+
+        origin = (row, col)
+        if types[origin] != NO_BOMB and self.bomb_ids[board][origin] == bomb_id:
+            types[origin] = NO_BOMB
+            turns[origin] = 0
+        detonated = [origin]
+        to_explode = deque([origin])
+        processed = {origin}
+        while to_explode:
+            for neighbor in neighbors[to_explode.popleft()]:
+                if neighbor in processed or types[neighbor] == NO_BOMB:
+                    continue
+                if types[neighbor] == PLAYER_BOMB or turns[neighbor] <= 0:
+                    types[neighbor] = NO_BOMB
+                    turns[neighbor] = 0
+                    detonated.append(neighbor)
+                else:  # An "initial" bomb with turns left
+                    turns[neighbor] -= 1
+                    if not has_neighboring_bomb(neighbor):
+                        continue
+                processed.add(neighbor)
+                to_explode.append(neighbor)
+
+        for cell in detonated:
+            for neighbor in neighbors[cell]:
+                if tiles[neighbor] == BREAKABLE:
+                    tiles[neighbor] = EMPTY
+
+        detonated = set(detonated)
+        for player in range(self.num_players):
+            cells = {(self.origin_row[board, player], self.origin_col[board, player]),
+                     (self.target_y[board, player] // TILE_SIZE, self.target_x[board, player] // TILE_SIZE)}
+            if not cells.isdisjoint(detonated):
+                self.hits[board, player] = True
+
+    def observe(self):
+        """
+        Write every board into the observation array.
+
+        :return: The observation array, which the next reset() or step() overwrites;
+                 copy it to keep it.
+        """
+        obs = self.obs
+        np.equal(self.tiles, WALL, out=obs[:, OBS_WALLS], casting="unsafe")
+        np.equal(self.tiles, BREAKABLE, out=obs[:, OBS_BREAKABLES], casting="unsafe")
+        np.equal(self.bomb_types, PLAYER_BOMB, out=obs[:, OBS_PLAYER_BOMBS], casting="unsafe")
+        np.multiply(self.bomb_turns, self.bomb_types == INITIAL_BOMB, out=obs[:, OBS_BOMB_TURNS], casting="unsafe")
+        obs[:, OBS_PLAYERS:] = 0
+        for player in range(self.num_players):
+            obs[self.board_index, OBS_PLAYERS + player, self.target_y[:, player] // TILE_SIZE,
+                self.target_x[:, player] // TILE_SIZE] = 1
+        return obs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare stepping boards one by one and all at once.")
+    parser.add_argument("--envs", type=int, default=1024, help="Number of boards.")
+    parser.add_argument("--ticks", type=int, default=200, help="Ticks to step.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the levels and actions.")
+    parser.add_argument("--breakable", type=float, default=0.2, metavar="CHANCE",
+                        help="Chance of each free cell holding a breakable wall.")
+    args = parser.parse_args(argv)
+
+    levels = list(generate_levels(16, args.seed, breakable_chance=args.breakable))
+    rng = np.random.default_rng(args.seed)
+    actions = rng.integers(len(ACTION_KEYS), size=(args.ticks, args.envs, 2))
+
+    vector = VectorBombermanEnv(args.envs, levels, seed=args.seed)
+    vector.reset()
+    start = time.perf_counter()
+    for tick_actions in actions:
+        vector.step(tick_actions)
+    vector_time = time.perf_counter() - start
+
+    # Input states of every pair of actions, built up front so only GameState.step is timed
+    keys = input_keys(2)
+    input_states = {(first, second): dict(zip(keys, map(bool, np.concatenate(ACTION_TABLE[[first, second]]))))
+                    for first in range(len(ACTION_KEYS)) for second in range(len(ACTION_KEYS))}
+    states = [levels[i % len(levels)].create_state() for i in range(args.envs)]
+    start = time.perf_counter()
+    for tick_actions in actions:
+        for state, (first, second) in zip(states, tick_actions.tolist()):
+            state.step(input_states[first, second])
+    single_time = time.perf_counter() - start
+
+    print(f"{args.envs} boards x {args.ticks} ticks: one by one {single_time / args.ticks * 1000:.2f}ms/tick, "
+          f"vectorized {vector_time / args.ticks * 1000:.2f}ms/tick "
+          f"({single_time / vector_time:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
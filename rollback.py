@@ -0,0 +1,116 @@
+import argparse
+import random
+import time
+from bomb import Bomb
+from game_state import GameState, random_input_state
+
+
+class RollbackBuffer:
+    def __init__(self, state, capacity=60):
+        """
+        Initialize the RollbackBuffer object.
+
+        Keeps a snapshot of the state and the input of each of the last `capacity`
+        ticks. When an input for a past tick turns out to be wrong (e.g. a remote
+        player's input arrives late), the state is rolled back to that tick and
+        the ticks since are simulated again with the corrected input.
+
+        :param state: The GameState.
+        :param capacity: Number of ticks that can be rolled back.
+        """
+        self.state = state
+        self.capacity = capacity
+        self.snapshots = [None] * capacity  # Ring of (tick, snapshot, input_state), indexed by tick
+        self.rollbacks = 0
+
+    def step(self, input_state):
+        """
+        Snapshot the state, then step it.
+
+        :param input_state: Input state of the tick.
+        :return: Events of the tick.
+        """
+        state = self.state
+        self.snapshots[state.tick % self.capacity] = (state.tick, state.snapshot(), input_state)
+        return state.step(input_state)
+
+    def oldest_tick(self):
+        """Earliest tick that can still be rolled back to."""
+        return max(0, self.state.tick - self.capacity)
+
+    def correct(self, tick, input_state):
+        """
+        Replace the input of a past tick and simulate again from there.
+
+        :param tick: Tick whose input changed.
+        :param input_state: Corrected input state of that tick.
+        :return: Events of the ticks simulated again, tile changes of the rollback first.
+        """
+        current = self.state.tick
+        if not self.oldest_tick() <= tick < current:
+            raise ValueError(f"tick {tick} is outside the rollback window "
+                             f"({self.oldest_tick()} to {current - 1})")
+        entry = self.snapshots[tick % self.capacity]
+        events = self.state.restore(entry[1])
+        self.snapshots[tick % self.capacity] = (tick, entry[1], input_state)
+        self.rollbacks += 1
+        for replay_tick in range(tick, current):
+            replay_input = self.snapshots[replay_tick % self.capacity][2]
+            if replay_tick > tick:
+                self.snapshots[replay_tick % self.capacity] = (replay_tick, self.state.snapshot(), replay_input)
+            events.extend(self.state.step(replay_input))
+        return events
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure snapshot, restore and rollback costs.")
+    parser.add_argument("--seed", type=int, default=0, help="Map seed.")
+    parser.add_argument("--ticks", type=int, default=600, help="Ticks played before measuring.")
+    parser.add_argument("--frames", type=int, default=30, help="Ticks rolled back and simulated again.")
+    parser.add_argument("--breakable", type=float, default=0.2, metavar="CHANCE",
+                        help="Chance of each free cell holding a breakable wall.")
+    args = parser.parse_args(argv)
+
+    state = GameState(args.seed, breakable_chance=args.breakable)
+    Bomb.add_initial_bombs(state, 5)
+    rng = random.Random(args.seed)
+    buffer = RollbackBuffer(state, capacity=max(60, args.frames + 1))
+    for _ in range(args.ticks):
+        buffer.step(random_input_state(rng))
+    runs = 1000
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        snapshot = state.snapshot()
+    snapshot_time = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    for _ in range(runs):
+        state.restore(snapshot)
+    restore_time = (time.perf_counter() - start) / runs
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        checksum = state.checksum()
+    checksum_time = (time.perf_counter() - start) / runs
+    start = time.perf_counter()
+    full_checksum = state.full_checksum()
+    full_checksum_time = time.perf_counter() - start
+    if checksum != full_checksum:
+        raise AssertionError("incremental checksum does not match the recomputed one")
+
+    expected = state.checksum()
+    tick = state.tick - args.frames
+    start = time.perf_counter()
+    buffer.correct(tick, buffer.snapshots[tick % buffer.capacity][2])
+    rollback_time = time.perf_counter() - start
+    if state.checksum() != expected:
+        raise AssertionError("rolling back with the same inputs changed the state")
+
+    print(f"snapshot {snapshot_time * 1e6:.1f}us ({snapshot.nbytes} bytes of arrays), "
+          f"restore {restore_time * 1e6:.1f}us")
+    print(f"checksum {checksum_time * 1e6:.2f}us incremental, {full_checksum_time * 1e6:.1f}us recomputed")
+    print(f"rolling back {args.frames} ticks and simulating them again takes {rollback_time * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
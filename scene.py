@@ -0,0 +1,229 @@
+import pygame
+from assets import (assets, ASSETS_LOADED, PROMPT_TEXT, PROMPT_FONT_SIZE, PROMPT_COLOR,
+                    TURNS_FONT_SIZE, TURNS_COLOR, TURNS_TEXT)
+from config import WIDTH, HEIGHT, TILE_SIZE
+
+# Events that can change what a window shows without any input
+REDRAW_EVENTS = {pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWSHOWN,
+                 ASSETS_LOADED}
+PLACEMENT_BACKGROUND = (193, 245, 241)
+
+
+class Scene:
+    def __init__(self):
+        """
+        Initialize the Scene object.
+
+        A scene is a screen waiting for input, such as a menu. It only reacts to
+        events and is redrawn only when an event changed it, so run_scene() can
+        sleep between events instead of spinning.
+        """
+        self.done = False
+        self.result = None
+
+    def handle_event(self, event):
+        """
+        React to one event.
+
+        :param event: The pygame event.
+        :return: True if the scene needs to be redrawn.
+        """
+        return False
+
+    def draw(self, screen, full):
+        """
+        Draw the scene.
+
+        :param screen: The Pygame screen object.
+        :param full: Draw everything, e.g. the first time or after the window was
+                     covered, rather than only what changed since the last draw.
+        :return: List of rectangles drawn, or None for the whole screen.
+        """
+        raise NotImplementedError
+
+
+def run_scene(screen, scene, on_frame=None):
+    """
+    Show a scene until it is done.
+
+    The loop blocks in pygame.event.wait(), so an idle scene uses no CPU, and
+    redraws (and pushes to the display) only what the events changed.
+
+    :param screen: The Pygame screen object.
+    :param scene: The Scene to run.
+    :param on_frame: Optional callable run after each frame is pushed to the display.
+    :return: The scene's result.
+    """
+    full = True
+    changed = True
+    while not scene.done:
+        if changed or full:
+            rects = scene.draw(screen, full)
+            if rects is None:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update(rects)
+            full = changed = False
+            if on_frame is not None:
+                on_frame()
+
+        # Sleep until something happens, then handle everything that is queued
+        for event in [pygame.event.wait()] + pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                exit()
+            elif event.type in REDRAW_EVENTS:
+                full = True
+            elif scene.handle_event(event):
+                changed = True
+            if scene.done:
+                break
+    return scene.result
+
+
+class PromptScene(Scene):
+    def __init__(self):
+        """Initialize the Yes/No prompt asking whether to place bombs manually."""
+        super().__init__()
+        self.result = False
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_y:
+                self.result = True
+                self.done = True
+            elif event.key == pygame.K_n:
+                self.done = True
+        return False  # The prompt never changes; it just closes
+
+    def draw(self, screen, full):
+        screen.fill((30, 30, 30))
+        bg_image = assets.background(wait=False)  # None if missing or still loading
+        if bg_image is not None:
+            screen.blit(bg_image, (0, 0))
+        text = assets.text(PROMPT_TEXT, PROMPT_FONT_SIZE, PROMPT_COLOR)
+        screen.blit(text, (WIDTH // 2 - text.get_width() // 2, HEIGHT // 2 - 50))
+        return None
+
+
+class PlacementScene(Scene):
+    def __init__(self, tiles, protected):
+        """
+        Initialize the bomb placement screen.
+
+        Clicking an empty cell toggles a bomb on it; Enter finishes once at least
+        one bomb is placed. Only the clicked cell is redrawn.
+
+        :param tiles: 2D tiles grid of the map.
+        :param protected: Set of (row, col) cells where bombs may not be placed.
+        """
+        super().__init__()
+        self.tiles = tiles
+        self.protected = protected
+        # A tile is empty if it is not protected and is an empty tile (not a wall or a breakable wall)
+        self.empty_tiles = {(row, col) for row, row_tiles in enumerate(tiles)
+                            for col, tile in enumerate(row_tiles)
+                            if (row, col) not in protected and tile.tile_type == 0}
+        self.placed = {}  # (row, col) -> None, used as an insertion-ordered set
+        self.dirty_cells = set()
+        self.result = []
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            col, row = event.pos[0] // TILE_SIZE, event.pos[1] // TILE_SIZE
+            if (row, col) in self.empty_tiles:
+                if (row, col) in self.placed:
+                    del self.placed[(row, col)]  # Remove if clicked again
+                else:
+                    self.placed[(row, col)] = None  # Add bomb location
+                self.dirty_cells.add((row, col))
+                return True
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN and self.placed:  # Finish selection
+                self.result = list(self.placed)
+                self.done = True
+        return False
+
+    def draw_cell(self, screen, cell):
+        """Draw one cell of the placement grid."""
+        row, col = cell
+        rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        if self.tiles[row][col].tile_type:  # Walls and breakable walls are black
+            pygame.draw.rect(screen, (0, 0, 0), rect)
+        elif cell in self.protected:
+            pygame.draw.rect(screen, (75, 82, 89), rect)
+        elif cell in self.empty_tiles:
+            pygame.draw.rect(screen, (0, 0, 0), rect, 2)
+
+        # If already selected, fill it in
+        if cell in self.placed:
+            pygame.draw.rect(screen, (200, 50, 50), rect.inflate(-10, -10))
+        return rect
+
+    def draw(self, screen, full):
+        if full:
+            screen.fill(PLACEMENT_BACKGROUND)
+            for row, row_tiles in enumerate(self.tiles):
+                for col in range(len(row_tiles)):
+                    self.draw_cell(screen, (row, col))
+            self.dirty_cells.clear()
+            return None
+
+        rects = []
+        for cell in self.dirty_cells:
+            rect = pygame.Rect(cell[1] * TILE_SIZE, cell[0] * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            screen.fill(PLACEMENT_BACKGROUND, rect)
+            rects.append(self.draw_cell(screen, cell))
+        self.dirty_cells.clear()
+        return rects
+
+
+class TurnsScene(Scene):
+    def __init__(self, placed_bombs):
+        """
+        Initialize the screen asking for the turns of each placed bomb.
+
+        Keys 1-3 give the next bomb its turns; Enter finishes once every bomb has them.
+
+        :param placed_bombs: List of (row, col) tuples where bombs were placed.
+        """
+        super().__init__()
+        self.placed_bombs = placed_bombs
+        self.result = {}  # Turns for each bomb position
+
+    def handle_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return False
+        bomb_turns = self.result
+        if event.key == pygame.K_RETURN and len(bomb_turns) == len(self.placed_bombs):
+            self.done = True
+        elif pygame.K_1 <= event.key <= pygame.K_3 and len(bomb_turns) < len(self.placed_bombs):
+            turn = event.key - pygame.K_0  # Convert key to integer
+            bomb_turns[self.placed_bombs[len(bomb_turns)]] = turn  # Assign turn
+            return True
+        return False
+
+    def line_rect(self, index):
+        """Screen area of one bomb's line of text."""
+        return pygame.Rect(20, 50 + index * 30, WIDTH - 20, 30)
+
+    def draw_line(self, screen, index):
+        """Draw one bomb's line of text."""
+        row, col = self.placed_bombs[index]
+        turn_text = assets.text(f"Bomb {index + 1}: ({row},{col}) - Turns: {self.result.get((row, col), '?')}",
+                                TURNS_FONT_SIZE, TURNS_COLOR)
+        rect = self.line_rect(index)
+        screen.fill((30, 30, 30), rect)
+        screen.blit(turn_text, rect.topleft)
+        return rect
+
+    def draw(self, screen, full):
+        if full:
+            screen.fill((30, 30, 30))
+            screen.blit(assets.text(TURNS_TEXT, TURNS_FONT_SIZE, TURNS_COLOR), (20, 20))
+            for index in range(len(self.placed_bombs)):
+                self.draw_line(screen, index)
+            return None
+        # Only the line of the bomb that just got its turns changed
+        index = len(self.result) - 1
+        return [self.draw_line(screen, index)] if index >= 0 else []
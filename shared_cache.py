@@ -0,0 +1,50 @@
+SHARED_CACHE_CAPACITY = 32  # Tables kept before the least recently used one is dropped
+
+
+class SharedCache:
+    def __init__(self, capacity=SHARED_CACHE_CAPACITY):
+        """
+        Initialize the SharedCache object.
+
+        Holds data that depends only on a few settings, such as the tiles of a
+        map size, so every match in the process with those settings uses one
+        copy instead of building its own. Matches share what they get, so it
+        must never be modified. Sprites are shared the same way by the assets
+        module's AssetManager.
+
+        :param capacity: Number of tables kept; once full, the table used least
+                         recently is dropped, so a process that sees many sizes
+                         does not keep them all. Matches holding a dropped table
+                         keep it until they end.
+        """
+        self.capacity = capacity
+        self.tables = {}  # Key -> table, least recently used first
+
+    def __len__(self):
+        return len(self.tables)
+
+    def get(self, key, build):
+        """
+        Get a shared table, building it on first use.
+
+        :param key: Hashable key naming the table and its settings,
+                    e.g. ("tiles", rows, cols).
+        :param build: Callable returning the table.
+        :return: The table.
+        """
+        tables = self.tables
+        table = tables.pop(key, None)
+        if table is None:
+            table = build()
+            while len(tables) >= self.capacity:
+                del tables[next(iter(tables))]
+        tables[key] = table
+        return table
+
+    def clear(self):
+        """Drop every table."""
+        self.tables.clear()
+
+
+# Shared by every match in the process
+shared = SharedCache()
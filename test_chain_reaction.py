@@ -0,0 +1,215 @@
+import random
+import pytest
+from bomb import Bomb, QUEUED
+from config import TILE_SIZE, MatchConfig
+from danger_map import DangerMap
+from game_state import GameState
+
+SEEDS = range(12)
+
+
+class ReferenceBomb:
+    def __init__(self, row, col, turn, bomb_type):
+        self.row = row
+        self.col = col
+        self.turn = turn
+        self.type = bomb_type
+
+
+def reference_has_neighboring_bomb(bombs, row, col):
+    """Bomb.has_neighboring_bomb before chain_reaction, on (row, col) cells."""
+    for n_row, n_col in ((row, col + 1), (row, col - 1), (row + 1, col), (row - 1, col)):
+        for bomb in bombs:
+            if bomb.row == n_row and bomb.col == n_col:
+                return True
+    return False
+
+
+def reference_explode(bombs, origin_bomb):
+    """
+    Bomb.explode before chain_reaction, on (row, col) cells instead of pixels.
+
+    :param bombs: List of ReferenceBombs on the board; detonated bombs are removed from it.
+    :param origin_bomb: The ReferenceBomb that exploded, on the board or not.
+    :return: List of the cells whose bombs were removed by the chain, in order, and
+             list of (cell, new turn) for each decremented bomb.
+    """
+    detonated = []
+    decremented = []
+    to_explode = [(origin_bomb.row, origin_bomb.col)]
+    processed = set()
+
+    if origin_bomb in bombs:
+        bombs.remove(origin_bomb)
+
+    while to_explode:
+        row, col = to_explode.pop(0)
+        processed.add((row, col))
+
+        for n_row, n_col in ((row, col + 1), (row, col - 1), (row + 1, col), (row - 1, col)):
+            for bomb in bombs[:]:
+                if bomb.row == n_row and bomb.col == n_col and (bomb.row, bomb.col) not in processed:
+                    if bomb.type == "player":
+                        bombs.remove(bomb)
+                        detonated.append((bomb.row, bomb.col))
+                        to_explode.append((bomb.row, bomb.col))
+                        processed.add((bomb.row, bomb.col))
+                    else:
+                        if bomb.turn > 0:
+                            bomb.turn -= 1
+                            decremented.append(((bomb.row, bomb.col), bomb.turn))
+                            if reference_has_neighboring_bomb(bombs, bomb.row, bomb.col):
+                                to_explode.append((bomb.row, bomb.col))
+                                processed.add((bomb.row, bomb.col))
+                        else:
+                            bombs.remove(bomb)
+                            detonated.append((bomb.row, bomb.col))
+                            to_explode.append((bomb.row, bomb.col))
+                            processed.add((bomb.row, bomb.col))
+    return detonated, decremented
+
+
+def random_board(seed, size=90, num_bombs=3000, queued=60, bots=()):
+    """
+    Create a game with thousands of random bombs and its reference copy.
+
+    :return: (GameState, dictionary of Bomb -> ReferenceBomb, list of ReferenceBombs
+             on the board, list of queued ReferenceBombs).
+    """
+    rng = random.Random(seed)
+    state = GameState(seed, config=MatchConfig(rows=size, cols=size, wall_chance=0.1, bots=bots))
+    free = [(row, col) for row in range(size) for col in range(size) if not state.occupancy.is_wall((row, col))]
+    pairs = {}
+    reference_bombs = []
+    for row, col in rng.sample(free, num_bombs):
+        if rng.random() < 0.3:
+            turn, bomb_type = 0, "player"
+        else:
+            turn, bomb_type = rng.randint(0, 3), "initial"
+        bomb = Bomb(col * TILE_SIZE, row * TILE_SIZE, state, turn, bomb_type)
+        state.add_bomb(bomb)
+        pairs[bomb] = ReferenceBomb(row, col, turn, bomb_type)
+        reference_bombs.append(pairs[bomb])
+
+    player_bombs = [bomb for bomb in state.bombs if bomb.type == "player"]
+    reference_queue = []
+    for bomb in rng.sample(player_bombs, queued):
+        state.queue_bomb(bomb)
+        reference_queue.append(pairs[bomb])
+    return state, pairs, reference_bombs, reference_queue
+
+
+def assert_same_board(state, reference_bombs):
+    assert {bomb.cell: bomb.turn for bomb in state.bombs} == {
+        (bomb.row, bomb.col): bomb.turn for bomb in reference_bombs}
+    assert state.occupancy.bombs.keys() == {bomb.cell for bomb in state.bombs}
+
+
+def explode_and_compare(state, pairs, reference_bombs, rng, explosions):
+    """
+    Explode random bombs of a board and its reference copy and compare the results.
+
+    :return: Number of bombs detonated by the largest chain.
+    """
+    largest = 0
+    for _ in range(explosions):
+        if not state.bombs:
+            break
+        bomb = rng.choice(list(state.bombs))
+        expected_detonated, expected_decremented = reference_explode(reference_bombs, pairs[bomb])
+
+        chain = bomb.explode()
+
+        assert chain.detonated[0] == chain.origin
+        assert chain.detonated[1:] == expected_detonated
+        assert chain.decremented == expected_decremented
+        assert_same_board(state, reference_bombs)
+        largest = max(largest, len(chain.detonated))
+    return largest
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_explode_matches_reference(seed):
+    state, pairs, reference_bombs, _ = random_board(seed)
+    explode_and_compare(state, pairs, reference_bombs, random.Random(seed), 40)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_long_chains_match_reference(seed):
+    # Dense enough that one detonation sets off a large part of the board
+    state, pairs, reference_bombs, _ = random_board(seed, size=60, num_bombs=2500)
+    largest = explode_and_compare(state, pairs, reference_bombs, random.Random(seed), 5)
+    assert largest > 100
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_queue_matches_reference(seed):
+    state, pairs, reference_bombs, reference_queue = random_board(seed)
+    queue = list(state.bomb_queue)
+    assert [pairs[bomb] for bomb in queue] == reference_queue
+
+    # Queued bombs removed by an earlier chain still explode from their cell when their turn comes
+    while len(reference_queue) >= 3:
+        first = state.bomb_queue[0]
+        reference_explode(reference_bombs, reference_queue.pop(0))
+        state.step({})
+        assert first not in state.bombs
+        assert not state.bomb_pool.flags[first.index] & QUEUED
+        assert [pairs[bomb] for bomb in state.bomb_queue] == reference_queue
+        assert_same_board(state, reference_bombs)
+
+    assert state.checksum() == state.full_checksum()
+
+
+def test_chain_result_depth():
+    state = GameState(0, config=MatchConfig(rows=9, cols=9, wall_chance=0.0))
+    for col in range(1, 6):
+        state.add_bomb(Bomb(col * TILE_SIZE, 4 * TILE_SIZE, state))
+
+    chain = state.occupancy.bomb_at((4, 1)).explode()
+
+    assert chain.detonated == [(4, col) for col in range(1, 6)]
+    assert chain.depth == 4
+    assert not state.bombs
+
+
+def count_neighbor_calls(state):
+    """Count the occupancy.neighbors calls made on a state from now on."""
+    calls = [0]
+    neighbors = state.occupancy.neighbors
+
+    def counted(cell):
+        calls[0] += 1
+        return neighbors(cell)
+    state.occupancy.neighbors = counted
+    return calls
+
+
+def cluster_cells(danger_map):
+    danger_map.split_dirty()
+    return sorted(sorted(cluster) for cluster in danger_map.clusters.values())
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_danger_map_does_not_slow_chains(seed):
+    plain = random_board(seed, size=60, num_bombs=2500)[0]
+    watched = random_board(seed, size=60, num_bombs=2500, bots=(2,))[0]
+    plain_calls = count_neighbor_calls(plain)
+    watched_calls = count_neighbor_calls(watched)
+    rng = random.Random(seed)
+
+    largest = 0
+    for _ in range(5):
+        watched.danger_map.danger_cells()
+        bomb = rng.choice(list(watched.bombs))
+        before = plain_calls[0], watched_calls[0]
+        chain = plain.occupancy.bomb_at(bomb.cell).explode()
+        assert bomb.explode().detonated == chain.detonated
+        largest = max(largest, len(chain.detonated))
+
+        # Removing bombs leaves the clusters to be split once, when the danger is next read
+        assert watched_calls[0] - before[1] == plain_calls[0] - before[0]
+        fresh = DangerMap(watched)
+        assert cluster_cells(watched.danger_map) == cluster_cells(fresh)
+        assert watched.danger_map.danger_cells() == fresh.danger_cells()
+    assert largest > 100
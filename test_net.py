@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+import net_server
+from net_client import ScriptedClient, local_match, random_script
+from net_protocol import MSG_INPUT, capture_snapshot, frame
+
+TICKS = 600
+PRESS_CHANCE = 0.03  # Low enough that most matches run for hundreds of ticks
+
+
+class RecordingClient(ScriptedClient):
+    def __init__(self, script, drop_every=0, malformed_at=None):
+        """
+        A scripted client keeping every snapshot it decodes.
+
+        :param drop_every: Skip the input (and so the acknowledgement) of every
+                           drop_every-th snapshot; 0 answers all of them.
+        :param malformed_at: Snapshot id after which an undecodable input is sent.
+        """
+        super().__init__(script)
+        self.received = {}
+        self.drop_every = drop_every
+        self.malformed_at = malformed_at
+        self.dropped = 0
+
+    def on_snapshot(self, snapshot):
+        self.received[self.latest_id] = snapshot
+        if self.latest_id == self.malformed_at:
+            self.send(MSG_INPUT, b"\x01")  # Too short for INPUT
+        elif self.drop_every and self.latest_id % self.drop_every == 0:
+            self.dropped += 1
+        else:
+            super().on_snapshot(snapshot)
+
+
+@pytest.fixture
+def sent_snapshots(monkeypatch):
+    """Every snapshot the server captures, in order; snapshot ids count from 1."""
+    snapshots = []
+
+    def capture(state, tiles):
+        snapshots.append(capture_snapshot(state, tiles))
+        return snapshots[-1]
+    monkeypatch.setattr(net_server, "capture_snapshot", capture)
+    return snapshots
+
+
+def play(clients, seed):
+    """Play a local match, failing on any exception the event loop swallowed."""
+    errors = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        return await local_match(seed, tick_rate=1200, max_ticks=TICKS, clients=clients)
+    match, _ = asyncio.run(run())
+    assert not errors
+    return match
+
+
+def assert_in_sync(client, match, sent_snapshots):
+    assert client.received
+    for snapshot_id, snapshot in client.received.items():
+        assert snapshot == sent_snapshots[snapshot_id - 1]
+    assert client.latest == capture_snapshot(match.state, match.tiles)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_clients_stay_in_sync(seed, sent_snapshots):
+    clients = [RecordingClient(random_script(seed + 1, PRESS_CHANCE)),
+               RecordingClient(random_script(seed + 2, PRESS_CHANCE), drop_every=3)]
+    match = play(clients, seed)
+
+    assert match.winner is not None
+    assert match.state.tick >= 50
+    assert clients[1].dropped
+    assert match.state.checksum() == match.state.full_checksum()
+    for client in clients:
+        assert client.winner == match.winner
+        assert_in_sync(client, match, sent_snapshots)
+
+
+def test_malformed_message_drops_client(sent_snapshots):
+    clients = [RecordingClient(random_script(1), malformed_at=5), RecordingClient(random_script(2))]
+    match = play(clients, 0)
+
+    assert match.winner == 2
+    assert match.state.tick < TICKS
+    assert clients[0].winner is None
+    assert clients[1].winner == 2
+    assert_in_sync(clients[1], match, sent_snapshots)
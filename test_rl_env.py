@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from array_board import EMPTY, WALL, BREAKABLE, NO_BOMB, PLAYER_BOMB, INITIAL_BOMB
+from level_pack import generate_levels
+from player import ACTIONS, input_keys
+from rl_env import ACTION_KEYS, ACTION_TABLE, BombermanEnv, VectorBombermanEnv
+
+ACTION_CHANCES = (0.1, 0.15, 0.15, 0.15, 0.15, 0.3)  # Biased towards bombs, so chains go off often
+BOARDS = 24
+TICKS = 800
+
+
+def board_arrays(state):
+    """Get a GameState's tiles, bomb types and bomb turns in VectorBombermanEnv's encoding."""
+    shape = (state.config.rows, state.config.cols)
+    tiles = np.full(shape, EMPTY, dtype=np.int8)
+    bomb_types = np.full(shape, NO_BOMB, dtype=np.int8)
+    bomb_turns = np.zeros(shape, dtype=np.int8)
+    for cell in state.occupancy.walls:
+        tiles[cell] = BREAKABLE if cell in state.occupancy.breakables else WALL
+    for bomb in state.bombs:
+        bomb_types[bomb.cell] = PLAYER_BOMB if bomb.type == "player" else INITIAL_BOMB
+        bomb_turns[bomb.cell] = bomb.turn
+    return tiles, bomb_types, bomb_turns
+
+
+def input_state(keys, actions):
+    """Get the GameState input of one action per player."""
+    return {key: bool(pressed) for player_keys, action in zip(keys, actions)
+            for key, pressed in zip(player_keys, ACTION_TABLE[action])}
+
+
+@pytest.mark.parametrize("num_players", [2, 3])
+def test_vector_env_matches_game_state(num_players):
+    levels = list(generate_levels(6, 3, bombs=12, breakable_chance=0.3))
+    env = VectorBombermanEnv(BOARDS, levels, num_players=num_players, max_ticks=400, seed=1)
+    level_indexes = [board % len(levels) for board in range(BOARDS)]
+    env.reset(level_indexes)
+    states = [levels[index].create_state(num_players=num_players) for index in level_indexes]
+    keys = [input_keys(num)[-len(ACTIONS):] for num in range(1, num_players + 1)]
+    rng = np.random.default_rng(0)
+
+    matches = hit_ticks = 0
+    for _ in range(TICKS):
+        actions = rng.choice(len(ACTION_KEYS), size=(BOARDS, num_players), p=ACTION_CHANCES)
+        _, _, dones, info = env.step(actions)
+        for board, state in enumerate(states):
+            hits = np.zeros(num_players, dtype=bool)
+            for event in state.step(input_state(keys, actions[board])):
+                if event["type"] == "player_hit":
+                    hits[event["player"] - 1] = True
+            assert (hits == info["hits"][board]).all()
+            if dones[board]:
+                matches += 1
+                hit_ticks += hits.any()
+                states[board] = state = levels[env.level_index[board]].create_state(num_players=num_players)
+
+            tiles, bomb_types, bomb_turns = board_arrays(state)
+            assert (tiles == env.tiles[board]).all()
+            assert (bomb_types == env.bomb_types[board]).all()
+            assert (bomb_turns == env.bomb_turns[board]).all()
+            for player in state.players:
+                index = player.player_num - 1
+                assert (player.x, player.y) == (env.x[board, index], env.y[board, index])
+                assert (player.target_x, player.target_y) == (env.target_x[board, index],
+                                                              env.target_y[board, index])
+    assert hit_ticks > BOARDS
+
+
+def test_single_env_observation():
+    levels = list(generate_levels(2, 5, bombs=12, breakable_chance=0.3))
+    env = BombermanEnv(levels, seed=0)
+    obs = env.reset(0)
+    tiles, bomb_types, bomb_turns = board_arrays(env.state)
+    assert (obs[0] == (tiles == WALL)).all()
+    assert (obs[1] == (tiles == BREAKABLE)).all()
+    assert (obs[2] == (bomb_types == PLAYER_BOMB)).all()
+    assert (obs[3] == bomb_turns * (bomb_types == INITIAL_BOMB)).all()
+
+    # The observation is written in place; a copy keeps the earlier one
+    kept = obs.copy()
+    assert env.step([4, 3])[0] is obs
+    assert (kept != obs).any()
@@ -1,40 +1,58 @@
-import pygame
+from config import TILE_SIZE
+
+TILE_COLORS = {
+    0: (193, 245, 241),  # Empty tile color
+    1: (193, 245, 241),  # Wall tile color
+    2: (150, 75, 0),     # Breakable tile color
+}
+GRID_LINE_COLOR = (50, 50, 50)
 
 
 class Tile:
-    def __init__(self, x, y, size, tile_type):
+    __slots__ = ("row", "col", "tile_type")
+
+    def __init__(self, row, col, tile_type=0):
         """
         Initialize the Tile object.
 
-        :param x: x-coordinate of the tile.
-        :param y: y-coordinate of the tile.
-        :param size: Size of the tile.
+        Only the grid position and type are stored; pixel position and size follow
+        from TILE_SIZE.
+
+        :param row: Row of the tile.
+        :param col: Column of the tile.
         :param tile_type: Type of the tile (0 = Empty, 1 = Wall, 2 = Breakable).
         """
-        self.x = x
-        self.y = y
-        self.size = size
+        self.row = row
+        self.col = col
         self.tile_type = tile_type  # 0 = Empty, 1 = Wall, 2 = Breakable
 
-    def draw(self, screen):
+    @property
+    def x(self):
+        """x-coordinate of the tile."""
+        return self.col * TILE_SIZE
+
+    @property
+    def y(self):
+        """y-coordinate of the tile."""
+        return self.row * TILE_SIZE
+
+    @property
+    def size(self):
+        """Size of the tile."""
+        return TILE_SIZE
+
+    def draw(self, screen, offset=(0, 0)):
         """
         Draw the tile on the screen.
 
         :param screen: The Pygame screen object.
+        :param offset: (x, y) added to the tile's position, e.g. by a camera.
         """
-        # Define colors
-        colors = {
-            0: (193, 245, 241),  # Empty tile color
-            1: (193, 245, 241),  # Wall tile color
-            2: (150, 75, 0),     # Breakable tile color
-        }
+        import pygame  # Only drawing needs pygame; the headless engine never loads it
+        rect = (self.col * TILE_SIZE + offset[0], self.row * TILE_SIZE + offset[1], TILE_SIZE, TILE_SIZE)
 
         # Draw tile
-        pygame.draw.rect(
-            screen, colors[self.tile_type], (self.x, self.y, self.size, self.size)
-        )
+        pygame.draw.rect(screen, TILE_COLORS[self.tile_type], rect)
 
         # Draw grid line (border)
-        pygame.draw.rect(
-            screen, (50, 50, 50), (self.x, self.y, self.size, self.size), 1
-        )
\ No newline at end of file
+        pygame.draw.rect(screen, GRID_LINE_COLOR, rect, 1)
@@ -0,0 +1,112 @@
+WHEEL_BITS = 6                   # Each level has 2 ** WHEEL_BITS slots
+WHEEL_SIZE = 1 << WHEEL_BITS
+WHEEL_MASK = WHEEL_SIZE - 1
+WHEEL_LEVELS = 4                 # Levels cover 64, 4096, 262144 and 16777216 ticks
+
+
+class TimerWheel:
+    def __init__(self, now=0):
+        """
+        Initialize the TimerWheel object.
+
+        A hierarchical timing wheel of items due at a given tick. Level 0 has one
+        slot per tick; each higher level has one slot per full turn of the level
+        below. An item sits in the lowest level whose current turn contains its
+        due tick and moves down one level at a time as the wheel turns, so
+        advancing costs time proportional to the items that expire (plus an
+        amortized share of those moved down), not to every scheduled item.
+
+        :param now: First tick that advance() will expire.
+        """
+        self.now = now
+        self.levels = [[[] for _ in range(WHEEL_SIZE)] for _ in range(WHEEL_LEVELS)]
+        self.overflow = []  # Items beyond the top level, sorted into it once it comes round
+        self.count = 0
+
+    def __len__(self):
+        """Number of scheduled items, including ones the owner no longer wants."""
+        return self.count
+
+    def schedule(self, due, item):
+        """
+        Add an item.
+
+        Items cannot be removed; an owner that changes its mind checks the item
+        when it expires instead (see GameState.expired_bombs).
+
+        :param due: Tick the item expires at; past ticks expire on the next advance().
+        :param item: Any object.
+        """
+        due = max(due, self.now)
+        self.count += 1
+        self.place(due, item)
+
+    def place(self, due, item):
+        """Put an item in the lowest level whose current turn contains its due tick."""
+        now = self.now
+        for level in range(WHEEL_LEVELS):
+            shift = WHEEL_BITS * (level + 1)
+            if due >> shift == now >> shift:
+                self.levels[level][(due >> (shift - WHEEL_BITS)) & WHEEL_MASK].append((due, item))
+                return
+        self.overflow.append((due, item))
+
+    def cascade(self):
+        """Move the items of the higher-level slots that just came round down the wheel."""
+        now = self.now
+        if now & ((1 << (WHEEL_BITS * WHEEL_LEVELS)) - 1) == 0:
+            overflow = self.overflow
+            self.overflow = []
+            for due, item in overflow:
+                self.place(due, item)
+        for level in range(WHEEL_LEVELS - 1, 0, -1):
+            shift = WHEEL_BITS * level
+            if now & ((1 << shift) - 1) == 0:
+                slot = self.levels[level][(now >> shift) & WHEEL_MASK]
+                entries = slot[:]
+                slot.clear()
+                for due, item in entries:
+                    self.place(due, item)
+
+    def advance(self, tick):
+        """
+        Turn the wheel up to a tick and remove the items due until then.
+
+        :param tick: Last tick to expire.
+        :return: List of (due, item) tuples, in due order; items due at the same
+                 tick are in the order they were scheduled.
+        """
+        expired = []
+        level0 = self.levels[0]
+        while self.now <= tick:
+            slot = level0[self.now & WHEEL_MASK]
+            if slot:
+                expired.extend(slot)
+                slot.clear()
+            self.now += 1
+            if self.now & WHEEL_MASK == 0:  # Level 0 came round; bring the next turn's items down
+                self.cascade()
+        self.count -= len(expired)
+        return expired
+
+    def peek(self, tick):
+        """
+        Get the items due until a tick without removing them.
+
+        Only the slots that can hold such items are read, so looking a few ticks
+        ahead is cheap.
+
+        :param tick: Last tick to include.
+        :return: List of (due, item) tuples, in no particular order.
+        """
+        found = []
+        now = self.now
+        for level, slots in enumerate(self.levels):
+            shift = WHEEL_BITS * level
+            first = (now >> shift) + (1 if level else 0)  # Level 0 includes the current slot
+            last = min(tick >> shift, (now >> shift) | WHEEL_MASK)  # Up to the end of this turn
+            for position in range(first, last + 1):
+                found.extend(entry for entry in slots[position & WHEEL_MASK] if entry[0] <= tick)
+        if self.overflow and tick >> (WHEEL_BITS * WHEEL_LEVELS) != now >> (WHEEL_BITS * WHEEL_LEVELS):
+            found.extend(entry for entry in self.overflow if entry[0] <= tick)
+        return found
@@ -1,18 +1,19 @@
-import pygame
-from tile import Tile
+from tile import Tile, GRID_LINE_COLOR
+from config import TILE_SIZE
 
 
 class Wall(Tile):
-    def __init__(self, x, y, size):
+    __slots__ = ()
+    color = (19, 17, 26)
+
+    def __init__(self, row, col):
         """
         Initialize the Wall object.
 
-        :param x: x-coordinate of the wall.
-        :param y: y-coordinate of the wall.
-        :param size: Size of the wall tile.
+        :param row: Row of the wall.
+        :param col: Column of the wall.
         """
-        super().__init__(x, y, size, 1)  # 1 = Wall tile
-        self.color = (19, 17, 26)
+        super().__init__(row, col, 1)  # 1 = Wall tile
 
     @staticmethod
     def get_walls(tiles):
@@ -23,13 +24,14 @@ class Wall(Tile):
         """
         return [tile for row in tiles for tile in row if isinstance(tile, Wall)]
 
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
         """
         Draw the wall on the screen.
 
         :param screen: The Pygame screen object.
+        :param offset: (x, y) added to the wall's position, e.g. by a camera.
         """
-        pygame.draw.rect(screen, self.color, (self.x, self.y, self.size, self.size))
-        pygame.draw.rect(
-            screen, (50, 50, 50), (self.x, self.y, self.size, self.size), 1
-        )  # Border
+        import pygame
+        rect = (self.col * TILE_SIZE + offset[0], self.row * TILE_SIZE + offset[1], TILE_SIZE, TILE_SIZE)
+        pygame.draw.rect(screen, self.color, rect)
+        pygame.draw.rect(screen, GRID_LINE_COLOR, rect, 1)  # Border